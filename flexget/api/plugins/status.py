@@ -9,7 +9,8 @@ from flask import jsonify, request
 from flask_restplus import inputs
 from flexget.api.app import NotFoundError, etag, pagination_headers, api, APIResource
 from flexget.api.core.tasks import tasks_api
-from flexget.plugins.operate.status import StatusTask, TaskExecution, get_executions_by_task_id, get_status_tasks
+from flexget.plugins.operate.status import (StatusTask, get_executions_by_task_id, get_status_tasks,
+                                            get_last_executions)
 from sqlalchemy.orm.exc import NoResultFound
 
 log = logging.getLogger('status_api')
@@ -30,20 +31,56 @@ class ObjectsContainer(object):
             'rejected': {'type': 'integer'},
             'start': {'type': 'string', 'format': 'date-time'},
             'succeeded': {'type': 'boolean'},
-            'task_id': {'type': 'integer'}
+            'task_id': {'type': 'integer'},
+            'phases': {
+                'type': 'object',
+                'additionalProperties': {
+                    'type': 'object',
+                    'properties': {
+                        'seconds': {'type': 'number'},
+                        'undecided': {'type': 'integer'},
+                        'accepted': {'type': 'integer'},
+                        'rejected': {'type': 'integer'},
+                        'failed': {'type': 'integer'}
+                    }
+                }
+            }
         },
         'additionalProperties': False
     }
 
     executions_list = {'type': 'array', 'items': task_status_execution_schema}
 
+    task_status_summary_schema = {
+        'type': ['object', 'null'],
+        'properties': {
+            'executions': {'type': 'integer'},
+            'failures': {'type': 'integer'},
+            'p50_duration': {'type': ['number', 'null']},
+            'p95_duration': {'type': ['number', 'null']},
+            'error_rate': {'type': ['number', 'null']},
+            'phases': {
+                'type': 'object',
+                'additionalProperties': {
+                    'type': 'object',
+                    'properties': {
+                        'p50': {'type': 'number'},
+                        'p95': {'type': 'number'}
+                    }
+                }
+            }
+        },
+        'additionalProperties': False
+    }
+
     task_status_schema = {
         'type': 'object',
         'properties': {
             'id': {'type': 'integer'},
             'name': {'type': 'string'},
             'last_execution_time': {'type': ['string', 'null'], 'format': 'date-time'},
-            'last_execution': task_status_execution_schema
+            'last_execution': task_status_execution_schema,
+            'summary': task_status_summary_schema
         },
         'required': ['id', 'name'],
         'additionalProperties': False
@@ -56,7 +93,7 @@ task_status = api.schema_model('tasks.tasks_status', ObjectsContainer.task_statu
 task_status_list = api.schema_model('tasks.tasks_status_list', ObjectsContainer.task_status_list_schema)
 task_executions = api.schema_model('tasks.tasks_executions_list', ObjectsContainer.executions_list)
 
-sort_choices = ('last_execution_time', 'name', 'id')
+sort_choices = ('last_execution_time', 'name', 'id', 'p50_duration', 'p95_duration', 'error_rate')
 tasks_parser = api.pagination_parser(sort_choices=sort_choices)
 tasks_parser.add_argument('include_execution', type=inputs.boolean, default=True,
                           help='Include the last execution of the task')
@@ -116,11 +153,14 @@ class TasksStatusAPI(APIResource):
         # Get pagination headers
         pagination = pagination_headers(total_pages, total_items, actual_size, request)
 
+        if include_execution:
+            last_executions = get_last_executions(db_status_tasks, session=session)
+
         status_tasks = []
         for task in db_status_tasks:
             st_task = task.to_dict()
             if include_execution:
-                execution = task.executions.order_by(TaskExecution.start.desc()).first()
+                execution = last_executions.get(task.id)
                 st_task['last_execution'] = execution.to_dict() if execution else {}
             status_tasks.append(st_task)
 
@@ -151,7 +191,7 @@ class TaskStatusAPI(APIResource):
 
         st_task = task.to_dict()
         if include_execution:
-            execution = task.executions.order_by(TaskExecution.start.desc()).first()
+            execution = get_last_executions([task], session=session).get(task.id)
             st_task['last_execution'] = execution.to_dict() if execution else {}
         return jsonify(st_task)
 
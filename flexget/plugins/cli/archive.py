@@ -11,9 +11,10 @@ from flexget.entry import Entry
 from flexget.event import event
 from flexget.manager import Session
 from flexget.options import ParseExtrasAction, get_parser
-from flexget.plugins.generic.archive import ArchiveEntry, ArchiveSource, get_source, get_tag, search
+from flexget.plugins.generic.archive import (ArchiveEntry, ArchiveSource, get_source, get_tag, search,
+                                            rebuild_index, unindex_entries)
 from flexget.terminal import TerminalTable, TerminalTableError, table_parser, console
-from flexget.utils.tools import strip_html
+from flexget.utils.tools import strip_html, chunked
 
 log = logging.getLogger('archive_cli')
 
@@ -29,6 +30,17 @@ def do_cli(manager, options):
         cli_search(options)
     elif action == 'inject':
         cli_inject(manager, options)
+    elif action == 'reindex':
+        reindex()
+
+
+def reindex():
+    """
+    Builds the archive search index from scratch.
+    """
+    with Session() as session:
+        rebuild_index(session)
+    console('Archive search index rebuilt')
 
 
 def consolidate():
@@ -79,8 +91,11 @@ def consolidate():
 
         if duplicates:
             log.info('Consolidated %i items, removing duplicates ...' % len(duplicates))
-            for id in duplicates:
-                session.query(ArchiveEntry).filter(ArchiveEntry.id == id).delete()
+            for chunk in chunked(duplicates):
+                # Stale index rows would match new entries which reuse the deleted ids
+                unindex_entries(session, session.query(ArchiveEntry.id, ArchiveEntry.title).
+                                filter(ArchiveEntry.id.in_(chunk)).all())
+                session.query(ArchiveEntry).filter(ArchiveEntry.id.in_(chunk)).delete(synchronize_session=False)
         session.commit()
         log.info('Completed! This does NOT need to be ran again.')
     except KeyboardInterrupt:
@@ -135,7 +150,7 @@ def cli_search(options):
 
     table_data = []
     with Session() as session:
-        for archived_entry in search(session, query, tags=tags, sources=sources):
+        for archived_entry in search(session, query, tags=tags, sources=sources, rank=True):
             days_ago = (datetime.now() - archived_entry.added).days
             source_names = ', '.join([s.name for s in archived_entry.sources])
             tag_names = ', '.join([t.name for t in archived_entry.tags])
@@ -229,3 +244,4 @@ def register_parser_arguments():
     tag_parser.add_argument('tags', nargs='+', metavar='<tag>',
                             help='The tag(s) you would like to apply to the entries')
     archive_parser.add_subparser('consolidate', help='Migrate old archive data to new model, may take a long time')
+    archive_parser.add_subparser('reindex', help='Rebuild the archive search index, may take a long time')
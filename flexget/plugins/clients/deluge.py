@@ -14,6 +14,7 @@ import time
 from flexget import plugin
 from flexget.entry import Entry
 from flexget.event import event
+from flexget.utils.client_pool import get_client, report_client_error
 from flexget.utils.pathscrub import pathscrub
 from flexget.utils.template import RenderError
 
@@ -43,11 +44,18 @@ class DelugePlugin(object):
                 raise plugin.PluginError('Unable to get local authentication info for Deluge. You may need to '
                                          'specify an username and password from your Deluge auth file.')
 
-        self.client = DelugeRPCClient(config['host'], config['port'], config['username'], config['password'],
-                                      decode_utf8=True)
+        self.pool_key = ('deluge', config['host'], config['port'], config['username'], config['password'])
+        self.client = get_client(
+            self.pool_key,
+            lambda: DelugeRPCClient(config['host'], config['port'], config['username'], config['password'],
+                                    decode_utf8=True),
+            check=lambda client: not client.connected or client.call('daemon.info'),
+            close=lambda client: client.connected and client.disconnect())
 
     def on_task_abort(self, task, config):
-        pass
+        # The connection may have broken, make sure it still works before the next task uses it
+        if getattr(self, 'pool_key', None):
+            report_client_error(self.pool_key)
 
     def prepare_config(self, config):
         config.setdefault('host', 'localhost')
@@ -55,7 +63,9 @@ class DelugePlugin(object):
         return config
 
     def connect(self):
-        """Connects to the deluge daemon and runs on_connect_success """
+        """Connects to the deluge daemon, unless the pooled client is still connected from an earlier task"""
+        if self.client.connected:
+            return
 
         self.client.connect()
 
@@ -63,7 +73,7 @@ class DelugePlugin(object):
             raise plugin.PluginError('Deluge failed to connect.')
 
     def disconnect(self):
-        self.client.disconnect()
+        """The connection is kept open in the client pool for the next tasks, it is closed once it goes idle"""
 
     def get_torrents_status(self, fields, filters=None):
         """Fetches all torrents and their requested fields optionally filtered"""
@@ -340,7 +350,7 @@ class OutputDeluge(DelugePlugin):
 
         if task.options.test:
             log.debug('Test connection to deluge daemon successful.')
-            self.client.disconnect()
+            self.disconnect()
             return
 
         # loop through entries to get a list of labels to add
@@ -451,6 +461,7 @@ class OutputDeluge(DelugePlugin):
                                 status = self.client.call('core.get_torrent_status', torrent_id, ['files'])
                             except Exception as err:
                                 log.error('wait_for_metadata Error: %s', err)
+                                report_client_error(self.pool_key)
                                 break
                             if status.get('files'):
                                 log.info('"%s" magnetization successful', entry['title'])
@@ -463,6 +474,7 @@ class OutputDeluge(DelugePlugin):
                         added_torrent = self.client.call('core.add_torrent_file', entry['title'], filedump, add_opts)
                     except Exception as e:
                         log.info('%s was not added to deluge! %s', entry['title'], e)
+                        report_client_error(self.pool_key)
                         entry.fail('Could not be added to deluge')
                 if not added_torrent:
                     log.error('There was an error adding %s to deluge.' % entry['title'])
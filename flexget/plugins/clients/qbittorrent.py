@@ -9,6 +9,7 @@ from requests.exceptions import RequestException
 
 from flexget import plugin
 from flexget.event import event
+from flexget.utils.client_pool import get_client, report_client_error
 from flexget.utils.template import RenderError
 
 
@@ -59,6 +60,8 @@ class OutputQBitTorrent(object):
                 return response
         except RequestException as e:
             msg = str(e)
+            # The logged in session may have broken, make sure it still works before the next task uses it
+            report_client_error(self.pool_key)
         raise plugin.PluginError('Error when trying to send request to qBittorrent: {}'.format(msg))
 
     def connect(self, config):
@@ -66,16 +69,27 @@ class OutputQBitTorrent(object):
         Connect to qBittorrent Web UI. Username and password not necessary
         if 'Bypass authentication for localhost' is checked and host is
         'localhost'.
+
+        Logged in sessions are kept in the client pool and reused by later tasks.
         """
-        self.session = Session()
         self.url = '{}://{}:{}'.format('https' if config['use_ssl'] else 'http', config['host'], config['port'])
+        self.pool_key = ('qbittorrent', self.url, config.get('username'), config.get('password'),
+                         config['verify_cert'])
+        self.session = get_client(self.pool_key, lambda: self._login(config),
+                                  check=lambda session: session.get(self.url + '/query/preferences',
+                                                                    verify=config['verify_cert']).ok,
+                                  close=lambda session: session.close())
+        self.connected = True
+
+    def _login(self, config):
+        self.session = Session()
         if config.get('username') and config.get('password'):
             data = {'username': config['username'],
                     'password': config['password']}
             self._request('post', self.url + '/login', data=data, msg_on_fail='Authentication failed.',
                           verify=config['verify_cert'])
         log.debug('Successfully connected to qBittorrent')
-        self.connected = True
+        return self.session
 
     def add_torrent_file(self, file_path, data, verify_cert):
         if not self.connected:
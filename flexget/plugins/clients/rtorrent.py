@@ -23,6 +23,11 @@ from requests.auth import HTTPDigestAuth, HTTPBasicAuth
 
 log = logging.getLogger('rtorrent')
 
+# by default rtorrent won't allow calls over 512kb in size
+XMLRPC_SIZE_LIMIT = 524288
+# Room left in each call for the xmlrpc envelope
+XMLRPC_BUFFER_SIZE = 71680
+
 
 class _Method(object):
     # some magic to bind an XML-RPC method to an RPC server.
@@ -239,10 +244,7 @@ class RTorrent(object):
 
         return fields
 
-    def load(self, raw_torrent, fields=None, start=False, mkdir=True):
-
-        if fields is None:
-            fields = {}
+    def _load_params(self, raw_torrent, fields):
         # First param is empty 'target'
         params = ['', xmlrpc_client.Binary(raw_torrent)]
 
@@ -250,6 +252,13 @@ class RTorrent(object):
         for key, val in fields.items():
             # Values must be escaped if within params
             params.append('d.%s.set=%s' % (key, re.escape(native_str(val))))
+        return params
+
+    def load(self, raw_torrent, fields=None, start=False, mkdir=True):
+
+        if fields is None:
+            fields = {}
+        params = self._load_params(raw_torrent, fields)
 
         if mkdir and 'directory' in fields:
             result = self._server.execute.throw('', 'mkdir', '-p', fields['directory'])
@@ -257,8 +266,8 @@ class RTorrent(object):
                 raise xmlrpc_client.Error('Failed creating directory %s' % fields['directory'])
 
         # by default rtorrent won't allow calls over 512kb in size.
-        xmlrpc_size = len(xmlrpc_client.dumps(tuple(params), 'raw_start')) + 71680  # Add 70kb for buffer
-        if xmlrpc_size > 524288:
+        xmlrpc_size = len(xmlrpc_client.dumps(tuple(params), 'raw_start')) + XMLRPC_BUFFER_SIZE
+        if xmlrpc_size > XMLRPC_SIZE_LIMIT:
             prev_size = self._server.network.xmlrpc.size_limit()
             self._server.network.xmlrpc.size_limit.set('', xmlrpc_size)
 
@@ -268,11 +277,86 @@ class RTorrent(object):
         else:
             result = self._server.load.raw(*params)
 
-        if xmlrpc_size > 524288:
+        if xmlrpc_size > XMLRPC_SIZE_LIMIT:
             self._server.network.xmlrpc.size_limit.set('', prev_size)
 
         return result
 
+    def load_many(self, torrents, start=False, mkdir=True):
+        """
+        Loads many torrents using as few system.multicall round trips as the xmlrpc size limit allows
+
+        :param torrents: List of (raw_torrent, fields) tuples
+        :return: List with the load result of each torrent, or a :class:`xmlrpc_client.Error` for failed ones
+        """
+        results = [None] * len(torrents)
+
+        if mkdir:
+            directories = []
+            for raw_torrent, fields in torrents:
+                if 'directory' in fields and fields['directory'] not in directories:
+                    directories.append(fields['directory'])
+            created = self.multicall([('execute.throw', ('', 'mkdir', '-p', directory)) for directory in directories])
+            failed = set(directory for directory, result in zip(directories, created) if result != 0)
+            for index, (raw_torrent, fields) in enumerate(torrents):
+                if fields.get('directory') in failed:
+                    results[index] = xmlrpc_client.Error('Failed creating directory %s' % fields['directory'])
+
+        method = 'load.raw_start' if start else 'load.raw'
+        calls, indexes, size = [], [], 0
+        for index, (raw_torrent, fields) in enumerate(torrents):
+            if results[index] is not None:
+                continue
+            params = self._load_params(raw_torrent, fields)
+            call_size = len(xmlrpc_client.dumps(tuple(params), method))
+            if call_size + XMLRPC_BUFFER_SIZE > XMLRPC_SIZE_LIMIT:
+                # Too big to share a call with other torrents, load makes room for it
+                try:
+                    results[index] = self.load(raw_torrent, fields, start=start, mkdir=False)
+                except xmlrpc_client.Error as e:
+                    results[index] = e
+                continue
+            if size + call_size + XMLRPC_BUFFER_SIZE > XMLRPC_SIZE_LIMIT:
+                for call_index, result in zip(indexes, self.multicall(calls)):
+                    results[call_index] = result
+                calls, indexes, size = [], [], 0
+            calls.append((method, params))
+            indexes.append(index)
+            size += call_size
+        for call_index, result in zip(indexes, self.multicall(calls)):
+            results[call_index] = result
+        return results
+
+    def multicall(self, calls):
+        """
+        Runs many methods in one round trip
+
+        :param calls: List of (method name, params) tuples
+        :return: List with the result of each call, or a :class:`xmlrpc_client.Fault` for calls which failed
+        """
+        if not calls:
+            return []
+        resp = self._server.system.multicall([{'methodName': name, 'params': list(params)} for name, params in calls])
+        results = []
+        for item in resp:
+            if isinstance(item, dict):
+                results.append(xmlrpc_client.Fault(item['faultCode'], item['faultString']))
+            else:
+                results.append(item[0])
+        return results
+
+    def existing(self, info_hashes):
+        """
+        Checks which of the torrents are loaded in rTorrent with one round trip
+
+        :param info_hashes: List of info hashes
+        :return: Set of the info hashes rTorrent knows about
+        """
+        info_hashes = [native_str(info_hash) for info_hash in info_hashes]
+        results = self.multicall([('d.hash', (info_hash,)) for info_hash in info_hashes])
+        return set(info_hash for info_hash, result in zip(info_hashes, results)
+                   if not isinstance(result, xmlrpc_client.Fault))
+
     def get_directory(self):
         return self._server.get_directory()
 
@@ -414,15 +498,24 @@ class RTorrentOutputPlugin(RTorrentPluginBase):
         'additionalProperties': False,
     }
 
-    def _verify_load(self, client, info_hash):
-        ex = xmlrpc_client.Error()
+    def _verify_loads(self, client, entries):
+        pending = list(entries)
+        error = 'not found'
         for _ in range(0, 5):
             try:
-                return client.torrent(info_hash, fields=['hash'])
+                loaded = client.existing([entry['torrent_info_hash'] for entry in pending])
             except xmlrpc_client.Error as e:
-                ex = e
-                sleep(0.5)
-        raise ex
+                loaded = set()
+                error = e
+            for entry in pending:
+                if native_str(entry['torrent_info_hash']) in loaded:
+                    log.info('%s added to rtorrent' % entry['title'])
+            pending = [entry for entry in pending if native_str(entry['torrent_info_hash']) not in loaded]
+            if not pending:
+                return
+            sleep(0.5)
+        for entry in pending:
+            log.warning('Failed to verify torrent %s loaded: %s', entry['title'], str(error))
 
     @plugin.priority(120)
     def on_task_download(self, task, config):
@@ -442,22 +535,10 @@ class RTorrentOutputPlugin(RTorrentPluginBase):
                           session=task.requests)
 
         try:
+            if config['action'] == 'add':
+                self.add_entries(client, task, config)
+                return
             for entry in task.accepted:
-                if config['action'] == 'add':
-                    if task.options.test:
-                        log.info('Would add %s to rTorrent', entry['url'])
-                        continue
-                    try:
-                        options = self._build_options(config, entry)
-                    except RenderError as e:
-                        entry.fail("failed to render properties %s" % str(e))
-                        continue
-
-                    # fast_resume is not really an rtorrent option so it's not in _build_options
-                    fast_resume = entry.get('fast_resume', config['fast_resume'])
-                    self.add_entry(client, entry, options, start=config['start'], mkdir=config['mkdir'],
-                                   fast_resume=fast_resume)
-
                 info_hash = entry.get('torrent_info_hash')
 
                 if not info_hash:
@@ -526,8 +607,65 @@ class RTorrentOutputPlugin(RTorrentPluginBase):
             entry.fail('Failed to update: %s' % str(e))
             return
 
-    def add_entry(self, client, entry, options, start=True, mkdir=False, fast_resume=False):
+    def add_entries(self, client, task, config):
+        """Adds all accepted entries, loading and verifying them in batches"""
+        prepared = []
+        for entry in task.accepted:
+            if task.options.test:
+                log.info('Would add %s to rTorrent', entry['url'])
+                continue
+            try:
+                options = self._build_options(config, entry)
+            except RenderError as e:
+                entry.fail("failed to render properties %s" % str(e))
+                continue
+
+            # fast_resume is not really an rtorrent option so it's not in _build_options
+            fast_resume = entry.get('fast_resume', config['fast_resume'])
+            torrent_raw = self.read_torrent(client, entry, options, fast_resume=fast_resume)
+            if torrent_raw is not None:
+                prepared.append((entry, torrent_raw, options))
+        if not prepared:
+            return
+
+        # First check which already exist
+        try:
+            existing = client.existing([entry['torrent_info_hash'] for entry, _, _ in prepared])
+        except xmlrpc_client.Error:
+            # No existing found
+            existing = set()
+        to_load = []
+        for entry, torrent_raw, options in prepared:
+            if native_str(entry['torrent_info_hash']) in existing:
+                log.warning("Torrent %s already exists, won't add" % entry['title'])
+            else:
+                to_load.append((entry, torrent_raw, options))
+        if not to_load:
+            return
 
+        try:
+            results = client.load_many([(torrent_raw, options) for _, torrent_raw, options in to_load],
+                                       start=config['start'], mkdir=config['mkdir'])
+        except xmlrpc_client.Error as e:
+            results = [e] * len(to_load)
+        loaded = []
+        for (entry, _, _), resp in zip(to_load, results):
+            if isinstance(resp, xmlrpc_client.Error):
+                log.error('Failed to add %s to rTorrent: %s', entry['title'], resp)
+                entry.fail('Failed to add to rTorrent %s' % str(resp))
+                continue
+            if resp != 0:
+                entry.fail('Failed to add to rTorrent invalid return value %s' % resp)
+            loaded.append(entry)
+
+        # Verify the torrents loaded
+        self._verify_loads(client, loaded)
+
+    def read_torrent(self, client, entry, options, fast_resume=False):
+        """
+        Returns the raw torrent to load for entry, adding fast resume data if needed.
+        Fails the entry and returns None if there is no valid torrent.
+        """
         if 'torrent_info_hash' not in entry:
             entry.fail('missing torrent_info_hash')
             return
@@ -590,30 +728,7 @@ class RTorrentOutputPlugin(RTorrentPluginBase):
                 entry.fail('Strange, unable to decode torrent, raise a BUG: %s' % str(e))
                 return
 
-        # First check if it already exists
-        try:
-            if client.torrent(entry['torrent_info_hash']):
-                log.warning("Torrent %s already exists, won't add" % entry['title'])
-                return
-        except xmlrpc_client.Error:
-            # No existing found
-            pass
-
-        try:
-            resp = client.load(torrent_raw, fields=options, start=start, mkdir=mkdir)
-            if resp != 0:
-                entry.fail('Failed to add to rTorrent invalid return value %s' % resp)
-        except xmlrpc_client.Error as e:
-            log.exception(e)
-            entry.fail('Failed to add to rTorrent %s' % str(e))
-            return
-
-        # Verify the torrent loaded
-        try:
-            self._verify_load(client, entry['torrent_info_hash'])
-            log.info('%s added to rtorrent' % entry['title'])
-        except xmlrpc_client.Error as e:
-            log.warning('Failed to verify torrent %s loaded: %s', entry['title'], str(e))
+        return torrent_raw
 
     def on_task_learn(self, task, config):
         """ Make sure all temp files are cleaned up when entries are learned """
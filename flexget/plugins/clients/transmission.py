@@ -16,6 +16,7 @@ from netrc import netrc, NetrcParseError
 from flexget import plugin, validator
 from flexget.entry import Entry
 from flexget.event import event
+from flexget.utils.client_pool import get_client, report_client_error
 from flexget.utils.template import RenderError
 from flexget.utils.pathscrub import pathscrub
 from flexget.utils.tools import parse_timedelta
@@ -33,12 +34,61 @@ except ImportError:
 
 log = logging.getLogger('transmission')
 
+# Torrent fields needed to pick files from added torrents
+FILE_FIELDS = ['id', 'totalSize', 'files', 'priorities', 'wanted']
+# Torrent fields used by torrent_info and check_seed_limits
+INFO_FIELDS = ['id', 'name', 'status', 'hashString', 'totalSize', 'files', 'priorities', 'wanted', 'downloadDir',
+               'uploadRatio', 'seedRatioMode', 'seedRatioLimit', 'seedIdleMode', 'seedIdleLimit', 'activityDate',
+               'addedDate', 'doneDate', 'trackers']
+INPUT_FIELDS = INFO_FIELDS + ['torrentFile', 'comment', 'isFinished', 'isPrivate']
+
+MAGNETIZATION_POLL_INTERVAL = 1
+
+
+def _filter_list(items):
+    return [item for item in items if isinstance(item, basestring)]
+
+
+def _find_matches(name, masks):
+    for mask in masks:
+        if fnmatch(name, mask):
+            return True
+    return False
+
+
+class _AddedTorrent(object):
+    """State of a torrent added during this run, while its files are being processed"""
+
+    def __init__(self, entry, options, torrent_id, downloaded):
+        self.entry = entry
+        self.options = options
+        self.id = torrent_id
+        self.downloaded = downloaded
+        self.find_main_file = False
+        self.needs_files = False
+        self.total_size = 0
+        self.files = {}
+
+
+class _LazySession(object):
+    """Fetches the transmission session settings on first use, at most once"""
+
+    def __init__(self, cli):
+        self._cli = cli
+        self._session = None
+
+    def __getattr__(self, item):
+        if self._session is None:
+            self._session = self._cli.get_session()
+        return getattr(self._session, item)
+
 
 class TransmissionBase(object):
 
     def __init__(self):
         self.client = None
         self.opener = None
+        self.pool_key = None
 
     def _validator(self, advanced):
         """Return config validator"""
@@ -70,9 +120,14 @@ class TransmissionBase(object):
 
     def create_rpc_client(self, config):
         user, password = config.get('username'), config.get('password')
+        self.pool_key = ('transmission', config['host'], config['port'], user, password)
+        return get_client(self.pool_key,
+                          lambda: self._connect(config['host'], config['port'], user, password),
+                          check=lambda cli: cli.get_session())
 
+    def _connect(self, host, port, user, password):
         try:
-            cli = transmissionrpc.Client(config['host'], config['port'], user, password)
+            cli = transmissionrpc.Client(host, port, user, password)
         except TransmissionError as e:
             if isinstance(e.original, HTTPHandlerError):
                 if e.original.code == 111:
@@ -87,6 +142,11 @@ class TransmissionBase(object):
                 raise plugin.PluginError("Error connecting to transmission: %s" % e.message)
         return cli
 
+    def get_torrents(self, fields):
+        """Fetches all torrents, with only the given fields which the server supports"""
+        supported = self.client.torrent_get_arguments
+        return self.client.get_torrents(arguments=[field for field in fields if field in supported])
+
     def torrent_info(self, torrent, config):
         done = torrent.totalSize > 0
         vloc = None
@@ -144,6 +204,11 @@ class TransmissionBase(object):
                 else:
                     log.error('It looks like there was a problem connecting to transmission.')
 
+    def on_task_abort(self, task, config):
+        # The connection may have broken, make sure it still works before the next task uses it
+        if self.pool_key:
+            report_client_error(self.pool_key)
+
 
 class PluginTransmissionInput(TransmissionBase):
 
@@ -177,7 +242,7 @@ class PluginTransmissionInput(TransmissionBase):
 
         session = self.client.get_session()
 
-        for torrent in self.client.get_torrents():
+        for torrent in self.get_torrents(INPUT_FIELDS):
             downloaded, bigfella = self.torrent_info(torrent, config)
             seed_ratio_ok, idle_limit_ok = self.check_seed_limits(torrent, session)
             if not config['onlycomplete'] or (downloaded and
@@ -384,6 +449,7 @@ class PluginTransmission(TransmissionBase):
 
     def add_to_transmission(self, cli, task, config):
         """Adds accepted entries to transmission """
+        added = []
         for entry in task.accepted:
             if task.options.test:
                 log.info('Would add %s to transmission' % entry['url'])
@@ -414,179 +480,233 @@ class PluginTransmission(TransmissionBase):
                     # we need to set paused to false so the magnetization begins immediately
                     options['add']['paused'] = False
                     r = cli.add_torrent(entry['url'], timeout=30, **options['add'])
+            except TransmissionError as e:
+                self._fail(entry, options, e)
+                continue
+
+            log.info('"%s" torrent added to transmission', entry['title'])
+            added.append(_AddedTorrent(entry, options, r.id, downloaded))
 
-                log.info('"%s" torrent added to transmission', entry['title'])
-
-                total_size = cli.get_torrent(r.id, ['id', 'totalSize']).totalSize
-
-                def _filter_list(list):
-                    for item in list:
-                        if not isinstance(item, basestring):
-                            list.remove(item)
-                    return list
-
-                def _find_matches(name, list):
-                    for mask in list:
-                        if fnmatch(name, mask):
-                            return True
-                    return False
-
-                def _wait_for_files(cli, r, timeout):
-                    from time import sleep
-                    while timeout > 0:
-                        sleep(1)
-                        fl = cli.get_files(r.id)
-                        if len(fl[r.id]) > 0:
-                            return fl
-                        else:
-                            timeout -= 1
-                    return fl
-
-                skip_files = False
-                # Filter list because "set" plugin doesn't validate based on schema
-                # Skip files only used if we have no main file
-                if 'skip_files' in options['post']:
-                    skip_files = True
-                    options['post']['skip_files'] = _filter_list(options['post']['skip_files'])
-
-                main_id = None
-                find_main_file = options['post'].get('main_file_only') or 'content_filename' in options['post']
-                # We need to index the files if any of the following are defined
-                if find_main_file or skip_files:
-                    fl = cli.get_files(r.id)
-
-                    if ('magnetization_timeout' in options['post'] and
-                        options['post']['magnetization_timeout'] > 0 and
-                            not downloaded and
-                            len(fl[r.id]) == 0):
-                        log.debug('Waiting %d seconds for "%s" to magnetize', options['post']['magnetization_timeout'],
-                                  entry['title'])
-                        fl = _wait_for_files(cli, r, options['post']['magnetization_timeout'])
-                        if len(fl[r.id]) == 0:
-                            log.warning('"%s" did not magnetize before the timeout elapsed, '
-                                        'file list unavailable for processing.', entry['title'])
-                        else:
-                            total_size = cli.get_torrent(r.id, ['id', 'totalSize']).totalSize
-
-                    # Find files based on config
-                    dl_list = []
-                    skip_list = []
-                    main_list = []
-                    full_list = []
-                    ext_list = ['*.srt', '*.sub', '*.idx', '*.ssa', '*.ass']
-
-                    main_ratio = config['main_file_ratio']
-                    if 'main_file_ratio' in options['post']:
-                        main_ratio = options['post']['main_file_ratio']
-
-                    if 'include_files' in options['post']:
-                        options['post']['include_files'] = _filter_list(options['post']['include_files'])
-
-                    for f in fl[r.id]:
-                        full_list.append(f)
-                        # No need to set main_id if we're not going to need it
-                        if find_main_file and fl[r.id][f]['size'] > total_size * main_ratio:
-                            main_id = f
-
-                        if 'include_files' in options['post']:
-                            if _find_matches(fl[r.id][f]['name'], options['post']['include_files']):
-                                dl_list.append(f)
-                            elif options['post'].get('include_subs') and _find_matches(fl[r.id][f]['name'], ext_list):
-                                dl_list.append(f)
-
-                        if skip_files:
-                            if _find_matches(fl[r.id][f]['name'], options['post']['skip_files']):
-                                skip_list.append(f)
-
-                    if main_id is not None:
-
-                        # Look for files matching main ID title but with a different extension
-                        if options['post'].get('rename_like_files'):
-                            for f in fl[r.id]:
-                                # if this filename matches main filename we want to rename it as well
-                                fs = os.path.splitext(fl[r.id][f]['name'])
-                                if fs[0] == os.path.splitext(fl[r.id][main_id]['name'])[0]:
-                                    main_list.append(f)
-                        else:
-                            main_list = [main_id]
-
-                        if main_id not in dl_list:
-                            dl_list.append(main_id)
-                    elif find_main_file:
-                        log.warning('No files in "%s" are > %d%% of content size, no files renamed.',
-                            entry['title'], main_ratio * 100)
-
-                    # If we have a main file and want to rename it and associated files
-                    if 'content_filename' in options['post'] and main_id is not None:
-                        if 'download_dir' not in options['add']:
-                            download_dir = cli.get_session().download_dir
-                        else:
-                            download_dir = options['add']['download_dir']
-
-                        # Get new filename without ext
-                        file_ext = os.path.splitext(fl[r.id][main_id]['name'])[1]
-                        file_path = os.path.dirname(os.path.join(download_dir, fl[r.id][main_id]['name']))
-                        filename = options['post']['content_filename']
-                        if config['host'] == 'localhost' or config['host'] == '127.0.0.1':
-                            counter = 1
-                            while os.path.exists(os.path.join(file_path, filename + file_ext)):
-                                # Try appending a (#) suffix till a unique filename is found
-                                filename = '%s(%s)' % (options['post']['content_filename'], counter)
-                                counter += 1
-                        else:
-                            log.debug('Cannot ensure content_filename is unique '
-                                      'when adding to a remote transmission daemon.')
-
-                        for index in main_list:
-                            file_ext = os.path.splitext(fl[r.id][index]['name'])[1]
-                            log.debug('File %s renamed to %s' % (fl[r.id][index]['name'], filename + file_ext))
-                            # change to below when set_files will allow setting name, more efficient to have one call
-                            # fl[r.id][index]['name'] = os.path.basename(pathscrub(filename + file_ext).encode('utf-8'))
-                            try:
-                                cli.rename_torrent_path(r.id, fl[r.id][index]['name'],
-                                                        os.path.basename(str(pathscrub(filename + file_ext))))
-                            except TransmissionError:
-                                log.error('content_filename only supported with transmission 2.8+')
-
-                    if options['post'].get('main_file_only') and main_id is not None:
-                        # Set Unwanted Files
-                        options['change']['files_unwanted'] = [x for x in full_list if x not in dl_list]
-                        options['change']['files_wanted'] = dl_list
-                        log.debug('Downloading %s of %s files in torrent.',
-                                  len(options['change']['files_wanted']), len(full_list))
-                    elif (not options['post'].get('main_file_only') or main_id is None) and skip_files:
-                        # If no main file and we want to skip files
-
-                        if len(skip_list) >= len(full_list):
-                            log.debug('skip_files filter would cause no files to be downloaded; '
-                                      'including all files in torrent.')
-                        else:
-                            options['change']['files_unwanted'] = skip_list
-                            options['change']['files_wanted'] = [x for x in full_list if x not in skip_list]
-                            log.debug('Downloading %s of %s files in torrent.',
-                                      len(options['change']['files_wanted']), len(full_list))
-
-                # Set any changed file properties
-                if list(options['change'].keys()):
-                    cli.change_torrent(r.id, 30, **options['change'])
-
-                # if addpaused was defined and set to False start the torrent;
-                # prevents downloading data before we set what files we want
-                if ('paused' in options['post'] and not options['post']['paused'] or
-                        'paused' not in options['post'] and cli.get_session().start_added_torrents):
-                    cli.start_torrent(r.id)
-                elif options['post'].get('paused'):
-                    log.debug('sleeping 5s to stop the torrent...')
-                    time.sleep(5)
-                    cli.stop_torrent(r.id)
-                    log.info('Torrent "%s" stopped because of addpaused=yes', entry['title'])
+        if not added:
+            return
+
+        # Filter list because "set" plugin doesn't validate based on schema
+        for torrent in added:
+            for key in ('skip_files', 'include_files'):
+                if key in torrent.options['post']:
+                    torrent.options['post'][key] = _filter_list(torrent.options['post'][key])
 
+        # Fetch size and file lists of all the added torrents in one request
+        try:
+            self._fetch_torrent_files(cli, added)
+            self._wait_for_files(cli, [t for t in added if t.needs_files and not t.downloaded and not t.files and
+                                       t.options['post'].get('magnetization_timeout', 0) > 0])
+        except TransmissionError as e:
+            for torrent in added:
+                self._fail(torrent.entry, torrent.options, e)
+            return
+
+        session = _LazySession(cli)
+        for torrent in added[:]:
+            try:
+                if torrent.needs_files:
+                    self._select_files(cli, torrent, config, session)
+            except TransmissionError as e:
+                self._fail(torrent.entry, torrent.options, e)
+                added.remove(torrent)
+
+        # Set any changed file properties, torrents sharing the same changes are modified with one request
+        changes = {}
+        for torrent in added:
+            change = torrent.options['change']
+            if list(change.keys()):
+                key = tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in change.items()))
+                changes.setdefault(key, (change, []))[1].append(torrent)
+        for change, torrents in changes.values():
+            try:
+                cli.change_torrent([t.id for t in torrents], 30, **change)
             except TransmissionError as e:
-                log.debug('TransmissionError', exc_info=True)
-                log.debug('Failed options dict: %s', options)
-                msg = 'TransmissionError: %s' % e.message or 'N/A'
-                log.error(msg)
-                entry.fail(msg)
+                for torrent in torrents:
+                    self._fail(torrent.entry, torrent.options, e)
+                    added.remove(torrent)
+
+        # if addpaused was defined and set to False start the torrent;
+        # prevents downloading data before we set what files we want
+        start, stop = [], []
+        for torrent in added:
+            post = torrent.options['post']
+            if 'paused' in post and not post['paused'] or 'paused' not in post and session.start_added_torrents:
+                start.append(torrent)
+            elif post.get('paused'):
+                stop.append(torrent)
+        try:
+            if start:
+                cli.start_torrent([t.id for t in start])
+            if stop:
+                log.debug('sleeping 5s to stop the torrents...')
+                time.sleep(5)
+                cli.stop_torrent([t.id for t in stop])
+                for torrent in stop:
+                    log.info('Torrent "%s" stopped because of addpaused=yes', torrent.entry['title'])
+        except TransmissionError as e:
+            for torrent in start + stop:
+                self._fail(torrent.entry, torrent.options, e)
+
+    def _fail(self, entry, options, error):
+        log.debug('TransmissionError', exc_info=True)
+        if error.original is not None:
+            # Not an error from transmission itself, the connection may have broken
+            report_client_error(self.pool_key)
+        log.debug('Failed options dict: %s', options)
+        msg = 'TransmissionError: %s' % error.message or 'N/A'
+        log.error(msg)
+        entry.fail(msg)
+
+    def _fetch_torrent_files(self, cli, torrents):
+        """Fills in size and file lists of the torrents which need them using one request"""
+        for torrent in torrents:
+            post = torrent.options['post']
+            # We need to index the files if any of the following are defined
+            torrent.find_main_file = bool(post.get('main_file_only') or 'content_filename' in post)
+            torrent.needs_files = torrent.find_main_file or 'skip_files' in post
+        ids = [t.id for t in torrents if t.needs_files]
+        if not ids:
+            return
+        info = dict((t.id, t) for t in cli.get_torrents(ids, FILE_FIELDS))
+        for torrent in torrents:
+            if torrent.id in info:
+                torrent.total_size = info[torrent.id].totalSize
+                torrent.files = info[torrent.id].files()
+
+    def _wait_for_files(self, cli, torrents):
+        """Waits until the magnets have fetched their metadata, polling all of them with one request at a time"""
+        if not torrents:
+            return
+        for torrent in torrents:
+            log.debug('Waiting %d seconds for "%s" to magnetize', torrent.options['post']['magnetization_timeout'],
+                      torrent.entry['title'])
+        started = time.time()
+        pending = torrents
+        while pending:
+            time.sleep(MAGNETIZATION_POLL_INTERVAL)
+            elapsed = time.time() - started
+            info = dict((t.id, t) for t in cli.get_torrents([t.id for t in pending], FILE_FIELDS))
+            still_pending = []
+            for torrent in pending:
+                if torrent.id in info and info[torrent.id].files():
+                    torrent.total_size = info[torrent.id].totalSize
+                    torrent.files = info[torrent.id].files()
+                elif elapsed >= torrent.options['post']['magnetization_timeout']:
+                    log.warning('"%s" did not magnetize before the timeout elapsed, '
+                                'file list unavailable for processing.', torrent.entry['title'])
+                else:
+                    still_pending.append(torrent)
+            pending = still_pending
+
+    def _select_files(self, cli, torrent, config, session):
+        """Picks the main file and the files to download, renaming them if configured"""
+        options = torrent.options
+        entry = torrent.entry
+        fl = torrent.files
+        total_size = torrent.total_size
+        find_main_file = torrent.find_main_file
+        skip_files = 'skip_files' in options['post']
+        main_id = None
+
+        # Find files based on config
+        dl_list = []
+        skip_list = []
+        main_list = []
+        full_list = []
+        ext_list = ['*.srt', '*.sub', '*.idx', '*.ssa', '*.ass']
+
+        main_ratio = config['main_file_ratio']
+        if 'main_file_ratio' in options['post']:
+            main_ratio = options['post']['main_file_ratio']
+
+        for f in fl:
+            full_list.append(f)
+            # No need to set main_id if we're not going to need it
+            if find_main_file and fl[f]['size'] > total_size * main_ratio:
+                main_id = f
+
+            if 'include_files' in options['post']:
+                if _find_matches(fl[f]['name'], options['post']['include_files']):
+                    dl_list.append(f)
+                elif options['post'].get('include_subs') and _find_matches(fl[f]['name'], ext_list):
+                    dl_list.append(f)
+
+            if skip_files:
+                if _find_matches(fl[f]['name'], options['post']['skip_files']):
+                    skip_list.append(f)
+
+        if main_id is not None:
+
+            # Look for files matching main ID title but with a different extension
+            if options['post'].get('rename_like_files'):
+                for f in fl:
+                    # if this filename matches main filename we want to rename it as well
+                    fs = os.path.splitext(fl[f]['name'])
+                    if fs[0] == os.path.splitext(fl[main_id]['name'])[0]:
+                        main_list.append(f)
+            else:
+                main_list = [main_id]
+
+            if main_id not in dl_list:
+                dl_list.append(main_id)
+        elif find_main_file:
+            log.warning('No files in "%s" are > %d%% of content size, no files renamed.',
+                        entry['title'], main_ratio * 100)
+
+        # If we have a main file and want to rename it and associated files
+        if 'content_filename' in options['post'] and main_id is not None:
+            if 'download_dir' not in options['add']:
+                download_dir = session.download_dir
+            else:
+                download_dir = options['add']['download_dir']
+
+            # Get new filename without ext
+            file_ext = os.path.splitext(fl[main_id]['name'])[1]
+            file_path = os.path.dirname(os.path.join(download_dir, fl[main_id]['name']))
+            filename = options['post']['content_filename']
+            if config['host'] == 'localhost' or config['host'] == '127.0.0.1':
+                counter = 1
+                while os.path.exists(os.path.join(file_path, filename + file_ext)):
+                    # Try appending a (#) suffix till a unique filename is found
+                    filename = '%s(%s)' % (options['post']['content_filename'], counter)
+                    counter += 1
+            else:
+                log.debug('Cannot ensure content_filename is unique '
+                          'when adding to a remote transmission daemon.')
+
+            for index in main_list:
+                file_ext = os.path.splitext(fl[index]['name'])[1]
+                log.debug('File %s renamed to %s' % (fl[index]['name'], filename + file_ext))
+                # change to below when set_files will allow setting name, more efficient to have one call
+                # fl[index]['name'] = os.path.basename(pathscrub(filename + file_ext).encode('utf-8'))
+                try:
+                    cli.rename_torrent_path(torrent.id, fl[index]['name'],
+                                            os.path.basename(str(pathscrub(filename + file_ext))))
+                except TransmissionError:
+                    log.error('content_filename only supported with transmission 2.8+')
+
+        if options['post'].get('main_file_only') and main_id is not None:
+            # Set Unwanted Files
+            options['change']['files_unwanted'] = [x for x in full_list if x not in dl_list]
+            options['change']['files_wanted'] = dl_list
+            log.debug('Downloading %s of %s files in torrent.',
+                      len(options['change']['files_wanted']), len(full_list))
+        elif (not options['post'].get('main_file_only') or main_id is None) and skip_files:
+            # If no main file and we want to skip files
+
+            if len(skip_list) >= len(full_list):
+                log.debug('skip_files filter would cause no files to be downloaded; '
+                          'including all files in torrent.')
+            else:
+                options['change']['files_unwanted'] = skip_list
+                options['change']['files_wanted'] = [x for x in full_list if x not in skip_list]
+                log.debug('Downloading %s of %s files in torrent.',
+                          len(options['change']['files_wanted']), len(full_list))
 
     def on_task_learn(self, task, config):
         """ Make sure all temp files are cleaned up when entries are learned """
@@ -660,7 +780,7 @@ class PluginTransmissionClean(TransmissionBase):
         session = self.client.get_session()
 
         remove_ids = []
-        for torrent in self.client.get_torrents():
+        for torrent in self.get_torrents(INFO_FIELDS):
             log.verbose('Torrent "%s": status: "%s" - ratio: %s -  date added: %s - date done: %s' %
                         (torrent.name, torrent.status, torrent.ratio, torrent.date_added, torrent.date_done))
             downloaded, dummy = self.torrent_info(torrent, config)
@@ -3,6 +3,7 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from past.builtins import basestring
 from future.moves.urllib.parse import quote
 
+import copy
 import os
 import re
 import threading
@@ -143,6 +144,71 @@ def strip_whitespace(value):
     return value
 
 
+def compile_task_re(task_re):
+    """
+    Compiles the `task_re` config option
+    :param task_re: List of task_re dicts from the config
+    :return: List of (task, [(compiled regexp, field), ...]) tuples
+    """
+    result = []
+    for task_config in task_re or []:
+        patterns = [(re.compile(pattern['regexp'], re.IGNORECASE), pattern['field'])
+                    for pattern in task_config['patterns']]
+        result.append((task_config['task'], patterns))
+    return result
+
+
+def route_entries(task_re, entries):
+    """
+    Distributes entries to the tasks whose patterns all match
+    :param task_re: Compiled task_re from :func:`compile_task_re`
+    :param entries: List of entries
+    :return: Dict mapping task names to lists of entries
+    """
+    tasks_entry_map = {}
+    for entry in entries:
+        matched = False
+        for task, patterns in task_re:
+            # the entry is added to the task map if all of the defined regex matched
+            if all(regexp.search(entry.get(field, '')) for regexp, field in patterns):
+                matched = True
+                tasks_entry_map.setdefault(task, []).append(entry)
+
+        if not matched:
+            log.debug('Entry "%s" did not match any task regexp.', entry['title'])
+    return tasks_entry_map
+
+
+class InjectBatch(list):
+    """
+    List of entries injected into a queued task execution. Entries can be added until the task starts executing and
+    copies the injected entries.
+    """
+
+    def __init__(self, entries):
+        super(InjectBatch, self).__init__(entries)
+        self.lock = threading.Lock()
+        self.started = False
+        self.finished_events = []
+
+    def extend_pending(self, entries):
+        """
+        Adds entries if the task has not started yet
+        :return: True if the entries were added
+        """
+        with self.lock:
+            # A task which finished without copying the entries (e.g. because it is disabled) never will
+            if self.started or any(finished.is_set() for _, _, finished in self.finished_events):
+                return False
+            self.extend(entries)
+            return True
+
+    def __deepcopy__(self, memo):
+        with self.lock:
+            self.started = True
+            return [copy.deepcopy(entry, memo) for entry in self]
+
+
 class TrackerFileParseError(Exception):
     """Exception thrown when parsing the tracker file fails"""
 
@@ -250,6 +316,8 @@ class IRCConnection(SimpleIRCBot):
 
         self.inject_before_shutdown = False
         self.entry_queue = []
+        self.task_re = compile_task_re(config.get('task_re'))
+        self.pending_batches = {}
         self.line_cache = {}
         self.processing_message = False  # if set to True, it means there's a message processing queued
         self.thread = create_thread(self.connection_name, self)
@@ -377,41 +445,40 @@ class IRCConnection(SimpleIRCBot):
         :return:
         """
         tasks = self.config.get('task')
-        tasks_re = self.config.get('task_re')
         if tasks:
             if isinstance(tasks, basestring):
                 tasks = [tasks]
-            log.debug('Injecting %d entries into tasks %s', len(self.entry_queue), ', '.join(tasks))
-            options = {'tasks': tasks, 'cron': True, 'inject': self.entry_queue, 'allow_manual': True}
-            manager.execute(options=options, priority=5, suppress_warnings=['input'])
-
-        if tasks_re:
-            tasks_entry_map = {}
-            for entry in self.entry_queue:
-                matched = False
-                for task_config in tasks_re:
-                    pattern_match = 0
-                    for pattern in task_config.get('patterns'):
-                        if re.search(pattern['regexp'], entry.get(pattern['field'], ''), re.IGNORECASE):
-                            pattern_match += 1
-
-                    # the entry is added to the task map if all of the defined regex matched
-                    if len(task_config.get('patterns')) == pattern_match:
-                        matched = True
-                        if not tasks_entry_map.get(task_config.get('task')):
-                            tasks_entry_map[task_config.get('task')] = []
-                        tasks_entry_map[task_config.get('task')].append(entry)
-
-                if not matched:
-                    log.debug('Entry "%s" did not match any task regexp.', entry['title'])
-
-            for task, entries in tasks_entry_map.items():
-                log.debug('Injecting %d entries into task "%s"', len(entries), task)
-                options = {'tasks': [task], 'cron': True, 'inject': entries, 'allow_manual': True}
-                manager.execute(options=options, priority=5, suppress_warnings=['input'])
+            for task in tasks:
+                self.inject(task, self.entry_queue)
+
+        if self.task_re:
+            for task, entries in route_entries(self.task_re, self.entry_queue).items():
+                self.inject(task, entries)
 
         self.entry_queue = []
 
+    def inject(self, task, entries):
+        """
+        Injects entries into task. If an earlier execution of the task is still waiting in the task queue the entries
+        join that execution, so busy channels don't end up queueing a task run for every announcement.
+        :param task: Name of the task
+        :param entries: List of entries
+        """
+        batch = self.pending_batches.get(task)
+        if batch is not None and batch.extend_pending(entries):
+            log.debug('Added %d entries to the queued execution of task "%s"', len(entries), task)
+            return
+        log.debug('Injecting %d entries into task "%s"', len(entries), task)
+        batch = InjectBatch(entries)
+        options = {'tasks': [task], 'cron': True, 'inject': batch, 'allow_manual': True}
+        batch.finished_events = manager.execute(options=options, priority=5, suppress_warnings=['input'])
+        if batch.finished_events:
+            self.pending_batches[task] = batch
+        else:
+            # No execution was queued, e.g. the task was removed by a config reload. Entries announced later must
+            # not be added to a batch which never runs.
+            self.pending_batches.pop(task, None)
+
     def queue_entry(self, entry):
         """
         Stores an entry in the connection entry queue, if the queue is over the size limit then submit them
@@ -0,0 +1,128 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import logging
+import threading
+
+from future.moves.http.server import BaseHTTPRequestHandler, HTTPServer
+from future.moves.socketserver import ThreadingMixIn
+
+from flexget.config_schema import register_config_key
+from flexget.event import event
+from flexget.utils import metrics
+from flexget.utils.tools import get_config_hash
+
+log = logging.getLogger('metrics_daemon')
+config_hash = ''
+metrics_server = None
+
+metrics_config_schema = {
+    'oneOf': [
+        {'type': 'boolean'},
+        {'type': 'integer',
+         'minimum': 0,
+         'maximum': 65536},
+        {
+            'type': 'object',
+            'properties': {
+                'bind': {'type': 'string', 'format': 'ipv4'},
+                'port': {'type': 'integer',
+                         'minimum': 0,
+                         'maximum': 65536}
+            },
+            'additionalProperties': False
+        }
+    ]
+}
+
+
+def prepare_config(config):
+    if not config:
+        return
+    if isinstance(config, bool):
+        config = {}
+    if isinstance(config, int):
+        config = {'port': config}
+    config.setdefault('bind', '0.0.0.0')
+    config.setdefault('port', 5051)
+    return config
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0].rstrip('/') != '/metrics':
+            self.send_error(404)
+            return
+        body = metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', metrics.CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.trace(format, *args)
+
+
+class MetricsServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, name='metrics_server')
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+@event('config.register')
+def register_config():
+    register_config_key('metrics', metrics_config_schema)
+
+
+@event('manager.config_updated')
+@event('manager.daemon.started')
+def register_metrics_server(manager):
+    """Starts the metrics exporter, or restarts it when its config changed"""
+    global metrics_server, config_hash
+
+    if not manager.is_daemon:
+        return
+
+    config = manager.config.get('metrics')
+    if get_config_hash(config) == config_hash:
+        log.debug('metrics config hasn\'t changed')
+        return
+
+    config_hash = get_config_hash(config)
+    metrics_config = prepare_config(config)
+
+    stop_server(manager)
+
+    if not metrics_config:
+        return
+
+    metrics.task_queue_length.set_function(lambda: len(manager.task_queue))
+    metrics.enable()
+    try:
+        metrics_server = MetricsServer((metrics_config['bind'], metrics_config['port']), MetricsHandler)
+    except (IOError, OSError) as e:
+        log.error('Unable to start metrics exporter at %s:%s: %s', metrics_config['bind'], metrics_config['port'],
+                  e)
+        metrics.disable()
+        return
+    log.info('Serving metrics at http://%s:%s/metrics', metrics_config['bind'], metrics_config['port'])
+    metrics_server.start()
+
+
+@event('manager.shutdown')
+def stop_server(manager):
+    """Stops the metrics exporter and metrics collection"""
+    global metrics_server
+    if metrics_server:
+        log.debug('Shutting down metrics exporter')
+        metrics_server.stop()
+        metrics_server = None
+    metrics.disable()
@@ -1,7 +1,9 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import heapq
 import logging
+from collections import defaultdict
 
 from flexget import plugin
 from flexget.event import event
@@ -9,6 +11,108 @@ from flexget.utils.tools import aggregate_inputs
 
 log = logging.getLogger('crossmatch')
 
+# Values of these types are matched through hash lookups, anything else is compared pairwise
+HASHABLE_TYPES = (str, int, float, bool, type(None))
+
+NGRAM = 3
+
+
+def ngrams(text):
+    return set(text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1))
+
+
+class FieldIndex(object):
+    """
+    Indexes the values of one field of the generated entries, so that the generated entries matching a value can be
+    found without comparing against every one of them.
+
+    Matching works like :meth:`CrossMatch.entry_intersects`: with `exact` values must be equal, otherwise they also
+    match when either one contains the other.
+    """
+
+    def __init__(self, entries, field, exact=True):
+        self.exact = exact
+        # Exact value -> indexes of generated entries
+        self.values = defaultdict(list)
+        # Indexes and values which can only be compared pairwise
+        self.other = []
+        # First n-gram of a string value -> indexes, used to find values contained in a string
+        self.prefixes = defaultdict(list)
+        # Every n-gram of a string value -> indexes, used to find values containing a string
+        self.postings = defaultdict(set)
+        self.short_lengths = set()
+        self.strings = {}
+
+        for index, entry in enumerate(entries):
+            if field not in entry:
+                continue
+            value = entry[field]
+            if not isinstance(value, HASHABLE_TYPES):
+                self.other.append((index, value))
+                continue
+            self.values[value].append(index)
+            if exact or not isinstance(value, str):
+                continue
+            self.strings[index] = value
+            if len(value) < NGRAM:
+                self.short_lengths.add(len(value))
+            else:
+                self.prefixes[value[:NGRAM]].append(index)
+                for gram in ngrams(value):
+                    self.postings[gram].add(index)
+
+    @staticmethod
+    def _compare(v1, v2, exact):
+        try:
+            return v1 == v2 or not exact and (v2 in v1 or v1 in v2)
+        except TypeError as e:
+            # argument of type <type> is not iterable
+            log.trace('error matching fields: %s', str(e))
+            return False
+
+    def find(self, value):
+        """Returns the set of indexes of generated entries whose field value matches `value`."""
+        found = set()
+        for index, other in self.other:
+            if self._compare(value, other, self.exact):
+                found.add(index)
+
+        if not isinstance(value, HASHABLE_TYPES):
+            # Cannot be looked up, compare against all the indexed values instead
+            for other, indexes in self.values.items():
+                if self._compare(value, other, self.exact):
+                    found.update(indexes)
+            return found
+
+        found.update(self.values.get(value, ()))
+        if self.exact:
+            return found
+        if not isinstance(value, str):
+            for other, indexes in self.values.items():
+                if isinstance(other, str) and self._compare(value, other, False):
+                    found.update(indexes)
+            return found
+
+        # Indexed values contained in `value`
+        for length in self.short_lengths:
+            for start in range(len(value) - length + 1):
+                found.update(self.values.get(value[start:start + length], ()))
+        for gram in ngrams(value):
+            for index in self.prefixes.get(gram, ()):
+                if self.strings[index] in value:
+                    found.add(index)
+
+        # Indexed values containing `value`
+        if len(value) < NGRAM:
+            candidates = self.strings
+        else:
+            postings = sorted((self.postings.get(gram, set()) for gram in ngrams(value)), key=len)
+            candidates = set.intersection(*postings) if postings else set()
+        for index in candidates:
+            if index not in found and value in self.strings[index]:
+                found.add(index)
+        return found
+
 
 class CrossMatch(object):
     """
@@ -46,17 +150,38 @@ class CrossMatch(object):
         all_fields = config['all_fields']
 
         match_entries = aggregate_inputs(task, config['from'])
+        indexes = dict((field, FieldIndex(match_entries, field, config.get('exact'))) for field in set(fields))
 
         # perform action on intersecting entries
         for entry in task.entries:
-            for generated_entry in match_entries:
-                log.trace('checking if %s matches %s', entry['title'], generated_entry['title'])
-                common = self.entry_intersects(entry, generated_entry, fields, config.get('exact'))
-                if common and (not all_fields or len(common) == len(fields)):
+            matches = defaultdict(set)
+            for field in fields:
+                # Doesn't really make sense to match if field is not in both entries
+                if field not in entry:
+                    log.trace('field %s is not in %s', field, entry['title'])
+                    continue
+                for index in indexes[field].find(entry[field]):
+                    matches[index].add(field)
+
+            # Generated entries are handled in order, fields copied from one may make a later one match
+            pending = list(matches)
+            heapq.heapify(pending)
+            while pending:
+                index = heapq.heappop(pending)
+                generated_entry = match_entries[index]
+                common = [field for field in fields if field in matches[index]]
+                if not all_fields or len(common) == len(fields):
                     msg = 'intersects with %s on field(s) %s' % (generated_entry['title'], ', '.join(common))
                     for key in generated_entry:
                         if key not in entry:
                             entry[key] = generated_entry[key]
+                            if key in indexes:
+                                for later in indexes[key].find(entry[key]):
+                                    if later <= index:
+                                        continue
+                                    if later not in matches:
+                                        heapq.heappush(pending, later)
+                                    matches[later].add(key)
                     if action == 'reject':
                         entry.reject(msg)
                     if action == 'accept':
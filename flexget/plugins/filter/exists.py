@@ -10,6 +10,7 @@ from path import Path
 from flexget import plugin
 from flexget.event import event
 from flexget.config_schema import one_or_more
+from flexget.utils.directory_index import get_directory_index
 
 log = logging.getLogger('exists')
 
@@ -43,7 +44,7 @@ class FilterExists(object):
             folder = Path(folder).expanduser()
             if not folder.exists():
                 raise plugin.PluginWarning('Path %s does not exist' % folder, log)
-            for p in folder.walk(errors='ignore'):
+            for p in get_directory_index(folder).walk():
                 key = p.name
                 # windows file system is not case sensitive
                 if platform.system() == 'Windows':
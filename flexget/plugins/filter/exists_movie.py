@@ -11,6 +11,7 @@ from flexget import plugin
 from flexget.config_schema import one_or_more
 from flexget.event import event
 from flexget.plugin import get_plugin_by_name
+from flexget.utils.directory_index import get_directory_index
 from flexget.utils.tools import TimedDict
 
 log = logging.getLogger('exists_movie')
@@ -84,19 +85,21 @@ class FilterExistsMovie(object):
 
         for folder in config['path']:
             folder = Path(folder).expanduser()
-            # see if this path has already been scanned
-            cached_qualities = self.cache.get(folder, None)
-            if cached_qualities:
-                log.verbose('Using cached scan for %s ...' % folder)
-                qualities.update(cached_qualities)
-                continue
-
             path_ids = {}
 
             if not folder.isdir():
                 log.critical('Path %s does not exist' % folder)
                 continue
 
+            index = get_directory_index(folder)
+            # see if this path has already been scanned, and nothing has changed in it since
+            cache_key = (folder, index.generation, config.get('type'), config.get('lookup'))
+            cached_qualities = self.cache.get(cache_key, None)
+            if cached_qualities:
+                log.verbose('Using cached scan for %s ...' % folder)
+                qualities.update(cached_qualities)
+                continue
+
             log.verbose('Scanning path %s ...' % folder)
 
             # Help debugging by removing a lot of noise
@@ -106,13 +109,13 @@ class FilterExistsMovie(object):
             # scan through
             items = []
             if config.get('type') == 'dirs':
-                for d in folder.walkdirs(errors='ignore'):
+                for d in index.walkdirs():
                     if self.dir_pattern.search(d.name):
                         continue
                     log.debug('detected dir with name %s, adding to check list' % d.name)
                     items.append(d.name)
             elif config.get('type') == 'files':
-                for f in folder.walkfiles(errors='ignore'):
+                for f in index.walkfiles():
                     if not self.file_pattern.search(f.name):
                         continue
                     log.debug('detected file with name %s, adding to check list' % f.name)
@@ -147,7 +150,7 @@ class FilterExistsMovie(object):
                     log.trace('adding: %s' % movie.name)
 
             # store to cache and extend to found list
-            self.cache[folder] = path_ids
+            self.cache[cache_key] = path_ids
             qualities.update(path_ids)
 
         log.debug('-- Start filtering entries ----------------------------------')
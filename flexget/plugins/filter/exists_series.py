@@ -9,8 +9,10 @@ from path import Path
 from flexget import plugin
 from flexget.event import event
 from flexget.config_schema import one_or_more
+from flexget.utils.directory_index import get_directory_index
 from flexget.utils.log import log_once
 from flexget.utils.template import RenderError
+from flexget.utils.tools import TimedDict
 from flexget.plugins.parsers import ParseWarning
 from flexget.plugin import get_plugin_by_name
 
@@ -41,6 +43,12 @@ class FilterExistsSeries(object):
         ]
     }
 
+    def __init__(self):
+        # (parser, series name, filename) -> parse result
+        self.parse_cache = TimedDict(cache_time='1 day', max_size=500000, sizeof=lambda value: 1)
+        # (parser, series name, scanned folders) -> identifier -> parse results of existing files
+        self.existing_cache = TimedDict(cache_time='1 day', max_size=1000, sizeof=lambda value: 1)
+
     def prepare_config(self, config):
         # if config is not a dict, assign value to 'path' key
         if not isinstance(config, dict):
@@ -74,51 +82,74 @@ class FilterExistsSeries(object):
             return
 
         # scan through
+        indexes = []
+        for folder in sorted(paths):
+            folder = Path(folder).expanduser()
+            if not folder.isdir():
+                log.warning('Directory %s does not exist', folder)
+                continue
+            indexes.append(get_directory_index(folder))
+
         # For speed, only test accepted entries since our priority should be after everything is accepted.
         for series in accepted_series:
             # make new parser from parser in entry
             series_parser = accepted_series[series][0]['series_parser']
-            for folder in paths:
-                folder = Path(folder).expanduser()
-                if not folder.isdir():
-                    log.warning('Directory %s does not exist', folder)
-                    continue
-
-                for filename in folder.walk(errors='ignore'):
-                    # run parser on filename data
+            existing = self.existing_episodes(series_parser.name, indexes)
+            for entry in accepted_series[series]:
+                log.debug('series_parser.identifier = %s', entry['series_parser'].identifier)
+                for disk_parser in existing.get(entry['series_parser'].identifier, []):
+                    log.debug('series_parser.quality = %s', entry['series_parser'].quality)
+                    if config.get('allow_different_qualities') == 'better':
+                        if entry['series_parser'].quality > disk_parser.quality:
+                            log.trace('better quality')
+                            continue
+                    elif config.get('allow_different_qualities'):
+                        if disk_parser.quality != entry['series_parser'].quality:
+                            log.trace('wrong quality')
+                            continue
+                    log.debug('entry parser.proper_count = %s', entry['series_parser'].proper_count)
+                    if disk_parser.proper_count >= entry['series_parser'].proper_count:
+                        entry.reject('episode already exists')
+                        continue
+                    else:
+                        log.trace('new one is better proper, allowing')
+                        continue
+
+    def existing_episodes(self, name, indexes):
+        """
+        Finds the episodes of series `name` present in the indexed folders.
+
+        :return: Dict mapping episode identifiers to the parse results of the matching files
+        """
+        parsing = get_plugin_by_name('parsing').instance
+        parser_name = parsing.selected_parser('series')
+        key = (parser_name, name, tuple((index.root, index.generation) for index in indexes))
+        existing = self.existing_cache.get(key)
+        if existing is not None:
+            log.debug('Folders have not changed, using previous scan results for %s', name)
+            return existing
+
+        existing = {}
+        for index in indexes:
+            for filename in index.walk():
+                # run parser on filename data
+                parse_key = (parser_name, name, filename.name)
+                disk_parser = self.parse_cache.get(parse_key)
+                if disk_parser is None:
                     try:
-                        disk_parser = get_plugin_by_name('parsing').instance.parse_series(data=filename.name,
-                                                                                          name=series_parser.name)
+                        disk_parser = parsing.parse_series(data=filename.name, name=name)
                     except ParseWarning as pw:
                         disk_parser = pw.parsed
                         log_once(pw.value, logger=log)
-                    if disk_parser.valid:
-                        log.debug('name %s is same series as %s', filename.name, series)
-                        log.debug('disk_parser.identifier = %s', disk_parser.identifier)
-                        log.debug('disk_parser.quality = %s', disk_parser.quality)
-                        log.debug('disk_parser.proper_count = %s', disk_parser.proper_count)
-
-                        for entry in accepted_series[series]:
-                            log.debug('series_parser.identifier = %s', entry['series_parser'].identifier)
-                            if disk_parser.identifier != entry['series_parser'].identifier:
-                                log.trace('wrong identifier')
-                                continue
-                            log.debug('series_parser.quality = %s', entry['series_parser'].quality)
-                            if config.get('allow_different_qualities') == 'better':
-                                if entry['series_parser'].quality > disk_parser.quality:
-                                    log.trace('better quality')
-                                    continue
-                            elif config.get('allow_different_qualities'):
-                                if disk_parser.quality != entry['series_parser'].quality:
-                                    log.trace('wrong quality')
-                                    continue
-                            log.debug('entry parser.proper_count = %s', entry['series_parser'].proper_count)
-                            if disk_parser.proper_count >= entry['series_parser'].proper_count:
-                                entry.reject('episode already exists')
-                                continue
-                            else:
-                                log.trace('new one is better proper, allowing')
-                                continue
+                    self.parse_cache[parse_key] = disk_parser
+                if disk_parser.valid:
+                    log.debug('name %s is same series as %s', filename.name, name)
+                    log.debug('disk_parser.identifier = %s', disk_parser.identifier)
+                    log.debug('disk_parser.quality = %s', disk_parser.quality)
+                    log.debug('disk_parser.proper_count = %s', disk_parser.proper_count)
+                    existing.setdefault(disk_parser.identifier, []).append(disk_parser)
+        self.existing_cache[key] = existing
+        return existing
 
 
 @event('plugin.register')
@@ -4,19 +4,46 @@ from future.moves import builtins
 
 import logging
 import datetime
-from copy import copy
 
 from jinja2 import UndefinedError
 
 from flexget import plugin
 from flexget.event import event
-from flexget.task import Task
+from flexget.task import Task, EntryContainer
 from flexget.entry import Entry
+from flexget.utils.simple_persistence import SimpleTaskPersistence
 from flexget.utils.template import evaluate_expression
 
 log = logging.getLogger('if')
 
 
+class EntrySubsetTask(object):
+    """
+    Stands in for `task` when running plugins on the entries which passed a condition.
+
+    Only the entries and config differ from the real task, everything else is read from it.
+    """
+
+    def __init__(self, task, config, entries):
+        self._task = task
+        self.config = config
+        self._all_entries = EntryContainer(entries)
+        self.current_plugin = None
+        self.simple_persistence = SimpleTaskPersistence(self)
+
+    def __getattr__(self, item):
+        return getattr(self._task, item)
+
+    all_entries = property(lambda self: self._all_entries)
+    entries = property(lambda self: self._all_entries.entries)
+    accepted = property(lambda self: self._all_entries.accepted)
+    rejected = property(lambda self: self._all_entries.rejected)
+    failed = property(lambda self: self._all_entries.failed)
+    undecided = property(lambda self: self._all_entries.undecided)
+
+    find_entry = Task.__dict__['find_entry']
+
+
 class FilterIf(object):
     """Can run actions on entries that satisfy a given condition.
 
@@ -35,15 +62,13 @@ class FilterIf(object):
         }
     }
 
-    def check_condition(self, condition, entry):
+    def check_condition(self, condition, entry, namespace=None):
         """Checks if a given `entry` passes `condition`"""
         # Make entry fields and other utilities available in the eval namespace
-        # We need our namespace to be an Entry instance for lazy loading to work
-        eval_locals = copy(entry)
-        eval_locals.update({'has_field': lambda f: f in entry,
-                            'timedelta': datetime.timedelta,
-                            'utcnow': datetime.datetime.utcnow(),
-                            'now': datetime.datetime.now()})
+        # The entry store is used directly so that lazy fields are still looked up on the entry itself
+        eval_locals = dict(entry.store)
+        eval_locals.update(namespace or self.namespace())
+        eval_locals['has_field'] = lambda f: f in entry
         try:
             # Restrict eval namespace to have no globals and locals only from eval_locals
             passed = evaluate_expression(condition, eval_locals)
@@ -57,6 +82,12 @@ class FilterIf(object):
         except Exception as e:
             log.error('Error occurred while evaluating statement `%s`. (%s)' % (condition, e))
 
+    @staticmethod
+    def namespace():
+        return {'timedelta': datetime.timedelta,
+                'utcnow': datetime.datetime.utcnow(),
+                'now': datetime.datetime.now()}
+
     def __getattr__(self, item):
         """Provides handlers for all phases."""
         for phase, method in plugin.phase_methods.items():
@@ -70,9 +101,10 @@ class FilterIf(object):
                 'accept': Entry.accept,
                 'reject': Entry.reject,
                 'fail': Entry.fail}
+            namespace = self.namespace()
             for item in config:
                 requirement, action = list(item.items())[0]
-                passed_entries = (e for e in task.entries if self.check_condition(requirement, e))
+                passed_entries = (e for e in task.entries if self.check_condition(requirement, e, namespace))
                 if isinstance(action, str):
                     if not phase == 'filter':
                         continue
@@ -81,20 +113,21 @@ class FilterIf(object):
                         entry_actions[action](entry, 'Matched requirement: %s' % requirement)
                 else:
                     # Other plugins were specified to run on this entry
-                    fake_task = Task(task.manager, task.name, config=action, options=task.options)
-                    fake_task.session = task.session
-                    # This entry still belongs to our feed, accept/reject etc. will carry through.
-                    fake_task.all_entries[:] = passed_entries
-
                     methods = {}
                     for plugin_name, plugin_config in action.items():
                         p = plugin.get_plugin_by_name(plugin_name)
                         method = p.phase_handlers.get(phase)
                         if method:
-                            methods[method] = (fake_task, plugin_config)
+                            methods[method] = (plugin_name, plugin_config)
+                    if not methods:
+                        continue
+                    # These entries still belong to our task, accept/reject etc. will carry through.
+                    subset_task = EntrySubsetTask(task, action, passed_entries)
                     # Run the methods in priority order
                     for method in sorted(methods, reverse=True):
-                        method(*methods[method])
+                        plugin_name, plugin_config = methods[method]
+                        subset_task.current_plugin = plugin_name
+                        method(subset_task, plugin_config)
 
         handle_phase.priority = 80
         return handle_phase
@@ -37,8 +37,13 @@ class ListMatch(object):
                 except AttributeError:
                     raise PluginError('Plugin %s does not support list interface' % plugin_name)
                 already_accepted = []
-                for entry in task.entries:
-                    result = thelist.get(entry)
+                entries = list(task.entries)
+                # Lists which can look up many entries at once do it in bulk, fall back to one lookup per entry
+                if hasattr(thelist, 'get_many'):
+                    results = thelist.get_many(entries)
+                else:
+                    results = [thelist.get(entry) for entry in entries]
+                for entry, result in zip(entries, results):
                     if not result:
                         continue
                     if config['action'] == 'accept':
@@ -14,6 +14,14 @@ from future.moves.urllib.parse import unquote
 
 log = logging.getLogger('regexp')
 
+DEFAULT_FIELDS = ['title', 'description']
+UNQUOTE_FIELDS = ['url']
+# Maximum number of patterns merged into one combined regexp, keeps the individual checks after a hit cheap
+GROUP_SIZE = 50
+
+BACKREFERENCE = re.compile(r'\\\d|\(\?P=')
+INLINE_FLAGS = re.compile(r'\(\?[aiLmsux]+\)')
+
 
 class FilterRegexp(object):
     """
@@ -162,6 +170,30 @@ class FilterRegexp(object):
                 log.debug('Rest method %s for %s' % (config['rest'], entry['title']))
                 rest_method(entry, 'regexp `rest`')
 
+    def field_values(self, entry, field, eval_lazy):
+        """
+        Returns the values of :field: from :entry: as a list of strings ready to be searched.
+
+        :param entry: Entry instance
+        :param field: Name of the field
+        :param eval_lazy: Whether lazy fields should be evaluated
+        :return: List of strings, empty if the field is not set
+        """
+        if not entry.get(field, eval_lazy=eval_lazy):
+            return []
+        # Make all fields into lists for search purposes
+        values = entry[field]
+        if not isinstance(values, list):
+            values = [values]
+        result = []
+        for value in values:
+            if not isinstance(value, basestring):
+                value = str(value)
+            if field in UNQUOTE_FIELDS:
+                value = unquote(value)
+            result.append(value)
+        return result
+
     def matches(self, entry, regexp, find_from=None, not_regexps=None):
         """
         Check if :entry: has any string fields or strings in a list field that match :regexp:
@@ -172,21 +204,9 @@ class FilterRegexp(object):
         :param not_regexps: None or list of regexps that can NOT match
         :return: Field matching
         """
-        unquote_fields = ['url']
-        for field in find_from or ['title', 'description']:
+        for field in find_from or DEFAULT_FIELDS:
             # Only evaluate lazy fields if find_from has been explicitly specified
-            if not entry.get(field, eval_lazy=find_from):
-                continue
-            # Make all fields into lists for search purposes
-            values = entry[field]
-            if not isinstance(values, list):
-                values = [values]
-            for value in values:
-                if not isinstance(value, basestring):
-                    value = str(value)
-                if field in unquote_fields:
-                    value = unquote(value)
-                    # If none of the not_regexps match
+            for value in self.field_values(entry, field, find_from):
                 if regexp.search(value):
                     # Make sure the not_regexps do not match for this field
                     for not_regexp in not_regexps or []:
@@ -196,6 +216,37 @@ class FilterRegexp(object):
                     else:  # None of the not_regexps matched
                         return field
 
+    def group_regexps(self, regexps):
+        """
+        Splits the configured regexps into groups of neighbouring regexps searching the same fields, each with a
+        combined alternation of all its patterns. A single scan with the combined regexp tells whether any regexp of
+        the group can match, so the individual regexps only need to be tried for groups which had a hit.
+
+        :param regexps: list of {compiled_regexp: options} dictionaries
+        :return: list of (combined regexp or None, find_from, [(regexp, options), ...]) tuples
+        """
+        groups = []
+        for regexp_opts in regexps:
+            regexp, opts = list(regexp_opts.items())[0]
+            find_from = opts.get('from')
+            combinable = _combinable(regexp)
+            if (combinable and groups and groups[-1][0] and groups[-1][1] == find_from and
+                    len(groups[-1][2]) < GROUP_SIZE):
+                groups[-1][2].append((regexp, opts))
+            else:
+                groups.append([combinable, find_from, [(regexp, opts)]])
+        result = []
+        for combinable, find_from, members in groups:
+            combined = None
+            if combinable and len(members) > 1:
+                try:
+                    combined = re.compile('|'.join('(?:%s)' % regexp.pattern for regexp, _ in members),
+                                          members[0][0].flags)
+                except re.error as e:
+                    log.debug('Unable to combine regexps, trying them one by one: %s', e)
+            result.append((combined, find_from, members))
+        return result
+
     def filter(self, task, operation, regexps):
         """
         :param task: Task instance
@@ -208,14 +259,11 @@ class FilterRegexp(object):
         rest = []
         method = Entry.accept if 'accept' in operation else Entry.reject
         match_mode = 'excluding' not in operation
+        groups = self.group_regexps(regexps)
         for entry in task.entries:
             log.trace('testing %i regexps to %s' % (len(regexps), entry['title']))
-            for regexp_opts in regexps:
-                regexp, opts = list(regexp_opts.items())[0]
-
-                # check if entry matches given regexp configuration
-                field = self.matches(entry, regexp, opts.get('from'), opts.get('not'))
-
+            values = {}
+            for regexp, opts, field in self._candidates(entry, groups, match_mode, values):
                 # Run if we are in match mode and have a hit, or are in non-match mode and don't have a hit
                 if match_mode == bool(field):
                     # Creates the string with the reason for the hit
@@ -239,6 +287,34 @@ class FilterRegexp(object):
                 rest.append(entry)
         return rest
 
+    def _candidates(self, entry, groups, match_mode, values):
+        """
+        Yields (regexp, options, matching field) for the regexps in configured order, skipping over groups whose
+        combined regexp cannot match the entry.
+        """
+        for combined, find_from, members in groups:
+            if combined is not None:
+                key = tuple(find_from) if find_from else None
+                if key not in values:
+                    values[key] = [value for field in find_from or DEFAULT_FIELDS
+                                   for value in self.field_values(entry, field, find_from)]
+                if not any(combined.search(value) for value in values[key]):
+                    # None of the regexps in this group match
+                    if match_mode:
+                        continue
+                    regexp, opts = members[0]
+                    yield regexp, opts, None
+                    return
+            for regexp, opts in members:
+                yield regexp, opts, self.matches(entry, regexp, find_from, opts.get('not'))
+
+
+def _combinable(regexp):
+    """Whether the pattern keeps its meaning when embedded into an alternation with other patterns."""
+    if regexp.groupindex or regexp.groups and BACKREFERENCE.search(regexp.pattern):
+        return False
+    return not INLINE_FLAGS.search(regexp.pattern)
+
 
 @event('plugin.register')
 def register_plugin():
@@ -6,14 +6,14 @@ from past.builtins import basestring
 import logging
 from datetime import datetime, timedelta
 
-from sqlalchemy import Column, Integer, String, Unicode, DateTime, ForeignKey, and_, Index
+from sqlalchemy import Column, Integer, String, Unicode, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relation
 
 from flexget import db_schema, plugin
 from flexget.event import event
 from flexget.manager import Session
 from flexget.utils.sqlalchemy_utils import table_columns, table_add_column
-from flexget.utils.tools import parse_timedelta
+from flexget.utils.tools import chunked, parse_timedelta
 
 log = logging.getLogger('remember_rej')
 Base = db_schema.versioned_base('remember_rejected', 3)
@@ -106,20 +106,20 @@ class FilterRememberRejected(object):
     @plugin.priority(255)
     def on_task_filter(self, task, config):
         """Reject any remembered entries from previous runs"""
+        # We don't record or reject any entries without url
+        entries = [entry for entry in task.entries if entry.get('url')]
+        if not entries:
+            return
         with Session() as session:
             (task_id,) = session.query(RememberTask.id).filter(RememberTask.name == task.name).first()
-            reject_entries = session.query(RememberEntry).filter(RememberEntry.task_id == task_id)
-            if reject_entries.count():
-                # Reject all the remembered entries
-                for entry in task.entries:
-                    if not entry.get('url'):
-                        # We don't record or reject any entries without url
-                        continue
-                    reject_entry = reject_entries.filter(and_(RememberEntry.title == entry['title'],
-                                                              RememberEntry.url == entry['original_url'])).first()
-                    if reject_entry:
-                        entry.reject('Rejected on behalf of %s plugin: %s' %
-                                     (reject_entry.rejected_by, reject_entry.reason))
+            remembered = get_remembered(session, task_id, set(entry['title'] for entry in entries))
+            if not remembered:
+                return
+            # Reject all the remembered entries
+            for entry in entries:
+                reject_entry = remembered.get((entry['title'], entry['original_url']))
+                if reject_entry:
+                    entry.reject('Rejected on behalf of %s plugin: %s' % reject_entry)
 
     def on_entry_reject(self, entry, remember=None, remember_time=None, **kwargs):
         # We only remember rejections that specify the remember keyword argument
@@ -139,18 +139,22 @@ class FilterRememberRejected(object):
 
     @plugin.priority(-255)
     def on_task_learn(self, task, config):
+        rows = []
+        for entry in task.all_entries:
+            if not entry.get('remember_rejected'):
+                continue
+            expires = None
+            if isinstance(entry['remember_rejected'], timedelta):
+                expires = datetime.now() + entry['remember_rejected']
+            rows.append({'title': entry['title'], 'url': entry['original_url'], 'rejected_by': entry.get('rejected_by'),
+                         'reason': entry.get('reason'), 'expires': expires, 'added': datetime.now()})
+        if not rows:
+            return
         with Session() as session:
-            for entry in task.all_entries:
-                if not entry.get('remember_rejected'):
-                    continue
-                expires = None
-                if isinstance(entry['remember_rejected'], timedelta):
-                    expires = datetime.now() + entry['remember_rejected']
-
-                (remember_task_id,) = session.query(RememberTask.id).filter(RememberTask.name == task.name).first()
-                session.add(RememberEntry(title=entry['title'], url=entry['original_url'], task_id=remember_task_id,
-                                          rejected_by=entry.get('rejected_by'), reason=entry.get('reason'),
-                                          expires=expires))
+            (remember_task_id,) = session.query(RememberTask.id).filter(RememberTask.name == task.name).first()
+            for row in rows:
+                row['task_id'] = remember_task_id
+            session.bulk_insert_mappings(RememberEntry, rows)
 
 
 @event('manager.db_cleanup')
@@ -166,6 +170,25 @@ def register_plugin():
     plugin.register(FilterRememberRejected, 'remember_rejected', builtin=True, api_ver=2)
 
 
+def get_remembered(session, task_id, titles):
+    """
+    Loads the remembered rejections of a task for the given titles.
+
+    :param session: Database session
+    :param task_id: Id of the :class:`RememberTask`
+    :param titles: Titles to look up, queried in chunks so any amount can be passed
+    :return: Dict mapping (title, url) to (rejected_by, reason) of the oldest remembered rejection
+    """
+    remembered = {}
+    for chunk in chunked(list(titles)):
+        rows = session.query(RememberEntry.title, RememberEntry.url, RememberEntry.rejected_by, RememberEntry.reason). \
+            filter(RememberEntry.task_id == task_id).filter(RememberEntry.title.in_(chunk)). \
+            order_by(RememberEntry.id.desc())
+        for title, url, rejected_by, reason in rows:
+            remembered[(title, url)] = (rejected_by, reason)
+    return remembered
+
+
 def get_rejected(session, count=None, start=None, stop=None, sort_by=None, descending=None):
     query = session.query(RememberEntry)
     if count:
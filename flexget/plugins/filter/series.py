@@ -921,81 +921,133 @@ def store_parser(session, parser, series=None, quality=None):
             session.add(series)
             log.debug('-> added `%s`', series)
 
-    releases = []
-    for ix, identifier in enumerate(parser.identifiers):
-        if parser.season_pack:
-            # Checks if season object exist
-            season = session.query(Season). \
-                filter(Season.season == parser.season). \
-                filter(Season.series_id == series.id). \
-                filter(Season.identifier == identifier) \
-                .first()
-            if not season:
-                log.debug('adding season `%s` into series `%s`', identifier, parser.name)
-                season = Season()
-                season.identifier = identifier
-                season.identified_by = parser.id_type
-                season.season = parser.season
-                series.seasons.append(season)
-                log.debug('-> added season `%s`', season)
-            session.flush()
-
-            # Sets the filter_by, and filter_id for later releases query
-            filter_id = season.id
-            table = SeasonRelease
-            filter_by = table.season_id
-            entity = season
+    return store_parsers(session, [(parser, quality)], series)[0]
 
-        else:
-            # if episode does not exist in series, add new
-            episode = session.query(Episode).filter(Episode.series_id == series.id). \
-                filter(Episode.identifier == identifier). \
-                filter(Episode.series_id != None).first()
-            if not episode:
-                log.debug('adding episode `%s` into series `%s`', identifier, parser.name)
-                episode = Episode()
-                episode.identifier = identifier
-                episode.identified_by = parser.id_type
-                # if episodic format
-                if parser.id_type == 'ep':
-                    episode.season = parser.season
-                    episode.number = parser.episode + ix
-                elif parser.id_type == 'sequence':
-                    episode.season = 0
-                    episode.number = parser.id + ix
-                series.episodes.append(episode)  # pylint:disable=E1103
-                log.debug('-> added `%s`', episode)
-            session.flush()
-
-            # Sets the filter_by, and filter_id for later releases query
-            table = EpisodeRelease
-            filter_by = table.episode_id
-            filter_id = episode.id
-            entity = episode
-
-        # if release does not exists in episode or season, add new
-        #
-        # NOTE:
-        #
-        # filter(Release.episode_id != None) fixes weird bug where release had/has been added
-        # to database but doesn't have episode_id, this causes all kinds of havoc with the plugin.
-        # perhaps a bug in sqlalchemy?
-        release = session.query(table).filter(filter_by == filter_id). \
-            filter(table.title == parser.data). \
-            filter(table.quality == quality). \
-            filter(table.proper_count == parser.proper_count). \
-            filter(filter_by != None).first()
-        if not release:
+
+def _quality_name(quality):
+    return quality if isinstance(quality, str) else quality.name
+
+
+def store_parsers(session, parsers, series):
+    """
+    Push information of many releases of a series into database at once. Existing episodes, seasons and releases are
+    looked up with a few queries for all of the parsers, and missing ones are added with a single flush.
+
+    :param session: Database session to use
+    :param parsers: List of (parser, quality) tuples, quality overrides the quality from the parser if not None
+    :param series: Series in database to add releases to
+    :return: List containing the list of Releases for each parser, in the same order as `parsers`
+    """
+    parsers = [(parser, parser.quality if quality is None else quality) for parser, quality in parsers]
+    episode_ids = set()
+    season_ids = set()
+    for parser, _ in parsers:
+        (season_ids if parser.season_pack else episode_ids).update(parser.identifiers)
+
+    # Load the existing episodes and seasons of all parsers
+    episodes = {}
+    seasons = {}
+    if series.id is not None:
+        for chunk in chunked(list(episode_ids)):
+            for episode in session.query(Episode).filter(Episode.series_id == series.id). \
+                    filter(Episode.identifier.in_(chunk)):
+                episodes.setdefault(episode.identifier, episode)
+        for chunk in chunked(list(season_ids)):
+            for season in session.query(Season).filter(Season.series_id == series.id). \
+                    filter(Season.identifier.in_(chunk)):
+                seasons.setdefault((season.season, season.identifier), season)
+
+    # Add the missing ones
+    entities = []
+    added = False
+    for parser, quality in parsers:
+        parser_entities = []
+        for ix, identifier in enumerate(parser.identifiers):
+            if parser.season_pack:
+                season = seasons.get((parser.season, identifier))
+                if not season:
+                    log.debug('adding season `%s` into series `%s`', identifier, parser.name)
+                    season = Season()
+                    season.identifier = identifier
+                    season.identified_by = parser.id_type
+                    season.season = parser.season
+                    season.series = series
+                    session.add(season)
+                    seasons[(parser.season, identifier)] = season
+                    added = True
+                    log.debug('-> added season `%s`', season)
+                parser_entities.append(season)
+            else:
+                episode = episodes.get(identifier)
+                if not episode:
+                    log.debug('adding episode `%s` into series `%s`', identifier, parser.name)
+                    episode = Episode()
+                    episode.identifier = identifier
+                    episode.identified_by = parser.id_type
+                    # if episodic format
+                    if parser.id_type == 'ep':
+                        episode.season = parser.season
+                        episode.number = parser.episode + ix
+                    elif parser.id_type == 'sequence':
+                        episode.season = 0
+                        episode.number = parser.id + ix
+                    episode.series = series
+                    session.add(episode)
+                    episodes[identifier] = episode
+                    added = True
+                    log.debug('-> added `%s`', episode)
+                parser_entities.append(episode)
+        entities.append(parser_entities)
+    if added:
+        session.flush()
+
+    # Load the existing releases of all the episodes and seasons
+    #
+    # NOTE:
+    #
+    # Releases without episode_id or season_id are left out, this fixes weird bug where release had/has been added
+    # to database but doesn't have episode_id, this causes all kinds of havoc with the plugin.
+    # perhaps a bug in sqlalchemy?
+    releases = {}
+    release_tables = ((EpisodeRelease, EpisodeRelease.episode_id, episodes),
+                      (SeasonRelease, SeasonRelease.season_id, seasons))
+
+    def load_releases(entity_ids):
+        for table, filter_by, entity_map in release_tables:
+            for chunk in chunked([entity.id for entity in entity_map.values() if entity.id in entity_ids]):
+                for release in session.query(table).filter(filter_by.in_(chunk)):
+                    key = (table, getattr(release, filter_by.key), release.title, release._quality,
+                           release.proper_count)
+                    releases.setdefault(key, release)
+
+    load_releases(set(entity.id for parser_entities in entities for entity in parser_entities))
+
+    # if release does not exists in episode or season, add new
+    missing = {}
+    for (parser, quality), parser_entities in zip(parsers, entities):
+        for entity in parser_entities:
+            table, filter_by = (SeasonRelease, 'season_id') if parser.season_pack else (EpisodeRelease, 'episode_id')
+            key = (table, entity.id, parser.data, _quality_name(quality), parser.proper_count)
+            if key in releases or key in missing:
+                continue
             log.debug('adding release `%s`', parser)
-            release = table()
-            release.quality = quality
-            release.proper_count = parser.proper_count
-            release.title = parser.data
-            entity.releases.append(release)  # pylint:disable=E1103
-            log.debug('-> added `%s`', release)
-        releases.append(release)
-    session.flush()  # Make sure autonumber ids are populated
-    return releases
+            missing[key] = {filter_by: entity.id, '_quality': _quality_name(quality), 'title': parser.data,
+                            'proper_count': parser.proper_count, 'downloaded': False, 'first_seen': datetime.now()}
+    if missing:
+        # Insert all new releases with one statement per table, and load them back to get their ids
+        for table, _, _ in release_tables:
+            mappings = [mapping for key, mapping in missing.items() if key[0] is table]
+            if mappings:
+                session.bulk_insert_mappings(table, mappings)
+        load_releases(set(key[1] for key in missing))
+        log.debug('-> added %s releases', len(missing))
+
+    result = []
+    for (parser, quality), parser_entities in zip(parsers, entities):
+        table = SeasonRelease if parser.season_pack else EpisodeRelease
+        result.append([releases[(table, entity.id, parser.data, _quality_name(quality), parser.proper_count)]
+                       for entity in parser_entities])
+    return result
 
 
 def set_series_begin(series, ep_id):
@@ -1708,10 +1760,10 @@ class FilterSeries(FilterSeriesBase):
                     continue
 
                 series_entries = {}
-                for entry in found_series[series_name]:
-                    # store found episodes into database and save reference for later use
-                    releases = store_parser(session, entry['series_parser'], series=db_series,
-                                            quality=entry.get('quality'))
+                # store found episodes into database and save reference for later use
+                all_releases = store_parsers(session, [(entry['series_parser'], entry.get('quality'))
+                                                       for entry in found_series[series_name]], db_series)
+                for entry, releases in zip(found_series[series_name], all_releases):
                     entry['series_releases'] = [r.id for r in releases]
                     if hasattr(releases[0], 'episode'):
                         entity = releases[0].episode
@@ -1,10 +1,10 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from future.moves.urllib.parse import urlparse, urlsplit, urlunsplit, quote
-from future.moves.urllib.error import URLError
 
 import itertools
 import logging
+import queue
 import threading
 import socket
 import struct
@@ -17,41 +17,38 @@ from flexget import plugin
 from flexget.event import event
 from flexget.utils import requests
 from flexget.utils.bittorrent import bdecode
+from flexget.utils.tools import TimedDict, chunked
 
 log = logging.getLogger('torrent_alive')
 
 
-class TorrentAliveThread(threading.Thread):
-    _counter = itertools.count()
+# Most trackers answer UDP scrapes for at most 74 info hashes at once, as that is what fits a single packet
+UDP_MAX_HASHES = 74
+# Keeps the multi-scrape urls of HTTP trackers at a sensible length
+HTTP_MAX_HASHES = 50
+# Number of trackers scraped at the same time
+MAX_SCRAPE_THREADS = 10
 
-    def __init__(self, tracker, info_hash):
-        threading.Thread.__init__(self, name='torrent_alive-%d' % next(self._counter))
-        self.tracker = tracker
-        self.info_hash = info_hash
-        self.tracker_seeds = 0
+# Seeds found per (tracker, info hash), so that reruns and other tasks accepting the same torrents do not scrape again
+scrape_cache = TimedDict(cache_time='5 minutes')
+# HTTP trackers which failed a multi-scrape, their torrents are scraped one by one
+single_scrape_trackers = TimedDict(cache_time='1 day')
 
-    def run(self):
-        self.tracker_seeds = get_tracker_seeds(self.tracker, self.info_hash)
-        log.debug('%s seeds found from %s', self.tracker_seeds, get_scrape_url(self.tracker, self.info_hash))
+_thread_counter = itertools.count()
 
 
-def max_seeds_from_threads(threads):
-    """
-    Joins the threads and returns the maximum seeds found from any of them.
-
-    :param threads: A list of started `TorrentAliveThread`
-    :return: Maximum seeds found from any of the threads
-    """
-    seeds = 0
-    for background in threads:
-        log.debug('Coming up next: %s', background.tracker)
-        background.join()
-        seeds = max(seeds, background.tracker_seeds)
-        log.debug('Current highest number of seeds found: %s', seeds)
-    return seeds
+def _hex_hash(info_hash):
+    """Converts an info hash key from a scrape response to the uppercase hex used by :class:`Torrent`."""
+    if not isinstance(info_hash, bytes):
+        info_hash = info_hash.encode('utf-8')
+    return binascii.hexlify(info_hash).decode('ascii').upper()
 
 
 def get_scrape_url(tracker_url, info_hash):
+    """
+    :param tracker_url: Announce url of the tracker
+    :param info_hash: Hex info hash, or a list of them to scrape several torrents with one request
+    """
     if 'announce' in tracker_url:
         v = urlsplit(tracker_url)
         result = urlunsplit([v.scheme, v.netloc, v.path.replace('announce', 'scrape'),
@@ -60,34 +57,43 @@ def get_scrape_url(tracker_url, info_hash):
         log.debug('`announce` not contained in tracker url, guessing scrape address.')
         result = tracker_url + '/scrape'
 
+    info_hashes = info_hash if isinstance(info_hash, (list, tuple)) else [info_hash]
     result += '&' if '?' in result else '?'
-    result += 'info_hash=%s' % quote(binascii.unhexlify(info_hash))
+    result += '&'.join('info_hash=%s' % quote(binascii.unhexlify(h)) for h in info_hashes)
     return result
 
 
-def get_udp_seeds(url, info_hash):
+def get_udp_seeds_many(url, info_hashes):
+    """
+    Scrapes seeds for several torrents from an UDP tracker, using one connection and one packet per
+    `UDP_MAX_HASHES` torrents.
+
+    :return: Dict mapping info hashes to seeds, torrents which could not be scraped are left out
+    """
     parsed_url = urlparse(url)
     try:
         port = parsed_url.port
     except ValueError:
         log.error('UDP Port Error, url was %s', url)
-        return 0
+        return {}
 
-    log.debug('Checking for seeds from %s', url)
+    log.debug('Checking for seeds of %s torrents from %s', len(info_hashes), url)
 
     connection_id = 0x41727101980  # connection id is always this
     transaction_id = randrange(1, 65535)  # Random Transaction ID creation
 
     if port is None:
         log.error('UDP Port Error, port was None')
-        return 0
+        return {}
 
     if port < 0 or port > 65535:
         log.error('UDP Port Error, port was %s', port)
-        return 0
+        return {}
 
-    # Create the socket
+    seeds = {}
+    clisocket = None
     try:
+        # Create the socket
         clisocket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         clisocket.settimeout(5.0)
         clisocket.connect((parsed_url.hostname, port))
@@ -101,68 +107,166 @@ def get_udp_seeds(url, info_hash):
         # check recieved packet for response
         action, transaction_id, connection_id = struct.unpack(b">LLQ", res)
 
-        # build packet hash out of decoded info_hash
-        packet_hash = binascii.unhexlify(info_hash)
-
-        # construct packet for scrape with decoded info_hash setting action byte to 2 for scape
-        packet = struct.pack(b">QLL", connection_id, 2, transaction_id) + packet_hash
-
-        clisocket.send(packet)
-        # set recieve size of 8 + 12 bytes
-        res = clisocket.recv(20)
-
+        for chunk in chunked(info_hashes, UDP_MAX_HASHES):
+            # construct packet for scrape with decoded info_hashes setting action byte to 2 for scape
+            packet = struct.pack(b">QLL", connection_id, 2, transaction_id)
+            packet += b''.join(binascii.unhexlify(info_hash) for info_hash in chunk)
+
+            clisocket.send(packet)
+            # 8 header bytes followed by 12 bytes per requested torrent
+            res = clisocket.recv(8 + 12 * len(chunk))
+
+            # Check for UDP error packet
+            (action,) = struct.unpack(b">L", res[:4])
+            if action == 3:
+                log.error('There was a UDP Packet Error 3')
+                break
+
+            # seeders, completed and leechers for each requested torrent, in the order they were requested
+            for index, info_hash in enumerate(chunk):
+                offset = 8 + 12 * index
+                if len(res) < offset + 12:
+                    break
+                seeds[info_hash], _, _ = struct.unpack(b">LLL", res[offset:offset + 12])
     except IOError as e:
         log.warning('Socket Error: %s', e)
-        return 0
-    # Check for UDP error packet
-    (action,) = struct.unpack(b">L", res[:4])
-    if action == 3:
-        log.error('There was a UDP Packet Error 3')
-        return 0
+    except (ValueError, struct.error) as e:
+        log.warning('Invalid UDP scrape: %s', e)
+    finally:
+        if clisocket is not None:
+            clisocket.close()
+    log.debug('get_udp_seeds_many is returning: %s', seeds)
+    return seeds
 
-    # first 8 bytes are followed by seeders, completed and leechers for requested torrent
-    seeders, _, _ = struct.unpack(b">LLL", res[8:20])
-    log.debug('get_udp_seeds is returning: %s', seeders)
-    clisocket.close()
-    return seeders
 
+def get_udp_seeds(url, info_hash):
+    return get_udp_seeds_many(url, [info_hash]).get(info_hash, 0)
 
-def get_http_seeds(url, info_hash):
-    url = get_scrape_url(url, info_hash)
-    if not url:
-        log.debug('if not url is true returning 0')
-        return 0
+
+def _http_scrape(url, info_hashes):
+    url = get_scrape_url(url, info_hashes)
     log.debug('Checking for seeds from %s', url)
 
     try:
         data = bdecode(requests.get(url).content).get('files')
     except RequestException as e:
         log.debug('Error scraping: %s', e)
-        return 0
+        return None
     except SyntaxError as e:
         log.warning('Error decoding tracker response: %s', e)
-        return 0
+        return None
     except BadStatusLine as e:
         log.warning('Error BadStatusLine: %s', e)
-        return 0
+        return None
     except IOError as e:
         log.warning('Server error: %s', e)
-        return 0
+        return None
     if not data:
         log.debug('No data received from tracker scrape.')
-        return 0
-    log.debug('get_http_seeds is returning: %s', list(data.values())[0]['complete'])
-    return list(data.values())[0]['complete']
+        return None
+    return data
 
 
-def get_tracker_seeds(url, info_hash):
+def get_http_seeds_many(url, info_hashes):
+    """
+    Scrapes seeds for several torrents from a HTTP tracker, asking for `HTTP_MAX_HASHES` torrents per request.
+    Not all trackers support multi-scrapes. If one fails, the tracker is remembered and its torrents are scraped on
+    their own. Torrents missing from a multi-scrape response are also scraped again on their own.
+
+    :return: Dict mapping info hashes to seeds, torrents which could not be scraped are left out
+    """
+    seeds = {}
+    chunks = list(chunked(list(info_hashes), 1 if url in single_scrape_trackers else HTTP_MAX_HASHES))
+    for position, chunk in enumerate(chunks):
+        data = _http_scrape(url, chunk)
+        if len(chunk) == 1:
+            if data:
+                seeds[chunk[0]] = list(data.values())[0]['complete']
+            continue
+        if data is None:
+            log.debug('Multi-scrape failed, scraping torrents from %s one by one', url)
+            single_scrape_trackers[url] = True
+            for info_hash in itertools.chain.from_iterable(chunks[position:]):
+                seeds.update(get_http_seeds_many(url, [info_hash]))
+            break
+        found = dict((_hex_hash(key), value['complete']) for key, value in data.items())
+        for info_hash in chunk:
+            if info_hash.upper() in found:
+                seeds[info_hash] = found[info_hash.upper()]
+            else:
+                seeds.update(get_http_seeds_many(url, [info_hash]))
+    log.debug('get_http_seeds_many is returning: %s', seeds)
+    return seeds
+
+
+def get_http_seeds(url, info_hash):
+    return get_http_seeds_many(url, [info_hash]).get(info_hash, 0)
+
+
+def get_tracker_seeds_many(url, info_hashes):
     if url.startswith('udp'):
-        return get_udp_seeds(url, info_hash)
+        return get_udp_seeds_many(url, info_hashes)
     elif url.startswith('http'):
-        return get_http_seeds(url, info_hash)
+        return get_http_seeds_many(url, info_hashes)
     else:
         log.warning('There is a problem with the get_tracker_seeds')
-        return 0
+        return {}
+
+
+def get_tracker_seeds(url, info_hash):
+    return get_tracker_seeds_many(url, [info_hash]).get(info_hash, 0)
+
+
+def _scrape_worker(jobs, results):
+    while True:
+        try:
+            tracker, info_hashes = jobs.get_nowait()
+        except queue.Empty:
+            return
+        try:
+            results[tracker] = get_tracker_seeds_many(tracker, info_hashes)
+        except Exception as e:
+            log.debug('Error scraping %s: %s', tracker, e)
+
+
+def scrape_seeds(trackers):
+    """
+    Scrapes seeds for many torrents from many trackers. Every tracker is asked once for all of its torrents, and up to
+    `MAX_SCRAPE_THREADS` trackers are scraped at the same time. Results are cached in `scrape_cache`.
+
+    :param trackers: Dict mapping tracker urls to lists of info hashes
+    :return: Dict mapping (tracker, info hash) to seeds, failed scrapes are left out
+    """
+    seeds = {}
+    jobs = queue.Queue()
+    for tracker, info_hashes in trackers.items():
+        missing = []
+        for info_hash in info_hashes:
+            cached = scrape_cache.get((tracker, info_hash))
+            if cached is None:
+                missing.append(info_hash)
+            else:
+                seeds[(tracker, info_hash)] = cached
+        if missing:
+            jobs.put((tracker, missing))
+    if jobs.empty():
+        return seeds
+
+    results = {}
+    threads = []
+    for _ in range(min(MAX_SCRAPE_THREADS, jobs.qsize())):
+        thread = threading.Thread(target=_scrape_worker, args=(jobs, results),
+                                  name='torrent_alive-%d' % next(_thread_counter))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    for tracker, tracker_seeds in results.items():
+        for info_hash, count in tracker_seeds.items():
+            log.debug('%s seeds found for %s from %s', count, info_hash, tracker)
+            seeds[(tracker, info_hash)] = scrape_cache[(tracker, info_hash)] = count
+    return seeds
 
 
 class TorrentAlive(object):
@@ -208,57 +312,50 @@ class TorrentAlive(object):
         config = self.prepare_config(config)
         min_seeds = config['min_seeds']
 
+        # Collect the trackers of all entries first, so that each tracker only needs to be scraped once
+        checks = []
+        trackers = {}
         for entry in task.accepted:
             # If torrent_seeds is filled, we will have already filtered in filter phase
             if entry.get('torrent_seeds'):
                 log.debug('Not checking trackers for seeds, as torrent_seeds is already filled.')
                 continue
-            log.debug('Checking for seeds for %s:', entry['title'])
             torrent = entry.get('torrent')
-            if torrent:
-                log.debug('started examining torrent: %s', torrent)
-                seeds = 0
-                info_hash = torrent.info_hash
-                announce_list = torrent.content.get('announce-list')
-                if announce_list:
-                    # Multitracker torrent
-                    threadlist = []
-                    for tier in announce_list:
-                        for tracker in tier:
-                            background = TorrentAliveThread(tracker, info_hash)
-                            try:
-                                background.start()
-                                threadlist.append(background)
-                            except threading.ThreadError:
-                                # If we can't start a new thread, wait for current ones to complete and continue
-                                log.debug('Reached max threads, finishing current threads.')
-                                seeds = max(seeds, max_seeds_from_threads(threadlist))
-                                background.start()
-                                threadlist = [background]
-                            log.debug('Started thread to scrape %s with info hash %s', tracker, info_hash)
-
-                    seeds = max(seeds, max_seeds_from_threads(threadlist))
-                    log.debug('Highest number of seeds found: %s', seeds)
-                elif torrent.content.get('announce'):
-                    # Single tracker
-                    tracker = torrent.content['announce']
-                    try:
-                        seeds = get_tracker_seeds(tracker, info_hash)
-                    except URLError as e:
-                        log.debug('Error scraping %s: %s', tracker, e, )
-                else:
-                    log.warning('Torrent %s does not seem to have a tracker specified, cannot check for seeders',
-                                entry['title'])
-                    return
-
-                # Reject if needed
-                if seeds < min_seeds:
-                    entry.reject(reason='Tracker(s) had < %s required seeds. (%s)' % (min_seeds, seeds),
-                                 remember_time=config['reject_for'])
-                    # Maybe there is better match that has enough seeds
-                    task.rerun(plugin='torrent_alive', reason='Not enough seeds')
-                else:
-                    log.debug('Found %i seeds from trackers', seeds)
+            if not torrent:
+                continue
+            log.debug('Checking for seeds for %s:', entry['title'])
+            info_hash = torrent.info_hash
+            announce_list = torrent.content.get('announce-list')
+            if announce_list:
+                # Multitracker torrent
+                entry_trackers = [tracker for tier in announce_list for tracker in tier]
+            elif torrent.content.get('announce'):
+                # Single tracker
+                entry_trackers = [torrent.content['announce']]
+            else:
+                log.warning('Torrent %s does not seem to have a tracker specified, cannot check for seeders',
+                            entry['title'])
+                continue
+            for tracker in entry_trackers:
+                hashes = trackers.setdefault(tracker, [])
+                if info_hash not in hashes:
+                    hashes.append(info_hash)
+            checks.append((entry, info_hash, entry_trackers))
+
+        if not checks:
+            return
+        found = scrape_seeds(trackers)
+
+        for entry, info_hash, entry_trackers in checks:
+            seeds = max(found.get((tracker, info_hash), 0) for tracker in entry_trackers)
+            # Reject if needed
+            if seeds < min_seeds:
+                entry.reject(reason='Tracker(s) had < %s required seeds. (%s)' % (min_seeds, seeds),
+                             remember_time=config['reject_for'])
+                # Maybe there is better match that has enough seeds
+                task.rerun(plugin='torrent_alive', reason='Not enough seeds')
+            else:
+                log.debug('Found %i seeds from trackers for %s', seeds, entry['title'])
 
 
 @event('plugin.register')
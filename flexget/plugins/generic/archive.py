@@ -5,20 +5,30 @@ import logging
 import re
 from datetime import datetime
 
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.schema import Table, ForeignKey
-from sqlalchemy import Column, Integer, DateTime, Unicode, Index
+from sqlalchemy import (Column, Integer, DateTime, Unicode, Boolean, Index, select, func, text, table, column,
+                        literal_column)
 
 from flexget import db_schema, plugin
 from flexget.event import event
 from flexget.entry import Entry
 from flexget.utils.sqlalchemy_utils import table_schema, get_index_by_name
+from flexget.utils.tools import chunked
 from flexget.manager import Session
 
 log = logging.getLogger('archive')
 
-SCHEMA_VER = 0
+SCHEMA_VER = 1
+
+# Title search index backends, FTS5 needs SQLite 3.34 or newer for its trigram tokenizer
+FTS5 = 'fts5'
+TRIGRAM = 'trigram'
+FTS_TABLE = 'archive_entry_fts'
+# Search words shorter than the trigram length can't be looked up from the index
+MIN_INDEXED_WORD = 3
 
 Base = db_schema.versioned_base('archive', SCHEMA_VER)
 
@@ -34,6 +44,13 @@ archive_sources_table = Table('archive_entry_sources', Base.metadata,
                               Index('ix_archive_sources', 'entry_id', 'source_id'))
 Base.register_table(archive_sources_table)
 
+# Search index used when FTS5 is not available
+archive_trigrams_table = Table('archive_trigram', Base.metadata,
+                               Column('trigram', Unicode),
+                               Column('entry_id', Integer, ForeignKey('archive_entry.id')),
+                               Index('ix_archive_trigram', 'trigram', 'entry_id'))
+Base.register_table(archive_trigrams_table)
+
 
 class ArchiveEntry(Base):
     __tablename__ = 'archive_entry'
@@ -83,6 +100,18 @@ class ArchiveSource(Base):
         return '<ArchiveSource(id=%s,name=%s)>' % (self.id, self.name)
 
 
+class ArchiveIndexState(Base):
+    __tablename__ = 'archive_index_state'
+
+    id = Column(Integer, primary_key=True)
+    backend = Column(Unicode)
+    # False until all entries archived before the index existed have been indexed
+    built = Column(Boolean, default=False)
+
+    def __str__(self):
+        return '<ArchiveIndexState(backend=%s,built=%s)>' % (self.backend, self.built)
+
+
 def get_source(name, session):
     """
     :param string name: Source name
@@ -135,9 +164,99 @@ def upgrade(ver, session):
             log.critical('one time when you have time, it may take hours')
             log.critical('----------------------------------------------')
         ver = 0
+    if ver == 0:
+        # The search index is set up when it is first used, see get_index_state
+        ver = 1
     return ver
 
 
+def trigrams(text):
+    """Returns the set of lowercase trigrams in `text`."""
+    text = text.lower()
+    return set(text[i:i + 3] for i in range(len(text) - 2))
+
+
+def _create_fts5(session):
+    if session.get_bind().dialect.name != 'sqlite':
+        return False
+    try:
+        session.execute("CREATE VIRTUAL TABLE IF NOT EXISTS %s USING fts5(title, content='archive_entry', "
+                        "content_rowid='id', tokenize='trigram')" % FTS_TABLE)
+    except OperationalError as e:
+        log.debug('FTS5 trigram index not available: %s', e)
+        return False
+    return True
+
+
+def get_index_state(session):
+    """
+    Returns the :class:`ArchiveIndexState`, setting up the title search index when it does not exist yet.
+    """
+    state = session.query(ArchiveIndexState).first()
+    if state is None:
+        state = ArchiveIndexState()
+        state.backend = FTS5 if _create_fts5(session) else TRIGRAM
+        # The index of an empty archive is complete, otherwise existing entries need to be indexed first
+        state.built = session.query(ArchiveEntry.id).first() is None
+        if not state.built:
+            log.warning('Archive search index is not built yet, searches stay slow until '
+                        '`flexget archive reindex` has been ran')
+        session.add(state)
+        session.flush()
+    return state
+
+
+def index_entries(session, archive_entries):
+    """Adds flushed `archive_entries` to the title search index."""
+    state = get_index_state(session)
+    rows = [(ae.id, ae.title) for ae in archive_entries if ae.title]
+    if not rows:
+        return
+    if state.backend == FTS5:
+        session.execute(text('INSERT INTO %s (rowid, title) VALUES (:id, :title)' % FTS_TABLE),
+                        [{'id': entry_id, 'title': title} for entry_id, title in rows])
+    else:
+        session.execute(archive_trigrams_table.insert(),
+                        [{'trigram': trigram, 'entry_id': entry_id}
+                         for entry_id, title in rows for trigram in trigrams(title)])
+
+
+def unindex_entries(session, archive_entries):
+    """Removes `archive_entries` from the title search index, has to be called before they are deleted."""
+    state = session.query(ArchiveIndexState).first()
+    if state is None:
+        return
+    rows = [(ae.id, ae.title) for ae in archive_entries]
+    if not rows:
+        return
+    if state.backend == FTS5:
+        # The external content index can only remove rows when given the values they were indexed with
+        session.execute(text("INSERT INTO %s (%s, rowid, title) VALUES ('delete', :id, :title)" % (FTS_TABLE,
+                                                                                                  FTS_TABLE)),
+                        [{'id': entry_id, 'title': title} for entry_id, title in rows if title])
+    else:
+        for chunk in chunked([entry_id for entry_id, _ in rows]):
+            session.execute(archive_trigrams_table.delete().where(archive_trigrams_table.c.entry_id.in_(chunk)))
+
+
+def rebuild_index(session, batch_size=1000):
+    """Indexes all archived entries again."""
+    state = get_index_state(session)
+    log.verbose('Rebuilding archive search index (%s), may take a while ...', state.backend)
+    if state.backend == FTS5:
+        session.execute(text("INSERT INTO %s (%s) VALUES ('rebuild')" % (FTS_TABLE, FTS_TABLE)))
+    else:
+        session.execute(archive_trigrams_table.delete())
+        batch = []
+        for row in session.query(ArchiveEntry.id, ArchiveEntry.title).yield_per(batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                index_entries(session, batch)
+                batch = []
+        index_entries(session, batch)
+    state.built = True
+
+
 class Archive(object):
     """
     Archives all new items into database where they can be later searched and injected.
@@ -162,11 +281,14 @@ class Archive(object):
         else:
             tag_names = config
 
+        # Set up the search index before this run adds anything to the archive
+        get_index_state(task.session)
         tags = []
         for tag_name in set(tag_names):
             tags.append(get_tag(tag_name, task.session))
 
         count = 0
+        added = []
         processed = []
         for entry in task.entries + task.rejected + task.failed:
             # I think entry can be in multiple of those lists .. not sure though!
@@ -204,8 +326,11 @@ class Archive(object):
                     ae.tags.extend(tags)
                 log.debug('Adding `%s` with %i tags to archive' % (ae, len(tags)))
                 task.session.add(ae)
+                added.append(ae)
                 count += 1
         if count:
+            task.session.flush()
+            index_entries(task.session, added)
             log.verbose('Added %i new entries to archive' % count)
 
     def on_task_abort(self, task, config):
@@ -258,7 +383,7 @@ class UrlrewriteArchive(object):
 
 
 # API function, was also used from webui .. needs to be rethinked
-def search(session, text, tags=None, sources=None, desc=False):
+def search(session, text, tags=None, sources=None, desc=False, rank=False):
     """
     Search from the archive.
 
@@ -267,17 +392,43 @@ def search(session, text, tags=None, sources=None, desc=False):
     :param list tags: Optional list of acceptable tags
     :param list sources: Optional list of acceptable sources
     :param bool desc: Sort results descending
+    :param bool rank: Sort results by relevance first, when the FTS5 search index is used
     :return: ArchiveEntries responding to query
     """
     keyword = str(text).replace(' ', '%').replace('.', '%')
     # clean the text from any unwanted regexp, convert spaces and keep dots as dots
     normalized_re = re.escape(text.replace('.', ' ')).replace('\\ ', ' ').replace(' ', '.')
     find_re = re.compile(normalized_re, re.IGNORECASE)
-    query = session.query(ArchiveEntry).filter(ArchiveEntry.title.like('%' + keyword + '%'))
+    query = session.query(ArchiveEntry)
+
+    # Narrow down the candidates with the search index, the LIKE and regexp below keep the results exact
+    rank_column = None
+    words = [word for word in re.split(r'[ .]+', str(text)) if len(word) >= MIN_INDEXED_WORD]
+    state = get_index_state(session)
+    if state.built and words:
+        if state.backend == FTS5:
+            match = 'title : (%s)' % ' AND '.join('"%s"' % word.replace('"', '""') for word in words)
+            fts = select([column('rowid'), column('rank')]).select_from(table(FTS_TABLE)). \
+                where(literal_column(FTS_TABLE).op('MATCH')(match)).alias('fts')
+            query = query.join(fts, fts.c.rowid == ArchiveEntry.id)
+            rank_column = fts.c.rank
+        else:
+            grams = set()
+            for word in words:
+                grams.update(trigrams(word))
+            candidates = select([archive_trigrams_table.c.entry_id]). \
+                where(archive_trigrams_table.c.trigram.in_(grams)). \
+                group_by(archive_trigrams_table.c.entry_id). \
+                having(func.count(archive_trigrams_table.c.trigram.distinct()) == len(grams))
+            query = query.filter(ArchiveEntry.id.in_(candidates))
+
+    query = query.filter(ArchiveEntry.title.like('%' + keyword + '%'))
     if tags:
         query = query.filter(ArchiveEntry.tags.any(ArchiveTag.name.in_(tags)))
     if sources:
         query = query.filter(ArchiveEntry.sources.any(ArchiveSource.name.in_(sources)))
+    if rank and rank_column is not None:
+        query = query.order_by(rank_column)
     if desc:
         query = query.order_by(ArchiveEntry.added.desc())
     else:
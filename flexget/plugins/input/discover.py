@@ -2,6 +2,7 @@ from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import datetime
+import functools
 import logging
 import random
 
@@ -12,6 +13,7 @@ from flexget import db_schema
 from flexget.event import event
 from flexget.manager import Session
 from flexget.plugin import get_plugin_by_name, PluginError, PluginWarning
+from flexget.utils.search import run_concurrently, run_search
 from flexget.utils.tools import parse_timedelta, multiply_timedelta, aggregate_inputs
 
 log = logging.getLogger('discover')
@@ -100,6 +102,7 @@ class Discover(object):
         result = []
         for index, entry in enumerate(entries):
             entry_results = []
+            searches = []
             for item in config['from']:
                 if isinstance(item, dict):
                     plugin_name, plugin_config = list(item.items())[0]
@@ -111,26 +114,32 @@ class Discover(object):
                     continue
                 log.verbose('Searching for `%s` with plugin `%s` (%i of %i)', entry['title'], plugin_name, index + 1,
                             len(entries))
-                try:
-                    search_results = search.search(task=task, entry=entry, config=plugin_config)
-                    if not search_results:
-                        log.debug('No results from %s', plugin_name)
-                        continue
-                    log.debug('Discovered %s entries from %s', len(search_results), plugin_name)
-                    if config.get('limit'):
-                        search_results = sorted(search_results, reverse=True,
-                                                key=lambda x: x.get('search_sort', ''))[:config['limit']]
-                    for e in search_results:
-                        e['discovered_from'] = entry['title']
-                        e['discovered_with'] = plugin_name
-                        e.on_complete(self.entry_complete, query=entry, search_results=search_results)
-
-                    entry_results.extend(search_results)
-
-                except PluginWarning as e:
-                    log.verbose('No results from %s: %s', plugin_name, e)
-                except PluginError as e:
-                    log.error('Error searching with %s: %s', plugin_name, e)
+                searches.append((plugin_name, functools.partial(run_search, search, task, entry, plugin_config)))
+            # Search from all the plugins at the same time
+            outcomes = run_concurrently([call for _, call in searches], max_threads=len(searches))
+            for (plugin_name, _), (search_results, error) in zip(searches, outcomes):
+                if isinstance(error, PluginWarning):
+                    log.verbose('No results from %s: %s', plugin_name, error)
+                    continue
+                elif isinstance(error, PluginError):
+                    log.error('Error searching with %s: %s', plugin_name, error)
+                    continue
+                elif error is not None:
+                    raise error
+                if not search_results:
+                    log.debug('No results from %s', plugin_name)
+                    continue
+                log.debug('Discovered %s entries from %s', len(search_results), plugin_name)
+                if config.get('limit'):
+                    search_results = sorted(search_results, reverse=True,
+                                            key=lambda x: x.get('search_sort', ''))[:config['limit']]
+                for e in search_results:
+                    e['discovered_from'] = entry['title']
+                    e['discovered_with'] = plugin_name
+                    e.on_complete(self.entry_complete, query=entry, search_results=search_results)
+
+                entry_results.extend(search_results)
+
             if not entry_results:
                 log.verbose('No search results for `%s`', entry['title'])
                 entry.complete()
@@ -3,12 +3,20 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from future.utils import PY2
 
 import logging
+import os
 import re
+import stat
 import sys
+import threading
 from datetime import datetime
 
 from path import Path
 
+try:
+    from os import scandir
+except ImportError:
+    scandir = None
+
 from flexget import plugin
 from flexget.config_schema import one_or_more
 from flexget.event import event
@@ -17,6 +25,74 @@ from flexget.entry import Entry
 log = logging.getLogger('filesystem')
 
 
+class _ListdirEntry(object):
+    """Stand in for :class:`os.DirEntry` on pythons without :func:`os.scandir`."""
+
+    def __init__(self, folder, name):
+        self.name = name
+        self.path = os.path.join(folder, name)
+        self._lstat = None
+        self._stat = None
+
+    def stat(self, follow_symlinks=True):
+        if not follow_symlinks:
+            if self._lstat is None:
+                self._lstat = os.lstat(self.path)
+            return self._lstat
+        if self._stat is None:
+            self._stat = os.stat(self.path) if self.is_symlink() else self.stat(follow_symlinks=False)
+        return self._stat
+
+    def is_symlink(self):
+        return stat.S_ISLNK(self.stat(follow_symlinks=False).st_mode)
+
+    def is_dir(self):
+        try:
+            return stat.S_ISDIR(self.stat().st_mode)
+        except OSError:
+            return False
+
+    def is_file(self):
+        try:
+            return stat.S_ISREG(self.stat().st_mode)
+        except OSError:
+            return False
+
+
+def _scan(folder):
+    if scandir is not None:
+        return scandir(folder)
+    return [_ListdirEntry(folder, name) for name in os.listdir(folder)]
+
+
+def walk(folder, max_depth, visited=None, depth=1):
+    """
+    Walks the tree below `folder` depth first, without descending further than `max_depth` levels.
+
+    Every child is listed with a single directory scan, and the returned entries cache their stat results, so each
+    path is stat'ed at most once.
+
+    :return: Iterator of :class:`os.DirEntry` like objects
+    """
+    if visited is None:
+        visited = set()
+    try:
+        folder_stat = os.stat(folder)
+        children = _scan(folder)
+    except OSError as e:
+        log.warning('Unable to scan %s: %s', folder, e)
+        return
+    # Guard against symlink loops
+    if (folder_stat.st_dev, folder_stat.st_ino) in visited:
+        return
+    visited.add((folder_stat.st_dev, folder_stat.st_ino))
+    for child in children:
+        yield child
+        if depth < max_depth and child.is_dir():
+            for item in walk(child.path, max_depth, visited, depth + 1):
+                yield item
+
+
 class Filesystem(object):
     """
     Uses local path content as an input. Can use recursion if configured.
@@ -62,6 +138,13 @@ class Filesystem(object):
           - files
           - dirs
 
+    Example 6::
+
+      filesystem:
+        path: /storage/media/
+        recursive: yes
+        threads: 4  # The top level folders are scanned in parallel
+
     """
     retrieval_options = ['files', 'dirs', 'symlinks']
     paths = one_or_more({'type': 'string', 'format': 'path'}, unique_items=True)
@@ -75,7 +158,8 @@ class Filesystem(object):
                  'mask': {'type': 'string'},
                  'regexp': {'type': 'string', 'format': 'regex'},
                  'recursive': {'oneOf': [{'type': 'integer', 'minimum': 2}, {'type': 'boolean'}]},
-                 'retrieve': one_or_more({'type': 'string', 'enum': retrieval_options}, unique_items=True)
+                 'retrieve': one_or_more({'type': 'string', 'enum': retrieval_options}, unique_items=True),
+                 'threads': {'type': 'integer', 'minimum': 1}
              },
              'required': ['path'],
              'additionalProperties': False}]
@@ -99,14 +183,18 @@ class Filesystem(object):
         config.setdefault('regexp', '.')
         # Sets the default retrieval option to files
         config.setdefault('retrieve', self.retrieval_options)
+        config.setdefault('threads', 1)
 
         return config
 
-    def create_entry(self, filepath, test_mode):
+    def create_entry(self, filepath, test_mode, path_stat=None, is_file=None):
         """
         Creates a single entry using a filepath and a type (file/dir)
+
+        :param path_stat: stat result of `filepath`, looked up if not given
+        :param is_file: Whether `filepath` is a file, looked up if not given
         """
-        filepath = filepath.abspath()
+        filepath = Path(filepath).abspath()
         entry = Entry()
         entry['location'] = filepath
         if PY2:
@@ -117,18 +205,18 @@ class Filesystem(object):
             import pathlib
             entry['url'] = pathlib.Path(filepath).absolute().as_uri()
         entry['filename'] = filepath.name
-        if filepath.isfile():
+        if path_stat is None:
+            path_stat = filepath.stat()
+        if is_file is None:
+            is_file = stat.S_ISREG(path_stat.st_mode)
+        if is_file:
             entry['title'] = filepath.namebase
         else:
             entry['title'] = filepath.name
-        try:
-            entry['timestamp'] = datetime.fromtimestamp(filepath.getmtime())
-        except Exception as e:
-            log.warning('Error setting timestamp for %s: %s' % (filepath, e))
-            entry['timestamp'] = None
-        entry['accessed'] = datetime.fromtimestamp(filepath.getatime())
-        entry['modified'] = datetime.fromtimestamp(filepath.getmtime())
-        entry['created'] = datetime.fromtimestamp(filepath.getctime())
+        entry['timestamp'] = datetime.fromtimestamp(path_stat.st_mtime)
+        entry['accessed'] = datetime.fromtimestamp(path_stat.st_atime)
+        entry['modified'] = entry['timestamp']
+        entry['created'] = datetime.fromtimestamp(path_stat.st_ctime)
         if entry.isvalid():
             if test_mode:
                 log.info("Test mode. Entry includes:")
@@ -142,53 +230,105 @@ class Filesystem(object):
             log.error('Non valid entry created: %s ' % entry)
             return
 
-    def get_max_depth(self, recursion, base_depth):
+    def get_max_depth(self, recursion):
+        """Returns how many levels below the base folder are scanned."""
         if recursion is False:
-            return base_depth + 1
+            return 1
         elif recursion is True:
             return float('inf')
         else:
-            return base_depth + recursion
+            return recursion
 
-    def get_folder_objects(self, folder, recursion):
-        if recursion is False:
-            return folder.listdir()
-        else:
-            return folder.walk(errors='ignore')
+    def entry_from_dir_entry(self, dir_entry, match, test_mode, get_files, get_dirs, get_symlinks):
+        path = dir_entry.path
+        log.trace('Checking if %s qualifies to be added as an entry.', path)
+        try:
+            path.encode('utf-8')
+        except UnicodeError:
+            log.error('File %s not decodable with filesystem encoding: %s' % (path, sys.getfilesystemencoding()))
+            return
+        if not match(path):
+            return
+        try:
+            is_symlink = dir_entry.is_symlink()
+            is_dir = dir_entry.is_dir()
+            is_file = dir_entry.is_file()
+            if (is_dir and get_dirs) or (is_symlink and get_symlinks) or (is_file and not is_symlink and get_files):
+                try:
+                    path_stat = dir_entry.stat()
+                except OSError:
+                    # Broken symlink
+                    path_stat = dir_entry.stat(follow_symlinks=False)
+                return self.create_entry(path, test_mode, path_stat, is_file)
+        except OSError as e:
+            log.warning('Unable to access %s: %s', path, e)
+            return
+        log.debug("Path object's %s type doesn't match requested object types." % path)
 
-    def get_entries_from_path(self, path_list, match, recursion, test_mode, get_files, get_dirs, get_symlinks):
+    def get_entries_from_folder(self, folder, match, max_depth, test_mode, get_files, get_dirs, get_symlinks):
         entries = []
+        for dir_entry in walk(folder, max_depth):
+            entry = self.entry_from_dir_entry(dir_entry, match, test_mode, get_files, get_dirs, get_symlinks)
+            if entry:
+                entries.append(entry)
+        return entries
+
+    def get_entries_from_path(self, path_list, match, recursion, test_mode, get_files, get_dirs, get_symlinks,
+                              threads=1):
+        entries = []
+        locations = set()
+        max_depth = self.get_max_depth(recursion)
+
+        def add_entries(new_entries):
+            for entry in new_entries:
+                if entry['location'] not in locations:
+                    locations.add(entry['location'])
+                    entries.append(entry)
 
         for folder in path_list:
             log.verbose('Scanning folder %s. Recursion is set to %s.' % (folder, recursion))
             folder = Path(folder).expanduser()
             log.debug('Scanning %s' % folder)
-            base_depth = len(folder.splitall())
-            max_depth = self.get_max_depth(recursion, base_depth)
-            folder_objects = self.get_folder_objects(folder, recursion)
-            for path_object in folder_objects:
-                log.debug('Checking if %s qualifies to be added as an entry.' % path_object)
-                try:
-                    path_object.exists()
-                except UnicodeError:
-                    log.error('File %s not decodable with filesystem encoding: %s' % (
-                        path_object, sys.getfilesystemencoding()))
-                    continue
-                entry = None
-                object_depth = len(path_object.splitall())
-                if object_depth <= max_depth:
-                    if match(path_object):
-                        if (path_object.isdir() and get_dirs) or (
-                                path_object.islink() and get_symlinks) or (
-                                path_object.isfile() and not path_object.islink() and get_files):
-                            entry = self.create_entry(path_object, test_mode)
-                        else:
-                            log.debug("Path object's %s type doesn't match requested object types." % path_object)
-                        if entry and entry not in entries:
-                            entries.append(entry)
+            if threads > 1 and max_depth > 1:
+                add_entries(self.scan_parallel(folder, match, max_depth, test_mode, get_files, get_dirs,
+                                               get_symlinks, threads))
+            else:
+                add_entries(self.get_entries_from_folder(folder, match, max_depth, test_mode, get_files, get_dirs,
+                                                         get_symlinks))
 
         return entries
 
+    def scan_parallel(self, folder, match, max_depth, test_mode, get_files, get_dirs, get_symlinks, threads):
+        """Scans the top level directories of `folder` in up to `threads` threads, keeping the walk order."""
+        results = []
+        subfolders = []
+        for dir_entry in walk(folder, 1):
+            entry = self.entry_from_dir_entry(dir_entry, match, test_mode, get_files, get_dirs, get_symlinks)
+            results.append([entry] if entry else [])
+            if dir_entry.is_dir():
+                # Entries below this directory go right after it
+                results.append(None)
+                subfolders.append((len(results) - 1, dir_entry.path))
+
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                with lock:
+                    if not subfolders:
+                        return
+                    index, path = subfolders.pop(0)
+                results[index] = self.get_entries_from_folder(path, match, max_depth - 1, test_mode, get_files,
+                                                              get_dirs, get_symlinks)
+
+        workers = [threading.Thread(target=worker, name='filesystem-%d' % i)
+                   for i in range(min(threads, len(subfolders)))]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return [entry for result in results for entry in result or []]
+
     def on_task_input(self, task, config):
         config = self.prepare_config(config)
 
@@ -201,7 +341,8 @@ class Filesystem(object):
         get_symlinks = 'symlinks' in config['retrieve']
 
         log.verbose('Starting to scan folders.')
-        return self.get_entries_from_path(path_list, match, recursive, test_mode, get_files, get_dirs, get_symlinks)
+        return self.get_entries_from_path(path_list, match, recursive, test_mode, get_files, get_dirs, get_symlinks,
+                                          config['threads'])
 
 
 @event('plugin.register')
@@ -132,7 +132,7 @@ class InputHtml(object):
         log.verbose('Requesting: %s' % url)
         page = task.requests.get(url, auth=auth)
         log.verbose('Response: %s (%s)' % (page.status_code, page.reason))
-        soup = get_soup(page.content)
+        soup = get_soup(page.content, site=parse.urlparse(url).hostname)
 
         # dump received content into a file
         if dump_name:
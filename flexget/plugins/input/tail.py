@@ -5,17 +5,31 @@ import io
 import os
 import re
 import logging
+import threading
 
 from sqlalchemy import Column, Integer, Unicode
 
-from flexget import options, plugin
+from flexget import db_schema, options, plugin
 from flexget.db_schema import versioned_base
 from flexget.entry import Entry
 from flexget.event import event
 from flexget.manager import Session
+from flexget.utils.sqlalchemy_utils import table_add_column
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
 
 log = logging.getLogger('tail')
-Base = versioned_base('tail', 0)
+Base = versioned_base('tail', 1)
+
+# Patterns using these can't be joined into one prefilter pattern without changing their meaning
+UNCOMBINABLE_RE = re.compile(r'\\[1-9]|\(\?P=|\(\?[aiLmsux]')
+# Followed files are checked for changes this often when inotify is not available, in seconds
+POLL_INTERVAL = 5
+# Time to wait after a change for more lines to arrive, so that they are handled by one task execution
+BATCH_DELAY = 2
 
 
 class TailPosition(Base):
@@ -24,6 +38,35 @@ class TailPosition(Base):
     task = Column(Unicode)
     filename = Column(Unicode)
     position = Column(Integer)
+    # Inode of the file when the position was stored, a different inode means the file has been rotated
+    inode = Column(Integer)
+
+
+@db_schema.upgrade('tail')
+def upgrade(ver, session):
+    if ver is None:
+        ver = 0
+    if ver == 0:
+        table_add_column('tail', 'inode', Integer, session)
+        ver = 1
+    return ver
+
+
+def compile_patterns(entry_config):
+    """
+    Compiles the field patterns of the entry config.
+
+    :return: List of (field, compiled pattern) tuples and a pattern matching any line one of the fields matches, or
+      None if the patterns can't be combined.
+    """
+    patterns = [(field, re.compile(regexp)) for field, regexp in entry_config.items()]
+    if any(UNCOMBINABLE_RE.search(regexp) for regexp in entry_config.values()):
+        return patterns, None
+    try:
+        prefilter = re.compile('|'.join('(?:%s)' % regexp for regexp in entry_config.values()))
+    except re.error:
+        prefilter = None
+    return patterns, prefilter
 
 
 class InputTail(object):
@@ -52,6 +95,18 @@ class InputTail(object):
           title: 'TITLE: (.*) URL:'
           url: 'URL: (.*)'
         encoding: utf8
+
+    When running as daemon, the task can be executed whenever lines are added to the file with follow. New lines
+    are collected for `batch_delay` seconds before the task runs. The file is watched with inotify when the
+    inotify_simple module is installed, otherwise it is checked every `poll_interval` seconds::
+
+      tail:
+        file: ~/irclogs/some/log
+        entry:
+          title: 'TITLE: (.*) URL:'
+          url: 'URL: (.*)'
+        follow:
+          batch_delay: 1
     """
     schema = {
         'type': 'object',
@@ -69,16 +124,38 @@ class InputTail(object):
             'format': {
                 'type': 'object',
                 'additionalProperties': {'type': 'string'}
+            },
+            'follow': {
+                'oneOf': [
+                    {'type': 'boolean'},
+                    {
+                        'type': 'object',
+                        'properties': {
+                            'poll_interval': {'type': 'number', 'minimum': 0.1},
+                            'batch_delay': {'type': 'number', 'minimum': 0}
+                        },
+                        'additionalProperties': False
+                    }
+                ]
             }
         },
         'required': ['file', 'entry'],
         'additionalProperties': False
     }
 
+    def __init__(self):
+        self.compiled = {}
+
     def format_entry(self, entry, d):
         for k, v in d.items():
             entry[k] = v % entry
 
+    def get_patterns(self, entry_config):
+        key = tuple(sorted(entry_config.items()))
+        if key not in self.compiled:
+            self.compiled[key] = compile_patterns(entry_config)
+        return self.compiled[key]
+
     def on_task_input(self, task, config):
 
         # Let details plugin know that it is ok if this task doesn't produce any entries
@@ -94,7 +171,8 @@ class InputTail(object):
             else:
                 last_pos = 0
 
-            with io.open(filename, 'r', encoding=encoding, errors='replace') as file:
+            with io.open(filename, 'rb') as file:
+                inode = os.fstat(file.fileno()).st_ino
                 if task.options.tail_reset == filename or task.options.tail_reset == task.name:
                     if last_pos == 0:
                         log.info('Task %s tail position is already zero' % task.name)
@@ -102,7 +180,10 @@ class InputTail(object):
                         log.info('Task %s tail position (%s) reset to zero' % (task.name, last_pos))
                         last_pos = 0
 
-                if os.path.getsize(filename) < last_pos:
+                if db_pos and db_pos.inode and db_pos.inode != inode:
+                    log.info('File has been rotated since previous execution, resetting to beginning of the file')
+                    last_pos = 0
+                elif os.fstat(file.fileno()).st_size < last_pos:
                     log.info('File size is smaller than in previous execution, resetting to beginning of the file')
                     last_pos = 0
 
@@ -110,62 +191,195 @@ class InputTail(object):
 
                 log.debug('continuing from last position %s' % last_pos)
 
-                entry_config = config.get('entry')
-                format_config = config.get('format', {})
-
-                # keep track what fields have been found
-                used = {}
-                entries = []
-                entry = Entry()
-
-                # now parse text
-
-                for line in file:
-                    if not line:
-                        break
-
-                    for field, regexp in entry_config.items():
-                        # log.debug('search field: %s regexp: %s' % (field, regexp))
-                        match = re.search(regexp, line)
-                        if match:
-                            # check if used field detected, in such case start with new entry
-                            if field in used:
-                                if entry.isvalid():
-                                    log.info('Found field %s again before entry was completed. \
-                                              Adding current incomplete, but valid entry and moving to next.' % field)
-                                    self.format_entry(entry, format_config)
-                                    entries.append(entry)
-                                else:
-                                    log.info(
-                                        'Invalid data, entry field %s is already found once. Ignoring entry.' % field)
-                                # start new entry
-                                entry = Entry()
-                                used = {}
-
-                            # add field to entry
-                            entry[field] = match.group(1)
-                            used[field] = True
-                            log.debug('found field: %s value: %s' % (field, entry[field]))
-
-                        # if all fields have been found
-                        if len(used) == len(entry_config):
-                            # check that entry has at least title and url
-                            if not entry.isvalid():
-                                log.info('Invalid data, constructed entry is missing mandatory fields (title or url)')
-                            else:
-                                self.format_entry(entry, format_config)
-                                entries.append(entry)
-                                log.debug('Added entry %s' % entry)
-                                # start new entry
-                                entry = Entry()
-                                used = {}
-                last_pos = file.tell()
+                entries, last_pos = self.parse(file, last_pos, config, encoding)
             if db_pos:
                 db_pos.position = last_pos
+                db_pos.inode = inode
             else:
-                session.add(TailPosition(task=task.name, filename=filename, position=last_pos))
+                session.add(TailPosition(task=task.name, filename=filename, position=last_pos, inode=inode))
         return entries
 
+    def parse(self, file, position, config, encoding):
+        """
+        Parses entries from the lines of binary `file`, starting at `position`.
+
+        :return: List of entries and the position after the last handled line
+        """
+        patterns, prefilter = self.get_patterns(config['entry'])
+        format_config = config.get('format', {})
+        # A line without line end may still be being written when following the file
+        complete_lines = bool(config.get('follow'))
+
+        # keep track what fields have been found
+        used = {}
+        entries = []
+        entry = Entry()
+
+        # now parse text
+
+        for raw_line in file:
+            if complete_lines and not raw_line.endswith(b'\n'):
+                break
+            position += len(raw_line)
+            line = raw_line.decode(encoding, 'replace')
+            if prefilter is not None and not prefilter.search(line):
+                continue
+
+            for field, regexp in patterns:
+                # log.debug('search field: %s regexp: %s' % (field, regexp.pattern))
+                match = regexp.search(line)
+                if match:
+                    # check if used field detected, in such case start with new entry
+                    if field in used:
+                        if entry.isvalid():
+                            log.info('Found field %s again before entry was completed. \
+                                      Adding current incomplete, but valid entry and moving to next.' % field)
+                            self.format_entry(entry, format_config)
+                            entries.append(entry)
+                        else:
+                            log.info(
+                                'Invalid data, entry field %s is already found once. Ignoring entry.' % field)
+                        # start new entry
+                        entry = Entry()
+                        used = {}
+
+                    # add field to entry
+                    entry[field] = match.group(1)
+                    used[field] = True
+                    log.debug('found field: %s value: %s' % (field, entry[field]))
+
+                # if all fields have been found
+                if len(used) == len(patterns):
+                    # check that entry has at least title and url
+                    if not entry.isvalid():
+                        log.info('Invalid data, constructed entry is missing mandatory fields (title or url)')
+                    else:
+                        self.format_entry(entry, format_config)
+                        entries.append(entry)
+                        log.debug('Added entry %s' % entry)
+                        # start new entry
+                        entry = Entry()
+                        used = {}
+        return entries, position
+
+
+class TailFollower(object):
+    """Executes a task whenever lines are added to the file it tails."""
+
+    def __init__(self, manager, task, filename, poll_interval=POLL_INTERVAL, batch_delay=BATCH_DELAY):
+        self.manager = manager
+        self.task = task
+        self.filename = filename
+        self.poll_interval = poll_interval
+        self.batch_delay = batch_delay
+        self._stopped = threading.Event()
+        self._thread = None
+        self._inotify = None
+
+    def start(self):
+        if INotify is not None:
+            try:
+                self._inotify = INotify()
+                # The directory is watched to notice when the file is rotated
+                self._inotify.add_watch(os.path.dirname(self.filename) or '.', inotify_flags.MODIFY |
+                                        inotify_flags.CREATE | inotify_flags.MOVED_TO | inotify_flags.CLOSE_WRITE)
+            except OSError as e:
+                log.debug('Unable to watch %s with inotify, polling instead: %s', self.filename, e)
+                self._inotify = None
+        self._thread = threading.Thread(target=self.run, name='tail_follow_%s' % self.task)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._inotify is not None:
+            self._inotify.close()
+
+    def stat(self):
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime
+
+    def wait_for_change(self):
+        """Blocks until the file changes or `poll_interval` passes, returns the current stat of the file."""
+        if self._inotify is not None:
+            try:
+                self._inotify.read(timeout=int(self.poll_interval * 1000))
+            except (OSError, ValueError):
+                # Closed by stop
+                pass
+        else:
+            self._stopped.wait(self.poll_interval)
+        return self.stat()
+
+    def run(self):
+        log.verbose('Following %s for task %s', self.filename, self.task)
+        # Lines may have been added while the daemon was not running
+        changed = True
+        current = self.stat()
+        while not self._stopped.is_set():
+            if changed and current is not None:
+                self._stopped.wait(self.batch_delay)
+                if self._stopped.is_set():
+                    break
+                # Lines added during the execution count as a change for the next round
+                current = self.stat()
+                self.execute()
+            previous, current = current, self.wait_for_change()
+            changed = current != previous
+
+    def execute(self):
+        log.debug('%s changed, executing task %s', self.filename, self.task)
+        finished_events = self.manager.execute(options={'tasks': [self.task], 'cron': True, 'allow_manual': False},
+                                               priority=5)
+        for _, _, finished_event in finished_events:
+            finished_event.wait()
+
+
+followers = {}
+
+
+def followed_files(manager):
+    """Returns the follow config of tail inputs by (task name, file)"""
+    result = {}
+    for task_name, task_config in manager.config.get('tasks', {}).items():
+        tail_config = task_config.get('tail') if isinstance(task_config, dict) else None
+        if task_name.startswith('_') or not isinstance(tail_config, dict) or not tail_config.get('follow'):
+            continue
+        follow = tail_config['follow'] if isinstance(tail_config['follow'], dict) else {}
+        filename = os.path.expanduser(tail_config['file'])
+        result[(task_name, filename)] = (follow.get('poll_interval', POLL_INTERVAL),
+                                         follow.get('batch_delay', BATCH_DELAY))
+    return result
+
+
+@event('manager.daemon.started')
+@event('manager.config_updated')
+def setup_followers(manager):
+    """Starts following the files of tail inputs with follow enabled, and stops following removed ones."""
+    if not manager.is_daemon:
+        return
+    configured = followed_files(manager)
+    for key, follower in list(followers.items()):
+        if configured.get(key) != (follower.poll_interval, follower.batch_delay):
+            follower.stop()
+            del followers[key]
+    for key, (poll_interval, batch_delay) in configured.items():
+        if key not in followers:
+            task_name, filename = key
+            followers[key] = TailFollower(manager, task_name, filename, poll_interval, batch_delay)
+            followers[key].start()
+
+
+@event('manager.shutdown_requested')
+@event('manager.shutdown')
+def stop_followers(manager):
+    for follower in followers.values():
+        follower.stop()
+    followers.clear()
+
 
 @event('plugin.register')
 def register_plugin():
@@ -1,12 +1,15 @@
 from __future__ import unicode_literals, division, absolute_import
 
+import itertools
 import logging
+import time
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from collections import MutableSet
 from datetime import datetime
 
-from sqlalchemy import Column, Unicode, Integer, ForeignKey, func, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Unicode, Integer, ForeignKey, func, DateTime, distinct
+from sqlalchemy import event as sqlalchemy_event
+from sqlalchemy.orm import relationship, joinedload
 from sqlalchemy.sql.elements import and_
 
 from flexget import plugin
@@ -16,11 +19,18 @@ from flexget.event import event
 from flexget.manager import Session
 from flexget.plugin import get_plugin_by_name
 from flexget.plugins.parsers.parser_common import normalize_name, remove_dirt
-from flexget.utils.tools import split_title_year
+from flexget.utils.tools import split_title_year, chunked
 
 log = logging.getLogger('movie_list')
 Base = versioned_base('movie_list', 0)
 
+# Lookup index of each list by list id, with the fingerprint of the list contents it was built from and when that was
+# last checked
+list_indexes = {}
+# Indexes are dropped when lists are changed by this process, changes made by other processes are noticed when the
+# fingerprint is checked again after this many seconds
+INDEX_CHECK_INTERVAL = 10
+
 
 class MovieListBase(object):
     """
@@ -140,54 +150,129 @@ class MovieList(MutableSet):
 
     def __len__(self):
         with Session() as session:
-            return len(self._db_list(session).movies)
+            return self._db_list(session).movies.count()
 
     def add(self, entry):
+        return self._add_entries([entry])[0]
+
+    def __ior__(self, entries):
+        # Optimization to add multiple entries in one session
+        self._add_entries(entries)
+        return self
+
+    def discard(self, entry):
+        self._remove_entries([entry])
+
+    def __isub__(self, entries):
+        # Optimization to remove multiple entries in one session
+        self._remove_entries(entries)
+        return self
+
+    def __contains__(self, entry):
+        return self._find_entry(entry) is not None
+
+    def _add_entries(self, entries):
         with Session() as session:
-            # Check if this is already in the list, refresh info if so
             db_list = self._db_list(session=session)
-            db_movie = self._find_entry(entry, session=session)
-            # Just delete and re-create to refresh
-            if db_movie:
-                session.delete(db_movie)
-            db_movie = MovieListMovie()
-            if 'movie_name' in entry:
-                db_movie.title, db_movie.year = entry['movie_name'], entry.get('movie_year')
-            else:
-                db_movie.title, db_movie.year = split_title_year(entry['title'])
-            for id_name in MovieListBase().supported_ids:
-                if id_name in entry:
-                    db_movie.ids.append(MovieListID(id_name=id_name, id_value=entry[id_name]))
-            log.debug('adding entry %s', entry)
-            db_list.movies.append(db_movie)
+            supported_ids = MovieListBase().supported_ids
+            # Movies added in this batch are looked up like the stored ones, the index is not changed
+            lookup = dict(self._index(session))
+            matches = [self._lookup(lookup, entry, supported_ids) for entry in entries]
+            movies = self._load_movies(session, matches)
+            removed = set()
+            added = []
+            for entry in entries:
+                # Look up again, the movie may have been added or replaced earlier in this batch
+                match = self._lookup(lookup, entry, supported_ids, removed)
+                # Just delete and re-create to refresh
+                if isinstance(match, MovieListMovie):
+                    db_list.movies.remove(match)
+                    added.remove(match)
+                elif match is not None:
+                    session.delete(movies.get(match) or session.query(MovieListMovie).get(match))
+                if match is not None:
+                    removed.add(match)
+                db_movie = MovieListMovie()
+                if 'movie_name' in entry:
+                    db_movie.title, db_movie.year = entry['movie_name'], entry.get('movie_year')
+                else:
+                    db_movie.title, db_movie.year = split_title_year(entry['title'])
+                for id_name in supported_ids:
+                    if id_name in entry:
+                        db_movie.ids.append(MovieListID(id_name=id_name, id_value=entry[id_name]))
+                log.debug('adding entry %s', entry)
+                db_list.movies.append(db_movie)
+                added.append(db_movie)
+                for key in self._movie_keys(db_movie.title, db_movie.year, db_movie.ids):
+                    lookup[key] = db_movie
             session.commit()
-            return db_movie.to_entry()
+            return [db_movie.to_entry() for db_movie in added]
 
-    def discard(self, entry):
+    def _remove_entries(self, entries):
         with Session() as session:
-            db_movie = self._find_entry(entry, session=session)
-            if db_movie:
+            supported_ids = MovieListBase().supported_ids
+            index = self._index(session)
+            matches = [self._lookup(index, entry, supported_ids) for entry in entries]
+            for db_movie in self._load_movies(session, matches).values():
                 log.debug('deleting movie %s', db_movie)
                 session.delete(db_movie)
 
-    def __contains__(self, entry):
-        return self._find_entry(entry) is not None
-
     @with_session
     def _find_entry(self, entry, session=None):
         """Finds `MovieListMovie` corresponding to this entry, if it exists."""
-        # Match by supported IDs
-        for id_name in MovieListBase().supported_ids:
+        match = self._lookup(self._index(session), entry, MovieListBase().supported_ids)
+        if match is not None:
+            res = session.query(MovieListMovie).get(match)
+            log.debug('found movie %s', res)
+            return res
+
+    def _index(self, session):
+        """
+        Returns the lookup index of this list, mapping the keys from :meth:`_movie_keys` to movie ids.
+
+        The index is kept between tasks and rebuilt when the list contents have changed, even by another process.
+        """
+        db_list = self._db_list(session)
+        list_id = db_list.id
+        cached = list_indexes.get(list_id)
+        if cached and time.time() - cached[2] < INDEX_CHECK_INTERVAL:
+            return cached[1]
+        # Ids of deleted rows can be reused, the times rows were added tell them apart
+        fingerprint = (db_list.added,) + tuple(
+            session.query(func.count(distinct(MovieListMovie.id)), func.max(MovieListMovie.id),
+                          func.max(MovieListMovie.added), func.count(MovieListID.id), func.max(MovieListID.added))
+            .outerjoin(MovieListMovie.ids).filter(MovieListMovie.list_id == list_id).one())
+        if cached and cached[0] == fingerprint:
+            list_indexes[list_id] = (fingerprint, cached[1], time.time())
+            return cached[1]
+        log.debug('building index of movie list %s', self.list_name)
+        index = {}
+        movies = (session.query(MovieListMovie.id, MovieListMovie.title, MovieListMovie.year)
+                  .filter(MovieListMovie.list_id == list_id).order_by(MovieListMovie.id))
+        for movie_id, title, year in movies:
+            index.setdefault(self._movie_keys(title, year, [])[0], movie_id)
+        ids = (session.query(MovieListID).join(MovieListMovie).filter(MovieListMovie.list_id == list_id)
+               .order_by(MovieListID.movie_id))
+        for movie_list_id in ids:
+            index.setdefault((movie_list_id.id_name, movie_list_id.id_value), movie_list_id.movie_id)
+        list_indexes[list_id] = (fingerprint, index, time.time())
+        return index
+
+    @staticmethod
+    def _movie_keys(title, year, ids):
+        """Returns the index keys of a movie, title and year first."""
+        keys = [('movie_name', (title or '').lower(), year or None)]
+        keys.extend((movie_list_id.id_name, str(movie_list_id.id_value)) for movie_list_id in ids)
+        return keys
+
+    def _lookup(self, index, entry, supported_ids, removed=()):
+        """Finds `entry` from `index` by its supported ids, falling back to title and year like the list always has."""
+        for id_name in supported_ids:
             if entry.get(id_name):
                 log.debug('trying to match movie based off id %s: %s', id_name, entry[id_name])
-                res = (self._db_list(session).movies.join(MovieListMovie.ids).filter(
-                    and_(
-                        MovieListID.id_name == id_name,
-                        MovieListID.id_value == entry[id_name]))
-                       .first())
-                if res:
-                    log.debug('found movie %s', res)
-                    return res
+                match = index.get((id_name, str(entry[id_name])))
+                if match is not None and match not in removed:
+                    return match
         # Fall back to title/year match
         if not entry.get('movie_name'):
             self._parse_title(entry)
@@ -198,11 +283,19 @@ class MovieList(MutableSet):
             log.warning('Could not get a movie name, skipping')
             return
         log.debug('trying to match movie based of name: %s and year: %s', name, year)
-        res = (self._db_list(session).movies.filter(func.lower(MovieListMovie.title) == name.lower())
-               .filter(MovieListMovie.year == year).first())
-        if res:
-            log.debug('found movie %s', res)
-        return res
+        match = index.get(self._movie_keys(name, year, [])[0])
+        if match not in removed:
+            return match
+
+    @staticmethod
+    def _load_movies(session, matches):
+        """Loads the stored movies with the ids in `matches`, with their identifiers."""
+        movie_ids = list(set(match for match in matches if isinstance(match, int)))
+        movies = {}
+        for chunk in chunked(movie_ids):
+            movies.update((movie.id, movie) for movie in session.query(MovieListMovie)
+                          .options(joinedload(MovieListMovie.ids)).filter(MovieListMovie.id.in_(chunk)))
+        return movies
 
     @staticmethod
     def _parse_title(entry):
@@ -228,6 +321,15 @@ class MovieList(MutableSet):
         match = self._find_entry(entry=entry, session=session)
         return match.to_entry() if match else None
 
+    def get_many(self, entries):
+        """Same as :meth:`get` for each of `entries`, looked up from the list index in one session."""
+        with Session() as session:
+            supported_ids = MovieListBase().supported_ids
+            index = self._index(session)
+            matches = [self._lookup(index, entry, supported_ids) for entry in entries]
+            movies = self._load_movies(session, matches)
+            return [movies[match].to_entry() if match is not None else None for match in matches]
+
 
 class PluginMovieList(object):
     """Remove all accepted elements from your trakt.tv watchlist/library/seen or custom list."""
@@ -251,6 +353,17 @@ class PluginMovieList(object):
         return list(MovieList(config))
 
 
+def invalidate_indexes(session, flush_context):
+    """Drops the list indexes when movies or lists are changed in `session`."""
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (MovieListList, MovieListMovie, MovieListID)):
+            list_indexes.clear()
+            return
+
+
+sqlalchemy_event.listen(Session, 'after_flush', invalidate_indexes)
+
+
 @event('plugin.register')
 def register_plugin():
     plugin.register(PluginMovieList, 'movie_list', api_ver=2, interfaces=['task', 'list'])
@@ -15,7 +15,7 @@ from flexget.db_schema import versioned_base
 from flexget.entry import Entry
 from flexget.event import event
 from flexget.manager import Session
-from flexget.utils.database import entry_synonym, with_session
+from flexget.utils.database import entry_synonym, with_session, entry_lookup, lookup_entry
 
 plugin_name = 'pending_list'
 log = logging.getLogger(plugin_name)
@@ -95,6 +95,12 @@ class PendingListSet(MutableSet):
             query = query.filter(PendingListEntry.approved == True)
         return query.first()
 
+    def _entry_lookup(self, session, entries, approved=None):
+        criteria = [PendingListEntry.list_id == self._db_list(session).id]
+        if approved:
+            criteria.append(PendingListEntry.approved == True)
+        return entry_lookup(session, PendingListEntry, entries, *criteria)
+
     def __iter__(self):
         with Session() as session:
             for e in self._db_list(session).entries.filter(PendingListEntry.approved == True).order_by(
@@ -137,8 +143,39 @@ class PendingListSet(MutableSet):
         # Make sure lazy lookups are done before opening our session to prevent db locks
         for value in other:
             value.values()
-        for value in other:
-            self.add(value)
+        with Session() as session:
+            list_id = self._db_list(session).id
+            by_title, by_url = self._entry_lookup(session, other)
+            for value in other:
+                stored_entry = lookup_entry((by_title, by_url), value)
+                if stored_entry:
+                    # Refresh all the fields if we already have this entry
+                    log.debug('refreshing entry %s', value)
+                    stored_entry.entry = value
+                    continue
+                log.debug('adding entry %s to list %s', value, self.config)
+                stored_entry = PendingListEntry(entry=value, pending_list_id=list_id)
+                session.add(stored_entry)
+                by_title.setdefault(stored_entry.title, []).append(stored_entry)
+                by_url.setdefault(stored_entry.original_url, []).append(stored_entry)
+        return self
+
+    def __isub__(self, other):
+        if other is self:
+            self.clear()
+            return self
+        # Optimization to only open one session when removing multiple items
+        with Session() as session:
+            by_title, by_url = self._entry_lookup(session, other)
+            for value in other:
+                db_entry = lookup_entry((by_title, by_url), value)
+                if not db_entry:
+                    continue
+                log.debug('deleting entry %s', db_entry)
+                session.delete(db_entry)
+                by_title[db_entry.title].remove(db_entry)
+                if db_entry.original_url:
+                    by_url[db_entry.original_url].remove(db_entry)
         return self
 
     @property
@@ -159,6 +196,13 @@ class PendingListSet(MutableSet):
             match = self._entry_query(session=session, entry=entry, approved=True)
             return Entry(match.entry) if match else None
 
+    def get_many(self, entries):
+        """Same as :meth:`get` for each of `entries`, but resolved with a few queries in one session."""
+        with Session() as session:
+            lookup = self._entry_lookup(session, entries, approved=True)
+            matches = [lookup_entry(lookup, entry) for entry in entries]
+            return [Entry(match.entry) if match else None for match in matches]
+
 
 class PendingList(object):
     schema = {'type': 'string'}
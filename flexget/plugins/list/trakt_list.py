@@ -80,6 +80,10 @@ field_maps = {
 }
 
 
+# Identifier fields used by the show and movie matching, items are indexed by these
+INDEX_FIELDS = ['series_name', 'trakt_show_id', 'tmdb_id', 'tvdb_id', 'imdb_id', 'tvrage_id', 'trakt_movie_id']
+
+
 class TraktSet(MutableSet):
 
     @property
@@ -111,6 +115,7 @@ class TraktSet(MutableSet):
         # Lists may not have modified results if modified then accessed in quick succession.
         self.session.add_domain_limiter(TimedLimiter('trakt.tv', '2 seconds'))
         self._items = None
+        self._index = None
 
     def __iter__(self):
         return iter(self.items)
@@ -132,15 +137,38 @@ class TraktSet(MutableSet):
         # Optimization to submit multiple entries at same time
         self.submit(entries, remove=True)
 
+    def _item_matches(self, entry, item):
+        if self.config['type'] in ['episodes', 'auto'] and self.episode_match(entry, item):
+            return True
+        if self.config['type'] in ['seasons', 'auto'] and self.season_match(entry, item):
+            return True
+        if self.config['type'] in ['shows', 'auto'] and self.show_match(entry, item):
+            return True
+        if self.config['type'] in ['movies', 'auto'] and self.movie_match(entry, item):
+            return True
+        return False
+
     def _find_entry(self, entry):
         for item in self.items:
-            if self.config['type'] in ['episodes', 'auto'] and self.episode_match(entry, item):
+            if self._item_matches(entry, item):
                 return item
-            if self.config['type'] in ['seasons', 'auto'] and self.season_match(entry, item):
-                return item
-            if self.config['type'] in ['shows', 'auto'] and self.show_match(entry, item):
-                return item
-            if self.config['type'] in ['movies', 'auto'] and self.movie_match(entry, item):
+
+    def _find_entry_indexed(self, entry):
+        """Same as :meth:`_find_entry`, but only checks the items sharing an identifier with `entry`."""
+        index = self.index
+        candidates = set()
+        try:
+            for field in INDEX_FIELDS:
+                if entry.get(field) is not None:
+                    candidates.update(index.get((field, entry[field]), ()))
+            if entry.get('movie_name'):
+                candidates.update(index.get(('movie', (entry['movie_name'], entry.get('movie_year'))), ()))
+        except TypeError:
+            # Unhashable identifier, cannot use the index
+            return self._find_entry(entry)
+        for position in sorted(candidates):
+            item = self.items[position]
+            if self._item_matches(entry, item):
                 return item
 
     def __contains__(self, entry):
@@ -155,6 +183,10 @@ class TraktSet(MutableSet):
     def get(self, entry):
         return self._find_entry(entry)
 
+    def get_many(self, entries):
+        """Same as :meth:`get` for each of `entries`, looked up from an index over the retrieved list."""
+        return [self._find_entry_indexed(entry) for entry in entries]
+
     # -- Public interface ends here -- #
 
     @property
@@ -244,6 +276,23 @@ class TraktSet(MutableSet):
             self._items = entries
         return self._items
 
+    @property
+    def index(self):
+        """Maps (field, value) of every identifier in the retrieved list to the positions of the items having it."""
+        items = self.items
+        if self._index is None or self._index[0] is not items:
+            index = {}
+            for position, item in enumerate(items):
+                keys = [(field, item[field]) for field in INDEX_FIELDS if item.get(field) is not None]
+                keys.append(('movie', (item.get('movie_name'), item.get('movie_year'))))
+                for key in keys:
+                    try:
+                        index.setdefault(key, []).append(position)
+                    except TypeError:
+                        log.debug('Cannot index %s of %s', key[0], item['title'])
+            self._index = (items, index)
+        return self._index[1]
+
     def invalidate_cache(self):
         self._items = None
 
@@ -6,6 +6,7 @@ from difflib import SequenceMatcher
 
 from flexget import plugin
 from flexget.event import event
+from flexget.utils.search import run_search
 
 log = logging.getLogger('urlrewrite_search')
 
@@ -59,7 +60,7 @@ class PluginSearch(object):
                 log.verbose('Searching `%s` from %s' % (entry['title'], name))
                 try:
                     try:
-                        results = plugins[name].search(task=task, entry=entry, config=search_config)
+                        results = run_search(plugins[name], task, entry, search_config)
                     except TypeError:
                         # Old search api did not take task argument
                         log.warning('Search plugin %s does not support latest search api.' % name)
@@ -1,11 +1,12 @@
 from __future__ import unicode_literals, division, absolute_import
 import logging
 import datetime
+import math
 from datetime import timedelta
 
-from flexget.utils.database import with_session
-from flexget.utils.sqlalchemy_utils import create_index
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, select, func, Index
+from flexget.utils.database import with_session, json_synonym
+from flexget.utils.sqlalchemy_utils import create_index, table_add_column
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, Unicode, select, func, Index
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.schema import ForeignKey
 from sqlalchemy.orm import relation
@@ -16,7 +17,10 @@ from flexget.event import event
 from flexget.manager import Session
 
 log = logging.getLogger('status')
-Base = db_schema.versioned_base('status', 2)
+Base = db_schema.versioned_base('status', 3)
+
+# Number of most recent executions the rolling summary statistics are calculated from
+SUMMARY_WINDOW = 100
 
 
 @db_schema.upgrade('status')
@@ -25,14 +29,26 @@ def upgrade(ver, session):
         # Creates the executions table index
         create_index('status_execution', session, 'task_id', 'start', 'end', 'succeeded')
         ver = 2
+    if ver < 3:
+        table_add_column('status_execution', 'phases', Unicode, session)
+        ver = 3
     return ver
 
 
+def percentile(values, percent):
+    """Nearest rank percentile of `values`, None if there are no values."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(int(math.ceil(percent / 100.0 * len(values))) - 1, 0)]
+
+
 class StatusTask(Base):
     __tablename__ = 'status_task'
     id = Column(Integer, primary_key=True)
     name = Column('task', String)
     executions = relation('TaskExecution', backref='task', cascade='all, delete, delete-orphan', lazy='dynamic')
+    summary = relation('StatusSummary', uselist=False, cascade='all, delete, delete-orphan', lazy='joined')
 
     def __repr__(self):
         return '<StatusTask(id=%s,name=%s)>' % (self.id, self.name)
@@ -52,7 +68,8 @@ class StatusTask(Base):
         return {
             'id': self.id,
             'name': self.name,
-            'last_execution_time': self.last_execution_time
+            'last_execution_time': self.last_execution_time,
+            'summary': self.summary.to_dict() if self.summary else None
         }
 
 
@@ -70,6 +87,9 @@ class TaskExecution(Base):
     rejected = Column(Integer)
     failed = Column(Integer)
     abort_reason = Column(String, nullable=True)
+    # Seconds spent in and entry counts after each phase
+    _phases = Column('phases', Unicode)
+    phases = json_synonym('_phases')
 
     def __repr__(self):
         return ('<TaskExecution(task_id=%s,start=%s,end=%s,succeeded=%s,p=%s,a=%s,r=%s,f=%s,reason=%s)>' %
@@ -87,7 +107,72 @@ class TaskExecution(Base):
             'accepted': self.accepted,
             'rejected': self.rejected,
             'failed': self.failed,
-            'abort_reason': self.abort_reason
+            'abort_reason': self.abort_reason,
+            'phases': self.phases if self._phases else {}
+        }
+
+    @property
+    def duration(self):
+        if not self.start or not self.end:
+            return None
+        return (self.end - self.start).total_seconds()
+
+
+class StatusSummary(Base):
+    """Rolling statistics over the last `SUMMARY_WINDOW` executions of a task, updated after every execution."""
+
+    __tablename__ = 'status_summary'
+    id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, ForeignKey('status_task.id'), unique=True)
+
+    executions = Column(Integer, default=0)
+    failures = Column(Integer, default=0)
+    last_execution_id = Column(Integer)
+    p50_duration = Column(Float)
+    p95_duration = Column(Float)
+    error_rate = Column(Float)
+    # List of [duration, succeeded, phase durations] of the recent executions, oldest first
+    _recent = Column('recent', Unicode)
+    recent = json_synonym('_recent')
+
+    def __repr__(self):
+        return '<StatusSummary(task_id=%s,executions=%s,p50=%s,p95=%s,error_rate=%s)>' % (
+            self.task_id, self.executions, self.p50_duration, self.p95_duration, self.error_rate)
+
+    def add_executions(self, executions):
+        """Adds finished executions, oldest first, to the summary."""
+        recent = self.recent if self._recent else []
+        for execution in executions:
+            phases = dict((phase, stats['seconds']) for phase, stats in execution.phases.items()) \
+                if execution._phases else {}
+            recent.append([execution.duration, bool(execution.succeeded), phases])
+            self.executions = (self.executions or 0) + 1
+            self.failures = (self.failures or 0) + (not execution.succeeded)
+            self.last_execution_id = execution.id
+        recent = recent[-SUMMARY_WINDOW:]
+        durations = [duration for duration, _, _ in recent if duration is not None]
+        self.p50_duration = percentile(durations, 50)
+        self.p95_duration = percentile(durations, 95)
+        self.error_rate = sum(1 for _, succeeded, _ in recent if not succeeded) / len(recent) if recent else None
+        self.recent = recent
+
+    def phase_durations(self):
+        """Returns p50 and p95 of the seconds spent in each phase over the recent executions."""
+        durations = {}
+        for _, _, phases in self.recent if self._recent else []:
+            for phase, seconds in phases.items():
+                durations.setdefault(phase, []).append(seconds)
+        return dict((phase, {'p50': percentile(values, 50), 'p95': percentile(values, 95)})
+                    for phase, values in durations.items())
+
+    def to_dict(self):
+        return {
+            'executions': self.executions,
+            'failures': self.failures,
+            'p50_duration': self.p50_duration,
+            'p95_duration': self.p95_duration,
+            'error_rate': self.error_rate,
+            'phases': self.phase_durations()
         }
 
 
@@ -116,16 +201,6 @@ class Status(object):
         self.execution.start = datetime.datetime.now()
         self.execution.task = st
 
-    @plugin.priority(-255)
-    def on_task_input(self, task, config):
-        self.execution.produced = len(task.entries)
-
-    @plugin.priority(-255)
-    def on_task_output(self, task, config):
-        self.execution.accepted = len(task.accepted)
-        self.execution.rejected = len(task.rejected)
-        self.execution.failed = len(task.failed)
-
     def on_task_exit(self, task, config):
         with Session() as session:
             if self.execution is None:
@@ -134,11 +209,40 @@ class Status(object):
                 self.execution.succeeded = False
                 self.execution.abort_reason = task.abort_reason
             self.execution.end = datetime.datetime.now()
-            session.merge(self.execution)
+            # Entry counts come from the counts the task takes after each phase
+            phases = task.phase_stats
+            if 'input' in phases:
+                self.execution.produced = sum(phases['input'][state] for state in
+                                              ('undecided', 'accepted', 'rejected', 'failed'))
+            if 'output' in phases:
+                self.execution.accepted = phases['output']['accepted']
+                self.execution.rejected = phases['output']['rejected']
+                self.execution.failed = phases['output']['failed']
+            self.execution.phases = dict((phase, dict(stats, seconds=round(stats['seconds'], 3)))
+                                         for phase, stats in phases.items())
+            execution = session.merge(self.execution)
+            session.flush()
+            update_summary(execution, session=session)
+            self.execution = None
 
     on_task_abort = on_task_exit
 
 
+@with_session
+def update_summary(execution, session=None):
+    """Adds a finished execution to the rolling summary of its task."""
+    summary = session.query(StatusSummary).filter(StatusSummary.task_id == execution.task_id).first()
+    if not summary:
+        summary = StatusSummary(task_id=execution.task_id)
+        session.add(summary)
+        # Start from the executions recorded before the summaries existed
+        history = session.query(TaskExecution).filter(TaskExecution.task_id == execution.task_id). \
+            filter(TaskExecution.id != execution.id).filter(TaskExecution.end != None). \
+            order_by(TaskExecution.start.desc()).limit(SUMMARY_WINDOW - 1).all()  # noqa
+        summary.add_executions(reversed(history))
+    summary.add_executions([execution])
+
+
 @event('manager.db_cleanup')
 def db_cleanup(manager, session):
     # Purge all status data for non existing tasks
@@ -147,6 +251,10 @@ def db_cleanup(manager, session):
             log.verbose('Purging obsolete status data for task %s', status_task.name)
             session.delete(status_task)
 
+    # Drop summaries of tasks which are gone
+    session.query(StatusSummary).filter(~StatusSummary.task_id.in_(session.query(StatusTask.id))). \
+        delete(synchronize_session=False)
+
     # Purge task executions older than 1 year
     result = session.query(TaskExecution).filter(
         TaskExecution.start < datetime.datetime.now() - timedelta(days=365)).delete()
@@ -163,13 +271,36 @@ def register_plugin():
 def get_status_tasks(start=None, stop=None, order_by='last_execution_time', descending=True, session=None):
     log.debug('querying status tasks: start=%s, stop=%s, order_by=%s, descending=%s', start, stop, order_by, descending)
     query = session.query(StatusTask)
+    if hasattr(StatusTask, order_by):
+        order = getattr(StatusTask, order_by)
+    else:
+        # Summary statistics
+        query = query.outerjoin(StatusSummary, StatusSummary.task_id == StatusTask.id)
+        order = getattr(StatusSummary, order_by)
     if descending:
-        query = query.order_by(getattr(StatusTask, order_by).desc())
+        query = query.order_by(order.desc())
     else:
-        query = query.order_by(getattr(StatusTask, order_by))
+        query = query.order_by(order)
     return query.slice(start, stop).all()
 
 
+@with_session
+def get_last_executions(status_tasks, session=None):
+    """Returns a dict mapping status task ids to their last executions, fetched with a single query."""
+    by_id = {}
+    last_ids = [st.summary.last_execution_id for st in status_tasks if st.summary]
+    if last_ids:
+        for execution in session.query(TaskExecution).filter(TaskExecution.id.in_(last_ids)):
+            by_id[execution.task_id] = execution
+    for st in status_tasks:
+        if st.id not in by_id:
+            # Tasks which have not run since the summaries were added
+            execution = st.executions.order_by(TaskExecution.start.desc()).first()
+            if execution:
+                by_id[st.id] = execution
+    return by_id
+
+
 @with_session
 def get_executions_by_task_id(task_id, start=None, stop=None, order_by='start', descending=True,
                               succeeded=None, produced=True, start_date=None, end_date=None, session=None):
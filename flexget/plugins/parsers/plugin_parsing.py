@@ -60,6 +60,10 @@ class PluginParsing(object):
 
     on_task_abort = on_task_exit
 
+    def selected_parser(self, parser_type):
+        """Name of the parser currently used for `parser_type`."""
+        return selected_parsers.get(parser_type) or default_parsers.get(parser_type)
+
     def parse_series(self, data, name=None, **kwargs):
         """
         Use the selected series parser to parse series information from `data`
@@ -81,6 +81,9 @@ class UrlRewriteIPTorrents(object):
           TV-Packs-Non-English, TV-SD-x264, TV-x264, TV-x265, TV-XVID, TV-Web-DL
     """
 
+    # search only uses the entry and config given to it, so search strings can be searched at the same time
+    concurrent_search = True
+
     schema = {
         'type': 'object',
         'properties': {
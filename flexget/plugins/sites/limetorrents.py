@@ -18,6 +18,9 @@ class Limetorrents(object):
         Limetorrents search plugin.
     """
 
+    # search only uses the entry and config given to it, so search strings can be searched at the same time
+    concurrent_search = True
+
     schema = {
         'oneOf': [
             {'type': 'boolean'},
@@ -25,6 +25,9 @@ FILTERS = ['all', 'filter remakes', 'trusted only']
 class UrlRewriteNyaa(object):
     """Nyaa urlrewriter and search plugin."""
 
+    # search only uses the entry and config given to it, so search strings can be searched at the same time
+    concurrent_search = True
+
     schema = {
         'oneOf': [
             {'type': 'string', 'enum': list(CATEGORIES)},
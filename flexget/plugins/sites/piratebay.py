@@ -9,7 +9,7 @@ from flexget import plugin
 from flexget.entry import Entry
 from flexget.event import event
 from flexget.plugins.internal.urlrewriting import UrlRewritingError
-from flexget.utils.soup import get_soup
+from flexget.utils.soup import extract
 from flexget.utils.search import torrent_availability, normalize_unicode
 from flexget.utils.tools import parse_filesize
 
@@ -41,6 +41,9 @@ SORT = {
 class UrlRewritePirateBay(object):
     """PirateBay urlrewriter."""
 
+    # search only uses the entry and config given to it, so search strings can be searched at the same time
+    concurrent_search = True
+
     schema = {
         'oneOf': [
             {'type': 'boolean'},
@@ -109,12 +112,11 @@ class UrlRewritePirateBay(object):
     def parse_download_page(self, url, requests):
         page = requests.get(url).content
         try:
-            soup = get_soup(page)
-            tag_div = soup.find('div', attrs={'class': 'download'})
-            if not tag_div:
+            links = extract(page, 'div.download a', site='piratebay',
+                            parse_only={'name': 'div', 'attrs': {'class': 'download'}})
+            if not links:
                 raise UrlRewritingError('Unable to locate download link from url %s' % url)
-            tag_a = tag_div.find('a')
-            torrent_url = tag_a.get('href')
+            torrent_url = links[0].get('href')
             # URL is sometimes missing the schema
             if torrent_url.startswith('//'):
                 torrent_url = 'http:' + torrent_url
@@ -150,8 +152,10 @@ class UrlRewritePirateBay(object):
             url = '%s/search/%s%s' % (self.url, quote(query.encode('utf-8')), filter_url)
             log.debug('Using %s as piratebay search url' % url)
             page = task.requests.get(url).content
-            soup = get_soup(page)
-            for link in soup.find_all('a', attrs={'class': 'detLink'}):
+            # Only the results table is needed from the page
+            links = extract(page, 'a.detLink', site='piratebay',
+                            parse_only={'name': 'table', 'attrs': {'id': 'searchResult'}})
+            for link in links:
                 entry = Entry()
                 entry['title'] = self.extract_title(link)
                 if not entry['title']:
@@ -22,6 +22,9 @@ class Site1337x(object):
         1337x search plugin.
     """
 
+    # search only uses the entry and config given to it, so search strings can be searched at the same time
+    concurrent_search = True
+
     schema = {
         'oneOf': [
             {'type': 'boolean'},
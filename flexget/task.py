@@ -7,6 +7,7 @@ import logging
 import threading
 import random
 import string
+import time
 from functools import wraps, total_ordering
 
 from sqlalchemy import Column, Integer, String, Unicode
@@ -135,6 +136,13 @@ class EntryContainer(list):
     failed = property(lambda self: self._failed)
     undecided = property(lambda self: self._undecided)
 
+    def state_counts(self):
+        """Returns a dict with the number of entries in each state, counted in a single pass."""
+        counts = {'undecided': 0, 'accepted': 0, 'rejected': 0, 'failed': 0}
+        for entry in self:
+            counts[entry.state] += 1
+        return counts
+
     def __repr__(self):
         return '<EntryContainer(%s)>' % list.__repr__(self)
 
@@ -247,7 +255,7 @@ class Task(object):
 
         self.session = None
 
-        self.requests = requests.Session()
+        self.requests = requests.Session(shared_pool=True)
 
         # List of all entries in the task
         self._all_entries = EntryContainer()
@@ -259,6 +267,9 @@ class Task(object):
         self.current_phase = None
         self.current_plugin = None
 
+        # Seconds spent in and entry state counts after each phase of the current execution, reruns add up
+        self.phase_stats = {}
+
     @property
     def max_reruns(self):
         """How many times task can be rerunned before stopping"""
@@ -429,10 +440,24 @@ class Task(object):
                         else:
                             log.warning('Task doesn\'t have any %s plugins, you should add (at least) one!' % phase)
 
+        started = time.time()
+        try:
+            if not self.__run_phase_plugins(phase):
+                return
+        finally:
+            stats = self.phase_stats.setdefault(phase, {'seconds': 0})
+            stats['seconds'] += time.time() - started
+            stats.update(self._all_entries.state_counts())
+        # check config hash for changes at the end of 'prepare' phase
+        if phase == 'prepare':
+            self.check_config_hash()
+
+    def __run_phase_plugins(self, phase):
+        """:return: False if the phase was disabled by one of the plugins"""
         for plugin in self.plugins(phase):
             # Abort this phase if one of the plugins disables it
             if phase in self.disabled_phases:
-                return
+                return False
             # store execute info, except during entry events
             self.current_phase = phase
             self.current_plugin = plugin.name
@@ -459,9 +484,7 @@ class Task(object):
                 finally:
                     fire_event('task.execute.after_plugin', self, plugin.name)
                 self.session = None
-        # check config hash for changes at the end of 'prepare' phase
-        if phase == 'prepare':
-            self.check_config_hash()
+        return True
 
     def __run_plugin(self, plugin, phase, args=None, kwargs=None):
         """
@@ -637,6 +660,7 @@ class Task(object):
 
         try:
             self.finished_event.clear()
+            self.phase_stats = {}
             if self.options.cron:
                 self.manager.db_cleanup()
             fire_event('task.execute.started', self)
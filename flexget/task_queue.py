@@ -10,6 +10,7 @@ import time
 from sqlalchemy.exc import ProgrammingError, OperationalError
 
 from flexget.task import TaskAbort
+from flexget.utils import metrics
 
 log = logging.getLogger('task_queue')
 
@@ -44,17 +45,26 @@ class TaskQueue(object):
                 if self._shutdown_when_finished:
                     self._shutdown_now = True
                 continue
+            started = time.time()
+            if metrics.enabled and getattr(self.current_task, 'queued_at', None):
+                metrics.task_queue_wait.observe(started - self.current_task.queued_at)
+            status = 'succeeded'
             try:
                 self.current_task.execute()
             except TaskAbort as e:
+                status = 'aborted'
                 log.debug('task %s aborted: %r' % (self.current_task.name, e))
             except (ProgrammingError, OperationalError):
+                status = 'error'
                 log.critical('Database error while running a task. Attempting to recover.')
                 self.current_task.manager.crash_report()
             except Exception:
+                status = 'error'
                 log.critical('BUG: Unhandled exception during task queue run loop.')
                 self.current_task.manager.crash_report()
             finally:
+                if metrics.enabled:
+                    metrics.observe_task(self.current_task, time.time() - started, status)
                 self.run_queue.task_done()
                 self.current_task = None
 
@@ -69,6 +79,7 @@ class TaskQueue(object):
 
     def put(self, task):
         """Adds a task to be executed to the queue."""
+        task.queued_at = time.time()
         self.run_queue.put(task)
 
     def __len__(self):
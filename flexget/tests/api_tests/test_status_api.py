@@ -321,3 +321,40 @@ class TestTaskStatusPagination(object):
         data = json.loads(rsp.get_data(as_text=True))
 
         assert data[0]['produced'] == 10
+
+
+class TestStatusSummary(object):
+    config = """
+        tasks:
+          status task:
+            mock:
+              - {title: 'one'}
+              - {title: 'two'}
+            accept_all: yes
+            disable: seen
+    """
+
+    def test_summary(self, api_client, execute_task, schema_match):
+        execute_task('status task')
+        execute_task('status task')
+
+        rsp = api_client.get('/status/?sort_by=p95_duration')
+        assert rsp.status_code == 200
+        data = json.loads(rsp.get_data(as_text=True))
+
+        errors = schema_match(OC.task_status_list_schema, data)
+        assert not errors
+
+        assert len(data) == 1
+        summary = data[0]['summary']
+        assert summary['executions'] == 2
+        assert summary['failures'] == 0
+        assert summary['error_rate'] == 0
+        assert summary['p50_duration'] <= summary['p95_duration']
+        assert 'input' in summary['phases']
+
+        execution = data[0]['last_execution']
+        assert execution['produced'] == 2
+        assert execution['accepted'] == 2
+        assert execution['phases']['input']['undecided'] == 2
+        assert execution['phases']['filter']['accepted'] == 2
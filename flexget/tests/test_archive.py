@@ -0,0 +1,106 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import pytest
+from sqlalchemy import text
+
+from flexget.manager import Session
+from flexget.plugins.generic import archive
+from flexget.plugins.generic.archive import (ArchiveEntry, ArchiveIndexState, get_index_state, rebuild_index, search,
+                                            unindex_entries)
+
+
+class TestArchiveSearch(object):
+    config = """
+        tasks:
+          learn:
+            mock:
+              - {title: 'Some.Show.S01E01.720p.HDTV-FlexGet', url: 'http://localhost/1'}
+              - {title: 'Some.Show.S01E02.720p.HDTV-FlexGet', url: 'http://localhost/2'}
+              - {title: 'Other.Show.S01E01.1080p.WEB-DL-Group', url: 'http://localhost/3'}
+              - {title: 'Awesome Some Show Documentary', url: 'http://localhost/4'}
+            accept_all: yes
+            archive:
+              - tv
+          learn_movies:
+            mock:
+              - {title: 'Some.Movie.2010.720p.BluRay-Group', url: 'http://localhost/5'}
+            accept_all: yes
+            archive:
+              - movies
+    """
+
+    @pytest.fixture(params=[archive.FTS5, archive.TRIGRAM])
+    def backend(self, request, monkeypatch):
+        if request.param == archive.TRIGRAM:
+            monkeypatch.setattr(archive, '_create_fts5', lambda session: False)
+        return request.param
+
+    def titles(self, text, **kwargs):
+        with Session() as session:
+            return sorted(entry.title for entry in search(session, text, **kwargs))
+
+    def test_search(self, execute_task, backend):
+        execute_task('learn')
+        execute_task('learn_movies')
+        with Session() as session:
+            state = get_index_state(session)
+            if backend == archive.FTS5 and state.backend != archive.FTS5:
+                pytest.skip('SQLite without FTS5 trigram tokenizer')
+            assert state.backend == backend
+            assert state.built
+
+        assert self.titles('some show') == ['Some.Show.S01E01.720p.HDTV-FlexGet', 'Some.Show.S01E02.720p.HDTV-FlexGet']
+        assert self.titles('show s01e01') == []
+        assert self.titles('other.show.s01e01') == ['Other.Show.S01E01.1080p.WEB-DL-Group']
+        assert self.titles('some', sources=['learn_movies']) == ['Some.Movie.2010.720p.BluRay-Group']
+        assert self.titles('some', tags=['tv']) == ['Some.Show.S01E01.720p.HDTV-FlexGet',
+                                                    'Some.Show.S01E02.720p.HDTV-FlexGet']
+        # Words too short for the index are searched without it
+        assert self.titles('so') == ['Some.Movie.2010.720p.BluRay-Group', 'Some.Show.S01E01.720p.HDTV-FlexGet',
+                                     'Some.Show.S01E02.720p.HDTV-FlexGet']
+        # Best match first
+        with Session() as session:
+            ranked = [entry.title for entry in search(session, 'some show s01e02', rank=True)]
+        assert ranked == ['Some.Show.S01E02.720p.HDTV-FlexGet']
+
+    def test_reindex(self, execute_task, backend):
+        execute_task('learn')
+        with Session() as session:
+            # Archive from before the index existed
+            session.query(ArchiveIndexState).delete()
+            if backend == archive.TRIGRAM:
+                session.execute(archive.archive_trigrams_table.delete())
+        with Session() as session:
+            state = get_index_state(session)
+            assert not state.built
+        # Searching works without an index
+        assert len(self.titles('some show')) == 2
+
+        with Session() as session:
+            rebuild_index(session)
+        with Session() as session:
+            assert get_index_state(session).built
+            assert session.query(ArchiveEntry).count() == 4
+        assert len(self.titles('some show')) == 2
+        assert self.titles('awesome some') == ['Awesome Some Show Documentary']
+
+    def test_unindex(self, execute_task, backend):
+        execute_task('learn')
+        with Session() as session:
+            if backend == archive.FTS5 and get_index_state(session).backend != archive.FTS5:
+                pytest.skip('SQLite without FTS5 trigram tokenizer')
+            removed = session.query(ArchiveEntry).filter(ArchiveEntry.title.like('Awesome%')).one()
+            removed_id = removed.id
+            unindex_entries(session, [removed])
+            session.query(ArchiveEntry).filter(ArchiveEntry.id == removed_id).delete()
+        with Session() as session:
+            # No index rows are left behind, they would match new entries reusing the deleted id
+            if backend == archive.FTS5:
+                indexed = session.execute(text("SELECT rowid FROM %s WHERE %s MATCH 'awesome'" %
+                                               (archive.FTS_TABLE, archive.FTS_TABLE))).fetchall()
+            else:
+                indexed = session.execute(archive.archive_trigrams_table.select().where(
+                    archive.archive_trigrams_table.c.entry_id == removed_id)).fetchall()
+            assert indexed == []
+        assert len(self.titles('some show')) == 2
@@ -5,9 +5,10 @@ from datetime import timedelta
 
 import pytest
 
-from flexget.utils.cached_input import cached
+from flexget.utils.cached_input import cached, freeze_entries, thaw_entries, InputCache, InputCacheEntry
 from flexget import plugin
 from flexget.entry import Entry
+from flexget.manager import Session
 
 
 class InputPersist(object):
@@ -23,7 +24,18 @@ class InputPersist(object):
         return [Entry(title='Test', url='http://test.com')]
 
 
+class InputChanging(object):
+    """Fake input plugin which emits whatever is in `entries`."""
+
+    entries = []
+
+    @cached('test_changing_input', persist='5 minutes')
+    def on_task_input(self, task, config):
+        return [Entry(e) for e in self.entries]
+
+
 plugin.register(InputPersist, 'test_input', api_ver=2)
+plugin.register(InputChanging, 'test_changing_input', api_ver=2)
 
 
 @pytest.mark.filecopy('rss.xml', '__tmp__/cached.xml')
@@ -36,6 +48,8 @@ class TestInputCache(object):
               url: __tmp__/cached.xml
           test_db:
             test_input: True
+          test_db_diff:
+            test_changing_input: True
     """
 
     def test_memory_cache(self, execute_task, tmpdir):
@@ -58,3 +72,56 @@ class TestInputCache(object):
         assert task.entries, 'should have created entries at the start'
         task = execute_task('test_db')
         assert task.entries, 'should have created entries from the cache'
+
+    def test_db_cache_diff(self, execute_task):
+        """Test only changed entries are rewritten to the db cache"""
+        InputChanging.entries = [
+            {'title': 'A', 'url': 'http://a.com'},
+            {'title': 'B', 'url': 'http://b.com'},
+        ]
+        execute_task('test_db_diff', options={'nocache': True})
+        with Session() as session:
+            rows = dict((e.entry['title'], e.id) for e in session.query(InputCacheEntry))
+        assert set(rows) == set(['A', 'B'])
+
+        InputChanging.entries = [
+            {'title': 'A', 'url': 'http://a.com'},
+            {'title': 'C', 'url': 'http://c.com'},
+        ]
+        execute_task('test_db_diff', options={'nocache': True})
+        with Session() as session:
+            assert session.query(InputCache).count() == 1
+            new_rows = dict((e.entry['title'], e.id) for e in session.query(InputCacheEntry))
+        assert set(new_rows) == set(['A', 'C'])
+        assert new_rows['A'] == rows['A'], 'unchanged entry should not have been rewritten'
+
+
+class TestFrozenEntries(object):
+    def test_thawed_entries_are_independent(self):
+        entry = Entry(title='Test', url='http://test.com', genres=['drama'], info={'a': 1})
+        frozen = freeze_entries([entry])
+        entry['genres'].append('changed after freeze')
+        first = thaw_entries(frozen)[0]
+        first['genres'].append('comedy')
+        first['info']['a'] = 2
+        first['title'] = 'Changed'
+        second = thaw_entries(frozen)[0]
+        assert second['title'] == 'Test'
+        assert second['genres'] == ['drama']
+        assert second['info'] == {'a': 1}
+
+    def test_lazy_fields_survive(self):
+        calls = []
+
+        def lazy_func(entry):
+            calls.append(entry)
+            entry['lazy_field'] = 'value'
+
+        entry = Entry(title='Test', url='http://test.com')
+        entry.register_lazy_func(lazy_func, ['lazy_field'])
+        frozen = freeze_entries([entry])
+        thawed = thaw_entries(frozen)[0]
+        assert thawed.is_lazy('lazy_field')
+        assert thawed['lazy_field'] == 'value'
+        assert calls == [thawed]
+        assert entry.is_lazy('lazy_field'), 'original entry should not have been evaluated'
@@ -1,6 +1,9 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+from flexget.entry import Entry
+from flexget.plugins.filter.if_condition import FilterIf
+
 
 class TestCondition(object):
     config = """
@@ -67,6 +70,16 @@ class TestCondition(object):
         assert entry
         assert len(task.accepted) == 1
 
+    def test_lazy_field(self, manager):
+        def lazy_func(entry):
+            entry['lazy_field'] = 5
+
+        entry = Entry(title='test', url='')
+        entry.register_lazy_func(lazy_func, ['lazy_field'])
+        assert FilterIf().check_condition('lazy_field > 4', entry)
+        assert not entry.is_lazy('lazy_field'), 'lookup should have populated the entry itself'
+        assert not FilterIf().check_condition('lazy_field > 5', entry)
+
 
 class TestQualityCondition(object):
     config = """
@@ -1,6 +1,9 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+from flexget.entry import Entry
+from flexget.plugins.filter.crossmatch import CrossMatch, FieldIndex
+
 
 class TestCrossmatch(object):
     config = """
@@ -15,9 +18,79 @@ class TestCrossmatch(object):
                 - title: entry 2
               action: reject
               fields: [title]
+          test_substring:
+            mock:
+            - title: Some Show S01E01 720p
+            - title: Other
+            - title: Unrelated
+            crossmatch:
+              from:
+              - mock:
+                - title: Some Show
+                - title: Other Show
+              action: reject
+              fields: [title]
+              exact: no
+          test_all_fields:
+            mock:
+            - {title: entry 1, url: 'http://a'}
+            - {title: entry 2, url: 'http://b'}
+            crossmatch:
+              from:
+              - mock:
+                - {title: entry 1, url: 'http://a', extra: copied}
+                - {title: entry 2, url: 'http://c'}
+              action: accept
+              fields: [title, url]
+              all_fields: yes
+          test_copied_field:
+            mock:
+            - {title: entry 1}
+            crossmatch:
+              from:
+              - mock:
+                - {title: entry 1, imdb_id: tt0000001}
+                - {title: other, imdb_id: tt0000001, extra: copied}
+              action: accept
+              fields: [title, imdb_id]
     """
 
     def test_reject_title(self, execute_task):
         task = execute_task('test_title')
         assert task.find_entry('rejected', title='entry 2')
         assert len(task.rejected) == 1
+
+    def test_reject_substring(self, execute_task):
+        task = execute_task('test_substring')
+        assert task.find_entry('rejected', title='Some Show S01E01 720p')
+        assert task.find_entry('rejected', title='Other')
+        assert task.find_entry('undecided', title='Unrelated')
+
+    def test_all_fields(self, execute_task):
+        task = execute_task('test_all_fields')
+        assert task.find_entry('accepted', title='entry 1')
+        assert task.find_entry('undecided', title='entry 2')
+        assert task.find_entry('accepted', title='entry 1')['extra'] == 'copied'
+
+    def test_match_on_copied_field(self, execute_task):
+        task = execute_task('test_copied_field')
+        entry = task.find_entry('accepted', title='entry 1')
+        assert entry['imdb_id'] == 'tt0000001'
+        assert entry['extra'] == 'copied', 'second entry should match on the imdb_id copied from the first'
+
+
+class TestFieldIndex(object):
+    values = ['', 'a', 'ab', 'abc', 'bcd', 'abcd', 'Some Show', 'some show', 'Some Show 2017', 5, 5.0, None,
+              ['abc', 'x'], ('abc',)]
+
+    def test_matches_pairwise_comparison(self):
+        generated = [Entry(title='generated %s' % i, url='', field=value) for i, value in enumerate(self.values)]
+        generated.append(Entry(title='no field', url=''))
+        cross = CrossMatch()
+        for exact in (True, False):
+            index = FieldIndex(generated, 'field', exact)
+            for value in self.values:
+                entry = Entry(title='entry', url='', field=value)
+                expected = set(i for i, other in enumerate(generated)
+                               if cross.entry_intersects(entry, other, ['field'], exact))
+                assert index.find(value) == expected, 'mismatch for %r (exact: %s)' % (value, exact)
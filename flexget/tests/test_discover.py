@@ -1,6 +1,7 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import threading
 from datetime import datetime, timedelta
 
 from flexget.entry import Entry
@@ -28,6 +29,22 @@ class SearchPlugin(object):
 plugin.register(SearchPlugin, 'test_search', interfaces=['search'], api_ver=2)
 
 
+class ConcurrentSearchPlugin(object):
+    """Fake search plugin searching every search string at the same time, returns one entry per search string."""
+
+    schema = {}
+    concurrent_search = True
+    searches = []
+
+    def search(self, task, entry, config=None):
+        self.searches.append((entry['search_strings'], threading.current_thread().name))
+        return [Entry(title=search_string, url='http://localhost/%s' % search_string, search_sort=1)
+                for search_string in entry['search_strings']]
+
+
+plugin.register(ConcurrentSearchPlugin, 'test_concurrent_search', interfaces=['search'], api_ver=2)
+
+
 class EstRelease(object):
     """Fake release estimate plugin. Just returns 'est_release' entry field."""
 
@@ -62,6 +79,16 @@ class TestDiscover(object):
                 - title: Foo
               from:
               - test_search: yes
+          test_concurrent:
+            discover:
+              release_estimations: ignore
+              what:
+              - mock:
+                - title: Foo
+                  search_strings: [Foo, Foo 2017, Foo (2017)]
+              from:
+              - test_concurrent_search: yes
+              - test_search: yes
           test_estimates:
             discover:
               interval: 0 seconds
@@ -107,6 +134,16 @@ class TestDiscover(object):
         order = list(e.get('search_sort') for e in task.entries)
         assert order == sorted(order, reverse=True)
 
+    def test_concurrent(self, execute_task, monkeypatch):
+        monkeypatch.setattr(ConcurrentSearchPlugin, 'searches', [])
+        task = execute_task('test_concurrent')
+        assert sorted(e['title'] for e in task.entries) == ['Foo', 'Foo', 'Foo (2017)', 'Foo 2017']
+        assert all(e['discovered_from'] == 'Foo' for e in task.entries)
+        # Each search string was searched separately in a search thread
+        searches = ConcurrentSearchPlugin.searches
+        assert sorted(strings[0] for strings, _ in searches) == ['Foo', 'Foo (2017)', 'Foo 2017']
+        assert all(len(strings) == 1 and thread.startswith('search-') for strings, thread in searches)
+
     def test_interval(self, execute_task, manager):
         task = execute_task('test_interval')
         assert len(task.entries) == 1
@@ -2,9 +2,12 @@ from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import os
+import time
 
 import pytest
 
+from flexget.plugins.filter.exists_series import FilterExistsSeries
+
 
 class TestExistsSeries(object):
     _config = """
@@ -163,3 +166,22 @@ class TestExistsSeries(object):
             'jinja2 s01e01 should have been rejected (exists)'
         assert task.find_entry('accepted', title='jinja s01e02'), \
             'jinja s01e02 should have been accepted'
+
+    def test_new_file_detected(self, execute_task, tmpdir):
+        """Files added between runs must be found even though previous scan results are reused"""
+        task = execute_task('test')
+        assert task.find_entry('accepted', title='Foo.Bar.S01E03.XViD')
+        os.makedirs(tmpdir.join('Foo.Bar.S01E03.XViD').strpath)
+        task = execute_task('test')
+        assert task.find_entry('rejected', title='Foo.Bar.S01E03.XViD'), \
+            'Foo.Bar.S01E03.XViD should have been rejected after it was added'
+
+    def test_parse_cache_large_library(self):
+        """Filling the parse cache for a large library must stay linear"""
+        parse_cache = FilterExistsSeries().parse_cache
+        started = time.time()
+        for number in range(100000):
+            parse_cache[('guessit', 'Foo Bar', 'Foo.Bar.S01E%05d.XViD' % number)] = number
+        assert len(parse_cache) == 100000
+        # Sorting the cache on every insert took minutes here
+        assert time.time() - started < 10
@@ -50,6 +50,12 @@ class TestFilesystem(object):
               path: """ + test1 + """
               recursive: 2
 
+          recursive_threads:
+            filesystem:
+              path: """ + test1 + """
+              recursive: yes
+              threads: 2
+
           retrieve_files:
             filesystem:
               path: """ + test1 + """
@@ -166,6 +172,13 @@ class TestFilesystem(object):
         self.assert_check(task, task_name, 'positive', should_exist)
         self.assert_check(task, task_name, 'negative', should_not_exist)
 
+    def test_recursive_threads(self, execute_task):
+        task = execute_task('recursive_true')
+        expected = [entry['location'] for entry in task.entries]
+        task = execute_task('recursive_threads')
+        assert [entry['location'] for entry in task.entries] == expected, \
+            'scanning in parallel should find the same paths in the same order'
+
     def test_retrieve_files(self, execute_task):
         task_name = 'retrieve_files'
         should_exist = ['file1.mkv', 'file2.txt']
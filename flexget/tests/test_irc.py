@@ -0,0 +1,60 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import copy
+import threading
+
+from flexget.entry import Entry
+from flexget.plugins.daemon import irc
+from flexget.plugins.daemon.irc import IRCConnection, InjectBatch, compile_task_re, route_entries
+
+
+class TestIRCRouting(object):
+    def test_route_entries(self):
+        task_re = compile_task_re([
+            {'task': 'tv', 'patterns': [{'regexp': 'S\\d+E\\d+', 'field': 'title'},
+                                        {'regexp': '^tv$', 'field': 'irc_category'}]},
+            {'task': 'hd', 'patterns': [{'regexp': '1080P', 'field': 'title'}]},
+        ])
+        entries = [
+            Entry(title='Show.S01E01.1080p', url='http://a', irc_category='TV'),
+            Entry(title='Show.S01E02.720p', url='http://b', irc_category='tv'),
+            Entry(title='Movie.2016.1080p', url='http://c', irc_category='movies'),
+            Entry(title='Other', url='http://d'),
+        ]
+        routed = route_entries(task_re, entries)
+        assert [e['url'] for e in routed['tv']] == ['http://a', 'http://b']
+        assert [e['url'] for e in routed['hd']] == ['http://a', 'http://c']
+
+    def test_inject_batch(self):
+        batch = InjectBatch([Entry(title='a', url='http://a')])
+        assert batch.extend_pending([Entry(title='b', url='http://b')])
+        copied = copy.deepcopy(batch)
+        assert [e['title'] for e in copied] == ['a', 'b']
+        assert copied[0] is not batch[0]
+        # Once the task copied the entries, new ones need a new execution
+        assert not batch.extend_pending([Entry(title='c', url='http://c')])
+        assert len(copy.deepcopy(batch)) == 2
+
+    def test_inject_unknown_task(self, monkeypatch):
+        executions = []
+
+        class FakeManager(object):
+            def execute(self, options, priority, suppress_warnings):
+                executions.append(options['inject'])
+                # Task names which don't match any task queue no execution
+                return [] if options['tasks'] == ['removed'] else [(None, None, threading.Event())]
+
+        monkeypatch.setattr(irc, 'manager', FakeManager())
+        # Only the batches are needed, not an irc connection
+        connection = IRCConnection.__new__(IRCConnection)
+        connection.pending_batches = {}
+        connection.inject('removed', [Entry(title='a', url='http://a')])
+        connection.inject('removed', [Entry(title='b', url='http://b')])
+        # Every announcement tries to execute again instead of joining a batch which never runs
+        assert [[e['title'] for e in batch] for batch in executions] == [['a'], ['b']]
+        assert 'removed' not in connection.pending_batches
+
+        connection.inject('tv', [Entry(title='c', url='http://c')])
+        connection.inject('tv', [Entry(title='d', url='http://d')])
+        assert [e['title'] for e in executions[-1]] == ['c', 'd']
@@ -164,6 +164,24 @@ class TestListInterface(object):
             list_match:
               from:
                 - entry_list: test_list
+
+          test_list_add_duplicates:
+            mock:
+              - {title: 'title 1', url: "http://mock.url/file1.torrent"}
+              - {title: 'title 1', url: "http://mock.url/other.torrent"}
+              - {title: 'other title', url: "http://mock.url/file1.torrent"}
+            accept_all: yes
+            list_add:
+              - entry_list: test_list
+
+          test_list_match_by_url:
+            mock:
+              - {title: 'renamed 1', url: "http://mock.url/file1.torrent"}
+              - {title: 'title 2', url: "http://mock.url/renamed2.torrent"}
+              - {title: 'title 3', url: "http://mock.url/file3.torrent"}
+            list_match:
+              from:
+                - entry_list: test_list
     """
 
     def test_list_add(self, execute_task):
@@ -327,3 +345,22 @@ class TestListInterface(object):
         entry = task.find_entry(title="title 1")
         assert entry
         assert entry['attribute_name'] == 'some data'
+
+    def test_list_add_duplicates(self, execute_task):
+        task = execute_task('test_list_add_duplicates')
+        assert len(task.accepted) == 3
+
+        task = execute_task('list_get')
+        assert len(task.entries) == 1
+
+    def test_list_match_by_title_or_url(self, execute_task):
+        task = execute_task('test_list_add')
+        assert len(task.entries) == 2
+
+        task = execute_task('test_list_match_by_url')
+        assert len(task.accepted) == 2
+        assert task.find_entry('accepted', title='renamed 1')
+        assert task.find_entry('accepted', title='title 2')
+
+        task = execute_task('list_get')
+        assert len(task.entries) == 0
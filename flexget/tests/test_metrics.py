@@ -0,0 +1,116 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import functools
+
+import pytest
+from future.moves.http import client as http_client
+
+from flexget.entry import Entry
+from flexget.plugins.daemon.metrics import MetricsHandler, MetricsServer
+from flexget.utils import metrics
+
+# The exporter runs locally, so the requests to it are let through even though tests can't go online
+HTTP_REQUEST = http_client.HTTPConnection.request
+
+
+@pytest.fixture()
+def collect_metrics():
+    metrics.enable()
+    yield
+    metrics.disable()
+    for metric in metrics.registry:
+        metric.clear()
+
+
+class TestMetrics(object):
+    config = """
+        tasks:
+          metrics task:
+            mock:
+              - {title: 'one'}
+              - {title: 'two'}
+            accept_all: yes
+    """
+
+    def test_render(self):
+        requests = metrics.Counter('test_requests_total', 'Requests', ['domain'])
+        duration = metrics.Histogram('test_duration_seconds', 'Duration', buckets=(0.1, 1))
+        try:
+            requests.labels('example.com').inc()
+            requests.labels('example.com').inc(2)
+            requests.labels('a"b').inc()
+            duration.observe(0.1)
+            duration.observe(0.5)
+            duration.observe(5)
+            lines = metrics.render().splitlines()
+        finally:
+            metrics.registry.remove(requests)
+            metrics.registry.remove(duration)
+        assert '# TYPE test_requests_total counter' in lines
+        assert 'test_requests_total{domain="example.com"} 3' in lines
+        assert 'test_requests_total{domain="a\\"b"} 1' in lines
+        assert '# TYPE test_duration_seconds histogram' in lines
+        assert 'test_duration_seconds_bucket{le="0.1"} 1' in lines
+        assert 'test_duration_seconds_bucket{le="1"} 2' in lines
+        assert 'test_duration_seconds_bucket{le="+Inf"} 3' in lines
+        assert 'test_duration_seconds_sum 5.6' in lines
+        assert 'test_duration_seconds_count 3' in lines
+
+    def test_labels_required(self):
+        with pytest.raises(ValueError):
+            metrics.task_runs.inc()
+        with pytest.raises(ValueError):
+            metrics.task_runs.labels('only task')
+
+    @pytest.mark.usefixtures('collect_metrics')
+    def test_task_metrics(self, execute_task):
+        task = execute_task('metrics task')
+        metrics.observe_task(task, 2, 'succeeded')
+        lines = metrics.render().splitlines()
+        assert 'flexget_task_runs_total{task="metrics task",status="succeeded"} 1' in lines
+        assert 'flexget_task_duration_seconds_bucket{task="metrics task",le="5"} 1' in lines
+        assert 'flexget_task_entries_produced_total{task="metrics task"} 2' in lines
+        assert 'flexget_task_entries_accepted_total{task="metrics task"} 2' in lines
+        # Database queries of the task were counted
+        queries = [line for line in lines if line.startswith('flexget_db_queries_total ')]
+        assert queries and int(queries[0].split()[1]) > 0
+
+    @pytest.mark.usefixtures('collect_metrics')
+    def test_lazy_lookup_labels(self):
+        def set_field(field, entry):
+            entry[field] = 'partial'
+
+        class Lookup(object):
+            def __call__(self, entry):
+                entry['callable'] = 'object'
+
+        entry = Entry(title='lazy')
+        entry.register_lazy_func(functools.partial(set_field, 'partial'), ['partial'])
+        entry.register_lazy_func(Lookup(), ['callable'])
+        assert entry['partial'] == 'partial'
+        assert entry['callable'] == 'object'
+        lines = metrics.render().splitlines()
+        assert 'flexget_lazy_lookups_total{lookup="test_metrics.set_field"} 1' in lines
+        assert 'flexget_lazy_lookups_total{lookup="test_metrics.Lookup"} 1' in lines
+
+    @pytest.mark.usefixtures('collect_metrics')
+    def test_exporter(self, monkeypatch, no_requests):
+        monkeypatch.setattr(http_client.HTTPConnection, 'request', HTTP_REQUEST)
+        metrics.task_queue_length.set_function(lambda: 3)
+        server = MetricsServer(('127.0.0.1', 0), MetricsHandler)
+        server.start()
+        try:
+            connection = http_client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+            connection.request('GET', '/metrics')
+            response = connection.getresponse()
+            assert response.status == 200
+            assert response.getheader('Content-Type') == metrics.CONTENT_TYPE
+            assert 'flexget_task_queue_length 3' in response.read().decode('utf-8').splitlines()
+
+            connection.request('GET', '/other')
+            response = connection.getresponse()
+            response.read()
+            assert response.status == 404
+        finally:
+            server.stop()
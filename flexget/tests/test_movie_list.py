@@ -1,6 +1,10 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+from flexget.entry import Entry
+from flexget.manager import Session
+from flexget.plugins.list.movie_list import MovieList, MovieListMovie
+
 
 class TestListInterface(object):
     config = """
@@ -258,6 +262,31 @@ class TestListInterface(object):
         task = execute_task('test_list_accept_for_real_title')
         assert len(task.accepted) == 1
 
+    def test_bulk_and_index(self, manager):
+        movie_list = MovieList('bulk list')
+        movie_list |= [Entry(title='Movie 1 (2001)', imdb_id='tt0000001'),
+                       Entry(title='Movie 2 (2002)', tmdb_id=2),
+                       Entry(title='Movie 1 (2001)', imdb_id='tt0000001', tmdb_id=1)]
+        # The repeated movie replaces the one added earlier in the same batch
+        assert len(movie_list) == 2
+        matches = movie_list.get_many([Entry(title='Other', tmdb_id='2'),
+                                       Entry(title='Something', imdb_id='tt0000001'),
+                                       Entry(title='movie 2 (2002)'),
+                                       Entry(title='Movie 2 (2003)')])
+        assert [match['title'] if match else None for match in matches] == \
+            ['Movie 2 (2002)', 'Movie 1 (2001)', 'Movie 2 (2002)', None]
+        assert matches[1]['tmdb_id'] == '1'
+
+        # Movies added outside the list are noticed
+        with Session() as session:
+            list_id = session.query(MovieListMovie.list_id).first()[0]
+            session.add(MovieListMovie(title='Movie 3', year=2003, list_id=list_id))
+        assert movie_list.get(Entry(title='Movie 3 (2003)'))
+
+        movie_list -= [Entry(title='Anything', imdb_id='tt0000001'), Entry(title='Movie 3 (2003)')]
+        assert [movie['title'] for movie in movie_list] == ['Movie 2 (2002)']
+        assert Entry(title='Movie 1 (2001)') not in movie_list
+
 
 class TestMovieListStripYearInterface(object):
     config = """
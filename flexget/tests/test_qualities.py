@@ -6,7 +6,7 @@ from jinja2 import Template
 
 from flexget.plugins.parsers.parser_guessit import ParserGuessit
 from flexget.plugins.parsers.parser_internal import ParserInternal
-from flexget.utils.qualities import Quality
+from flexget.utils.qualities import Quality, Requirements
 
 
 class TestQualityModule(object):
@@ -19,6 +19,24 @@ class TestQualityModule(object):
             got_val = Quality(test_val).name
             assert got_val == '720p', got_val
 
+    def test_cached_parse(self):
+        text = 'Some.Show.S01E01.720p.HDTV.x264-GRP'
+        first = Quality(text)
+        second = Quality(text)
+        assert first == second
+        assert first.clean_text == second.clean_text
+        assert '720p' not in second.clean_text.lower()
+        # Modifying a parsed quality must not leak into later parses of the same text
+        first.resolution = Quality('1080p').resolution
+        assert Quality(text).name == '720p hdtv h264'
+
+    def test_ordering(self):
+        assert Quality('1080p') > Quality('720p')
+        assert Quality('720p bluray') > Quality('720p hdtv')
+        assert Quality('1080p cam') < Quality('480p hdtv'), 'modifier should sort above all other components'
+        assert Requirements('720p-1080p hdtv+').allows(Quality('1080p webdl'))
+        assert not Requirements('<720p').allows(Quality('720p hdtv'))
+
 
 class TestQualityParser(object):
     @pytest.fixture(scope='class', params=['internal', 'guessit'], ids=['internal', 'guessit'], autouse=True)
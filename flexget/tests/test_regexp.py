@@ -96,6 +96,31 @@ class TestRegexp(object):
                 - genre1
                 - genre2:
                     not: genre3
+
+          test_combined:
+            regexp:
+              accept:
+                - nothing1
+                - 'regexp(9)':
+                    path: '~'
+                - '(r)egexp\\1'
+                - regexp1:
+                    not: regexp1
+                - regexp[12]
+                - 'regexp(\\d)\\1'
+                - regexp
+                - regular:
+                    not: genre3
+                    from: genre
+                - nothing2
+
+          test_combined_excluding:
+            regexp:
+              reject_excluding:
+                - reg
+                - exp
+                - nothing
+                - regexp
     """
 
     def test_accept(self, execute_task):
@@ -154,3 +179,18 @@ class TestRegexp(object):
         assert task.find_entry('accepted', title='expression'), '\'expression\' should have been accepted'
         assert task.find_entry('entries',
                                title='regular') not in task.accepted, '\'regular\' should not have been accepted'
+
+    def test_combined(self, execute_task):
+        task = execute_task('test_combined')
+        assert task.find_entry('accepted', title='regexp9', path='~'), 'regexp9 should have been accepted with path'
+        entry = task.find_entry('accepted', title='regexp1')
+        assert entry['reason'] == 'regexp \'regexp[12]\' matched field \'title\'', \
+            'regexp1 should have skipped the regexp excluded by not'
+        assert task.find_entry('accepted', title='regexp2')['reason'] == 'regexp \'regexp[12]\' matched field \'title\''
+        assert task.find_entry('accepted', title='regexp3')['reason'] == 'regexp \'regexp\' matched field \'title\''
+        assert task.find_entry('undecided', title='regular'), 'regular should not have been accepted'
+
+    def test_combined_excluding(self, execute_task):
+        task = execute_task('test_combined_excluding')
+        assert task.find_entry('rejected', title='expression')['reason'] == 'regexp \'reg\' didn\'t match'
+        assert task.find_entry('rejected', title='regexp1')['reason'] == 'regexp \'nothing\' didn\'t match'
@@ -4,6 +4,8 @@ from past.builtins import basestring
 
 from flexget import plugin
 from flexget.event import event
+from flexget.manager import Session
+from flexget.plugins.filter.remember_rejected import RememberTask, RememberEntry
 from flexget.utils.tools import parse_timedelta
 
 
@@ -28,6 +30,18 @@ class TestRememberRejected(object):
             mock:
               - {title: 'title 1', url: 'http://localhost/title1'}
             test_remember_reject: yes
+          test_lookup:
+            mock:
+              - {title: 'title 1', url: 'http://localhost/title1'}
+              - {title: 'title 1', url: 'http://localhost/title1_other'}
+              - {title: 'title 2', url: 'http://localhost/title2'}
+              - {title: 'title 3', url: 'http://localhost/title3'}
+          test_remember_time:
+            mock:
+              - {title: 'title 1', url: 'http://localhost/title1'}
+              - {title: 'title 2', url: 'http://localhost/title2'}
+              - {title: 'title 3', url: 'http://localhost/title3'}
+            test_remember_reject: 1 hour
     """
 
     def test_remember_rejected(self, execute_task):
@@ -36,3 +50,36 @@ class TestRememberRejected(object):
         task = execute_task('test')
         assert task.find_entry('rejected', title='title 1', rejected_by='remember_rejected'), \
             'remember_rejected should have rejected'
+
+    def test_lookup(self, execute_task):
+        task = execute_task('test_lookup')
+        assert not task.rejected
+        with Session() as session:
+            task_id = session.query(RememberTask).filter(RememberTask.name == 'test_lookup').one().id
+            session.add(RememberEntry(title='title 1', url='http://localhost/title1', task_id=task_id,
+                                      rejected_by='first', reason='first reason'))
+            session.add(RememberEntry(title='title 1', url='http://localhost/title1', task_id=task_id,
+                                      rejected_by='second', reason='second reason'))
+            session.add(RememberEntry(title='title 3', url='http://localhost/title3', task_id=task_id,
+                                      rejected_by='third', reason='third reason'))
+            session.add(RememberEntry(title='title 2', url='http://localhost/title1', task_id=task_id,
+                                      rejected_by='other', reason='other reason'))
+        task = execute_task('test_lookup')
+        assert len(task.rejected) == 2
+        assert task.find_entry('rejected', url='http://localhost/title1',
+                               reason='Rejected on behalf of first plugin: first reason')
+        assert task.find_entry('rejected', title='title 3')
+        assert task.find_entry('undecided', url='http://localhost/title1_other')
+        assert task.find_entry('undecided', title='title 2')
+
+    def test_remember_many(self, execute_task):
+        task = execute_task('test_remember_time')
+        assert len(task.rejected) == 3
+        with Session() as session:
+            remembered = session.query(RememberEntry).all()
+            assert len(remembered) == 3
+            assert all(item.expires and item.added and item.rejected_by == 'test_remember_reject'
+                       for item in remembered)
+        task = execute_task('test_remember_time')
+        assert len(task.rejected) == 3
+        assert all(entry['rejected_by'] == 'remember_rejected' for entry in task.rejected)
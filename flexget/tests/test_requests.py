@@ -0,0 +1,126 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import threading
+from datetime import datetime
+
+import pytest
+from future.moves.http import client as http_client
+from future.moves.http.server import BaseHTTPRequestHandler, HTTPServer
+from requests import sessions
+
+from flexget.utils import requests
+
+# The server runs locally, so the requests to it are let through even though tests can't go online
+HTTP_REQUEST = http_client.HTTPConnection.request
+SESSION_REQUEST = sessions.Session.request
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = self.headers.get('Cookie', 'no cookie').encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def server(monkeypatch, no_requests):
+    monkeypatch.setattr(http_client.HTTPConnection, 'request', HTTP_REQUEST)
+    monkeypatch.setattr(sessions.Session, 'request', SESSION_REQUEST)
+    monkeypatch.setattr(requests, 'connection_stats', {'created': 0, 'requests': 0})
+    requests.close_shared_adapters()
+    server = HTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield 'http://127.0.0.1:%s/' % server.server_address[1]
+    requests.close_shared_adapters()
+    server.shutdown()
+    server.server_close()
+
+
+class TestSharedPool(object):
+    config = 'tasks: {}'
+
+    def test_reuse_between_sessions(self, server):
+        first = requests.Session(shared_pool=True)
+        second = requests.Session(shared_pool=True)
+        first.cookies.set('name', 'first')
+        assert first.get(server).text == 'name=first'
+        first.close()
+        # Cookies are kept per session, the connection is shared
+        assert second.get(server).text == 'no cookie'
+        assert requests.get(server).text == 'no cookie'
+        assert requests.connection_stats == {'created': 1, 'requests': 3}
+
+    def test_own_pool(self, server):
+        session = requests.Session(max_retries=3)
+        session.get(server)
+        session.close()
+        assert requests.connection_stats == {'created': 0, 'requests': 0}
+        requests.get(server)
+        assert requests.connection_stats == {'created': 1, 'requests': 1}
+
+    def test_host_maxsize(self, server, manager):
+        manager.update_config({'tasks': {}, 'connection_pool': {'maxsize': 3, 'hosts': {'127.0.0.1': 5}}})
+        session = requests.Session(shared_pool=True)
+        session.get(server)
+        pool = session.get_adapter(server).poolmanager.connection_from_url(server)
+        assert pool.pool.maxsize == 5
+        pool = session.get_adapter(server).poolmanager.connection_from_url('http://localhost/')
+        assert pool.pool.maxsize == 3
+        manager.update_config({'tasks': {}})
+
+
+class TestLimits(object):
+    config = 'tasks: {}'
+
+    @pytest.fixture(autouse=True)
+    def limits_state(self, manager, monkeypatch):
+        monkeypatch.setattr(requests.TokenBucketLimiter, 'state_cache', {})
+        monkeypatch.setattr(requests, 'unresponsive_hosts', {})
+        monkeypatch.setattr(requests, '_unresponsive_loaded', 0)
+
+    def test_shared_limiter(self):
+        requests.TokenBucketLimiter('example.com', 2, '1 hour', wait=False)()
+        # Forget the state of this process, the limits database still knows one token is left
+        requests.TokenBucketLimiter.state_cache.clear()
+        limiter = requests.TokenBucketLimiter('example.com', 2, '1 hour', wait=False)
+        limiter()
+        with pytest.raises(requests.RequestException):
+            limiter()
+
+    def test_memory_limiter(self, monkeypatch):
+        monkeypatch.setattr(requests, 'limits_engine', None)
+        limiter = requests.TokenBucketLimiter('example.com', 1, '1 hour', wait=False)
+        limiter()
+        with pytest.raises(requests.RequestException):
+            requests.TokenBucketLimiter('example.com', 1, '1 hour', wait=False)()
+
+    def test_unresponsive_backoff(self):
+        url = 'http://example.com/page'
+        requests.set_unresponsive(url)
+        until, timeouts = requests.unresponsive_hosts['example.com']
+        assert timeouts == 1
+        assert requests.is_unresponsive(url)
+        # Timing out again after the wait doubles the time the host is not tried
+        requests.unresponsive_hosts['example.com'] = (until - requests.WAIT_TIME * 2, timeouts)
+        assert not requests.is_unresponsive(url)
+        requests.set_unresponsive(url)
+        until, timeouts = requests.unresponsive_hosts['example.com']
+        assert timeouts == 2
+        assert until - datetime.now() > requests.WAIT_TIME
+        # Other processes see it from the limits database
+        requests.unresponsive_hosts.clear()
+        requests._unresponsive_loaded = 0
+        assert requests.is_unresponsive(url)
+        requests.set_responsive(url)
+        requests._unresponsive_loaded = 0
+        assert not requests.is_unresponsive(url)
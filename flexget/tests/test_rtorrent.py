@@ -126,6 +126,50 @@ class TestRTorrentClient(object):
             ['main', 'd.directory_base=', 'd.name=', 'd.hash=', u'd.custom1='],
         ))
 
+    def test_existing(self, mocked_proxy):
+        mocked_proxy = mocked_proxy()
+        mocked_proxy.system.multicall.return_value = [
+            [torrent_info_hash], {'faultCode': -501, 'faultString': 'Could not find info-hash.'}
+        ]
+
+        client = RTorrent('http://localhost/RPC2')
+        assert client.existing([torrent_info_hash, 'AAAA']) == {torrent_info_hash}
+
+        mocked_proxy.system.multicall.assert_called_with([
+            {'methodName': 'd.hash', 'params': [torrent_info_hash]},
+            {'methodName': 'd.hash', 'params': ['AAAA']},
+        ])
+
+    def test_load_many(self, mocked_proxy):
+        mocked_proxy = mocked_proxy()
+        mocked_proxy.system.multicall.side_effect = [
+            [[0], [1]],
+            [[0], {'faultCode': -503, 'faultString': 'Could not load'}, [0]],
+        ]
+
+        client = RTorrent('http://localhost/RPC2')
+        results = client.load_many([
+            (torrent_raw, {'directory': '/data/one', 'custom1': 'one'}),
+            (torrent_raw, {'directory': '/data/two'}),
+            (torrent_raw, {'directory': '/data/one'}),
+            (torrent_raw, {}),
+        ], start=True)
+
+        assert results[0] == 0
+        assert isinstance(results[1], xmlrpc_client.Error)
+        assert isinstance(results[2], xmlrpc_client.Fault)
+        assert results[3] == 0
+
+        # Directories are created once each, then all torrents are loaded with one call
+        mkdir_calls, load_calls = [c[0][0] for c in mocked_proxy.system.multicall.call_args_list]
+        assert mkdir_calls == [
+            {'methodName': 'execute.throw', 'params': ['', 'mkdir', '-p', '/data/one']},
+            {'methodName': 'execute.throw', 'params': ['', 'mkdir', '-p', '/data/two']},
+        ]
+        assert [call['methodName'] for call in load_calls] == ['load.raw_start'] * 3
+        assert load_calls[0]['params'][2:] == ['d.directory.set=\\/data\\/one', 'd.custom1.set=one'] or \
+            load_calls[0]['params'][2:] == ['d.custom1.set=one', 'd.directory.set=\\/data\\/one']
+
     def test_update(self, mocked_proxy):
         mocked_proxy = mocked_proxy()
         mocked_proxy.system.multicall.return_value = [[0]]
@@ -228,6 +272,16 @@ class TestRTorrentOutputPlugin(object):
               start: no
               mkdir: no
               uri: http://localhost/SCGI
+          test_add_batched:
+            accept_all: yes
+            disable: builtins
+            mock:
+              - {title: 'a', url: 'magnet:?xt=urn:btih:AAAA', torrent_info_hash: 'AAAA', custom1: 'a'}
+              - {title: 'b', url: 'magnet:?xt=urn:btih:BBBB', torrent_info_hash: 'BBBB', custom1: 'b'}
+              - {title: 'c', url: 'magnet:?xt=urn:btih:CCCC', torrent_info_hash: 'CCCC', custom1: 'c'}
+            rtorrent:
+              action: add
+              uri: http://localhost/SCGI
           test_update:
             accept_all: yes
             set:
@@ -260,39 +314,55 @@ class TestRTorrentOutputPlugin(object):
 
     def test_add(self, mocked_client, execute_task):
         mocked_client = mocked_client()
-        mocked_client.load.return_value = 0
+        mocked_client.load_many.return_value = [0]
         mocked_client.version = [0, 9, 4]
-        mocked_client.torrent.side_effect = [False, {'hash': torrent_info_hash}]
+        mocked_client.existing.side_effect = [set(), {torrent_info_hash}]
 
-        execute_task('test_add_torrent')
+        task = execute_task('test_add_torrent')
 
-        mocked_client.load.assert_called_with(
-            torrent_raw,
-            fields={'priority': 3, 'directory': '/data/downloads', 'custom1': 'test_custom1'},
+        mocked_client.load_many.assert_called_with(
+            [(torrent_raw, {'priority': 3, 'directory': '/data/downloads', 'custom1': 'test_custom1'})],
             start=True,
             mkdir=True,
         )
+        assert not task.failed
 
     def test_add_set(self, mocked_client, execute_task):
         mocked_client = mocked_client()
-        mocked_client.load.return_value = 0
+        mocked_client.load_many.return_value = [0]
         mocked_client.version = [0, 9, 4]
-        mocked_client.torrent.side_effect = [False, {'hash': torrent_info_hash}]
+        mocked_client.existing.side_effect = [set(), {torrent_info_hash}]
 
         execute_task('test_add_torrent_set')
 
-        mocked_client.load.assert_called_with(
-            torrent_raw,
-            fields={
+        mocked_client.load_many.assert_called_with(
+            [(torrent_raw, {
                 'priority': 1,
                 'directory': '/data/downloads',
                 'custom1': 'test_custom1',
                 'custom2': 'test_custom2'
-            },
+            })],
             start=False,
             mkdir=False,
         )
 
+    def test_add_batched(self, mocked_client, execute_task):
+        mocked_client = mocked_client()
+        mocked_client.load_many.return_value = [0, xmlrpc_client.Fault(-503, 'Could not load')]
+        mocked_client.existing.side_effect = [{'AAAA'}, {'BBBB'}]
+
+        task = execute_task('test_add_batched')
+
+        mocked_client.existing.assert_any_call(['AAAA', 'BBBB', 'CCCC'])
+        assert mocked_client.load_many.call_count == 1
+        loaded = mocked_client.load_many.call_args[0][0]
+        assert [fields for raw, fields in loaded] == [{'custom1': 'b'}, {'custom1': 'c'}]
+        # Only the successfully loaded torrent is verified
+        mocked_client.existing.assert_called_with(['BBBB'])
+        assert task.find_entry('failed', title='c')
+        assert not task.find_entry('failed', title='a')
+        assert not task.find_entry('failed', title='b')
+
     def test_update(self, mocked_client, execute_task):
         mocked_client = mocked_client()
         mocked_client.version = [0, 9, 4]
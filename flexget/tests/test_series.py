@@ -2419,3 +2419,64 @@ class TestSeriesDDAudio(object):
         assert task.find_entry(title='Channels.S01E01.1080p.HDTV.DD+7.1-FlexGet'), \
             'Channels.S01E01.1080p.HDTV.DD+7.1-FlexGet should have been accepted'
         assert len(task.accepted) == 1, 'should have accepted only one'
+
+
+class TestSeriesQueryCount(object):
+    config = """
+        templates:
+          global:
+            parsing:
+              series: {{parser}}
+            disable: builtins
+            series:
+              - Popular Show
+        tasks:
+          few_releases:
+            mock:
+            {% for i in range(5) %}
+              - {title: 'Popular.Show.S01E01.720p.HDTV.x264-GROUP{{i}}'}
+            {% endfor %}
+          many_releases:
+            mock:
+            {% for i in range(80) %}
+              - {title: 'Popular.Show.S01E01.720p.HDTV.x264-GROUP{{i}}'}
+            {% endfor %}
+    """
+
+    @pytest.fixture()
+    def count_queries(self, manager):
+        from sqlalchemy import event
+
+        counts = {'filter': 0}
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if counting['phase'] == 'filter':
+                counts['filter'] += 1
+
+        counting = {'phase': None}
+        event.listen(manager.engine, 'before_cursor_execute', count)
+        yield counts, counting
+        event.remove(manager.engine, 'before_cursor_execute', count)
+
+    def test_releases_stored_in_bulk(self, execute_task, count_queries):
+        from flexget.event import add_event_handler, remove_event_handler
+        counts, counting = count_queries
+
+        def before_plugin(task, keyword):
+            counting['phase'] = task.current_phase if keyword == 'series' else None
+
+        add_event_handler('task.execute.before_plugin', before_plugin)
+        try:
+            task = execute_task('few_releases')
+            assert len(task.accepted) == 1
+            few = counts['filter']
+            counts['filter'] = 0
+            task = execute_task('many_releases')
+            many = counts['filter']
+        finally:
+            remove_event_handler('task.execute.before_plugin', before_plugin)
+        assert len(task.accepted) == 0, 'episode was already downloaded'
+        with Session() as session:
+            assert session.query(EpisodeRelease).count() == 80
+        # Storing the releases should not cost queries per release
+        assert many - few < 10, 'filtering 80 releases took %s queries, 5 releases took %s' % (many, few)
@@ -1,7 +1,8 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
-from flexget.utils.simple_persistence import SimplePersistence
+from flexget.manager import Session
+from flexget.utils.simple_persistence import SimplePersistence, SimpleKeyValue
 
 
 class TestSimplePersistence(object):
@@ -29,3 +30,22 @@ class TestSimplePersistence(object):
         # Make sure it commits and actually persists
         persist = SimplePersistence('testplugin')
         assert persist['aoeu'] == 'test'
+
+    def test_flush_changed(self, execute_task):
+        persist = SimplePersistence('flushplugin')
+        persist['unchanged'] = 'a'
+        persist['changed'] = {'a': 1}
+        persist['deleted'] = 'c'
+        SimplePersistence.flush()
+        with Session() as session:
+            # Values which didn't change since the last flush are not written again
+            session.query(SimpleKeyValue).filter(SimpleKeyValue.key == 'unchanged').one().value = 'outside'
+        persist['changed']['a'] = 2
+        del persist['deleted']
+        persist['added'] = 'd'
+        SimplePersistence.flush()
+        with Session() as session:
+            stored = dict((skv.key, skv.value) for skv in
+                          session.query(SimpleKeyValue).filter(SimpleKeyValue.plugin == 'flushplugin'))
+        assert stored == {'unchanged': 'outside', 'changed': {'a': 2}, 'added': 'd'}
+        assert 'deleted' not in persist
@@ -0,0 +1,48 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import pytest
+
+from flexget.utils import soup
+from flexget.utils.soup import extract, fast_parser, get_soup
+
+PAGE = """<html><body>
+<div id="header"><a class="link" href="/home">Home</a></div>
+<table id="results">
+<tr><td><a class="link" href="/1">One</a></td><td>10</td></tr>
+<tr><td><a class="link" href="/2">Two</a></td><td>20</td></tr>
+</table>
+</body></html>"""
+
+
+@pytest.fixture()
+def fallback_sites(monkeypatch):
+    monkeypatch.setattr(soup, 'fallback_sites', {})
+    return soup.fallback_sites
+
+
+class TestSoup(object):
+    config = 'tasks: {}'
+
+    def test_config(self, manager, monkeypatch):
+        monkeypatch.setattr(soup, 'default_parser', soup.default_parser)
+        manager.update_config({'html_parser': 'fast', 'tasks': {}})
+        assert soup.default_parser == fast_parser()
+        assert get_soup(PAGE).find('table')
+        manager.update_config({'tasks': {}})
+        assert soup.default_parser == 'html5lib'
+
+    def test_extract_parse_only(self, fallback_sites):
+        links = extract(PAGE, 'a.link', site='test', parse_only={'name': 'table', 'attrs': {'id': 'results'}})
+        assert [link.get('href') for link in links] == ['/1', '/2']
+        assert [td.get_text() for td in links[0].parent.parent.find_all('td')] == ['One', '10']
+        assert 'test' not in fallback_sites
+
+    def test_extract_fallback(self, fallback_sites):
+        # Only html5lib adds the tbody browsers would add
+        selector = 'table > tbody > tr > td > a'
+        assert [link.get_text() for link in extract(PAGE, selector, site='test')] == ['One', 'Two']
+        assert 'test' in fallback_sites
+        # Pages with no matches don't make sites fall back
+        assert extract(PAGE, 'a.missing', site='other') == []
+        assert 'other' not in fallback_sites
@@ -0,0 +1,105 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import io
+import os
+import threading
+
+import pytest
+
+from flexget.plugins.input import tail
+from flexget.plugins.input.tail import TailFollower, compile_patterns
+
+
+def write(path, text, mode='a'):
+    with io.open(path, mode, encoding='utf-8') as f:
+        f.write(text)
+
+
+class TestTail(object):
+    config = """
+        tasks:
+          test_tail:
+            tail:
+              file: __tmp__/log
+              entry:
+                title: 'TITLE: (.*) URL:'
+                url: 'URL: (.*)'
+          test_follow:
+            tail:
+              file: __tmp__/log
+              entry:
+                title: 'TITLE: (.*) URL:'
+                url: 'URL: (.*)'
+              follow: yes
+    """
+
+    @pytest.fixture(autouse=True)
+    def log_file(self, tmpdir):
+        # The file has to exist when the config is validated
+        log_file = tmpdir.join('log').strpath
+        write(log_file, '', 'w')
+        return log_file
+
+    def test_compile_patterns(self):
+        patterns, prefilter = compile_patterns({'title': 'TITLE: (.*) URL:', 'url': 'URL: (.*)'})
+        assert [field for field, _ in patterns] == ['title', 'url']
+        assert prefilter.search('foo URL: http://x')
+        assert not prefilter.search('just chatter')
+        # Back references would point to the wrong groups in a combined pattern
+        _, prefilter = compile_patterns({'title': r'(["\'])(.*)\1', 'url': 'URL: (.*)'})
+        assert prefilter is None
+
+    def test_tail(self, execute_task, log_file):
+        write(log_file, 'chatter\nTITLE: first URL: http://localhost/1\nmore chatter\n', 'w')
+        task = execute_task('test_tail')
+        assert [e['title'] for e in task.entries] == ['first']
+        assert task.entries[0]['url'] == 'http://localhost/1'
+
+        write(log_file, 'TITLE: s\xe9cond URL: http://localhost/2\n')
+        task = execute_task('test_tail')
+        assert [e['title'] for e in task.entries] == ['s\xe9cond']
+
+        task = execute_task('test_tail')
+        assert not task.entries
+
+    def test_rotation(self, execute_task, log_file):
+        write(log_file, 'TITLE: first URL: http://localhost/1\n' + 'chatter\n' * 10, 'w')
+        execute_task('test_tail')
+        # Rotated file is already longer than the previous position
+        os.rename(log_file, log_file + '.1')
+        write(log_file, 'TITLE: second URL: http://localhost/2\n' + 'chatter\n' * 20, 'w')
+        task = execute_task('test_tail')
+        assert [e['title'] for e in task.entries] == ['second']
+
+    def test_follow_partial_line(self, execute_task, log_file):
+        write(log_file, 'TITLE: first URL: http://localhost/1\nTITLE: second URL: http://loc', 'w')
+        task = execute_task('test_follow')
+        assert [e['title'] for e in task.entries] == ['first']
+        write(log_file, 'alhost/2\n')
+        task = execute_task('test_follow')
+        assert [e['title'] for e in task.entries] == ['second']
+        assert task.entries[0]['url'] == 'http://localhost/2'
+
+    def test_follower(self, monkeypatch, log_file):
+        monkeypatch.setattr(tail, 'INotify', None)
+        executed = threading.Event()
+        executions = []
+
+        class FakeManager(object):
+            def execute(self, options, priority):
+                executions.append(options['tasks'])
+                executed.set()
+                return []
+
+        follower = TailFollower(FakeManager(), 'test_follow', log_file, poll_interval=0.05, batch_delay=0.05)
+        follower.start()
+        try:
+            # Runs once at start for lines added while not following
+            assert executed.wait(5)
+            executed.clear()
+            write(log_file, 'TITLE: first URL: http://localhost/1\n')
+            assert executed.wait(5)
+        finally:
+            follower.stop()
+        assert executions[:2] == [['test_follow'], ['test_follow']]
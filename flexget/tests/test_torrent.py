@@ -1,7 +1,11 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import binascii
 import os
+import socket
+import struct
+import threading
 
 import mock
 import pytest
@@ -309,6 +313,74 @@ class TestTorrentAlive(object):
         assert get_udp_seeds('udp://127.0.0.1:PORT/announce', 'HASH') == 0
         assert get_udp_seeds('udp://127.0.0.1:65536/announce', 'HASH') == 0
 
+    def test_udp_scrape_many(self, monkeypatch):
+        from flexget.plugins.filter import torrent_alive
+        monkeypatch.setattr(torrent_alive, 'scrape_cache', torrent_alive.TimedDict())
+
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(('127.0.0.1', 0))
+        server.settimeout(5.0)
+        packets = []
+
+        def tracker():
+            try:
+                while True:
+                    data, address = server.recvfrom(2048)
+                    connection_id, action, transaction_id = struct.unpack(b'>QLL', data[:16])
+                    packets.append(action)
+                    if action == 0:
+                        server.sendto(struct.pack(b'>LLQ', 0, transaction_id, 1234), address)
+                        continue
+                    hashes = [data[i:i + 20] for i in range(16, len(data), 20)]
+                    # Seeds of each torrent are the first byte of its hash
+                    response = struct.pack(b'>LL', 2, transaction_id)
+                    response += b''.join(struct.pack(b'>LLL', bytearray(h)[0], 0, 0) for h in hashes)
+                    server.sendto(response, address)
+            except (socket.error, OSError):
+                pass
+
+        thread = threading.Thread(target=tracker)
+        thread.daemon = True
+        thread.start()
+        url = 'udp://127.0.0.1:%s/announce' % server.getsockname()[1]
+        info_hashes = ['%02X' % i * 20 for i in range(80)]
+        try:
+            seeds = torrent_alive.scrape_seeds({url: info_hashes})
+            assert seeds == dict(((url, h), i) for i, h in enumerate(info_hashes))
+            # One connect, then the hashes are split over two scrape packets
+            assert packets == [0, 2, 2]
+            # Scraping again is answered from the cache
+            assert torrent_alive.scrape_seeds({url: info_hashes[:3]}) == dict(
+                ((url, h), i) for i, h in enumerate(info_hashes[:3]))
+            assert packets == [0, 2, 2]
+        finally:
+            server.close()
+
+    def test_http_multi_scrape_rejected(self, monkeypatch):
+        from flexget.plugins.filter import torrent_alive
+        monkeypatch.setattr(torrent_alive, 'single_scrape_trackers', torrent_alive.TimedDict())
+        requested = []
+
+        def http_scrape(url, info_hashes):
+            requested.append(len(info_hashes))
+            if len(info_hashes) > 1:
+                # Tracker answers multi-scrapes with HTTP 400
+                return None
+            # Seeds of each torrent are the first byte of its hash
+            return {binascii.unhexlify(info_hashes[0]): {'complete': int(info_hashes[0][:2], 16)}}
+
+        monkeypatch.setattr(torrent_alive, '_http_scrape', http_scrape)
+        url = 'http://tracker.test/announce'
+        info_hashes = ['%02X' % i * 20 for i in range(60)]
+        seeds = torrent_alive.get_http_seeds_many(url, info_hashes)
+        assert seeds == dict((h, i) for i, h in enumerate(info_hashes))
+        assert requested == [50] + [1] * 60
+        # The tracker is not asked for a multi-scrape again
+        del requested[:]
+        assert torrent_alive.get_http_seeds_many(url, info_hashes[:3]) == dict(
+            (h, i) for i, h in enumerate(info_hashes[:3]))
+        assert requested == [1, 1, 1]
+
 
 class TestRtorrentMagnet(object):
     __tmp__ = True
@@ -0,0 +1,157 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import json
+import socket
+import threading
+
+import pytest
+from future.moves.http import client as http_client
+from future.moves.http.server import BaseHTTPRequestHandler, HTTPServer
+
+from flexget.plugins.clients import transmission
+from flexget.utils.client_pool import ClientPool
+
+try:
+    import transmissionrpc
+except ImportError:
+    transmissionrpc = None
+
+
+def _free_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+PORT = _free_port()
+# The fake daemon runs locally, so the requests to it are let through even though tests can't go online
+HTTP_REQUEST = http_client.HTTPConnection.request
+
+
+class FakeTransmission(object):
+    """Minimal transmission RPC daemon, magnets get their metadata after being polled `magnetize_after` times"""
+
+    session_id = 'fake-session'
+
+    def __init__(self):
+        self.requests = []
+        self.torrents = {}
+        self.magnetize_after = 2
+
+    def handle(self, method, arguments):
+        self.requests.append((method, arguments))
+        if method == 'session-get':
+            return {'rpc-version': 15, 'version': '2.84 (14307)', 'download-dir': '/downloads',
+                    'start-added-torrents': True}
+        if method == 'torrent-add':
+            torrent_id = len(self.torrents) + 1
+            name = arguments['filename'].split('dn=')[-1]
+            self.torrents[torrent_id] = {'id': torrent_id, 'name': name, 'hashString': 'hash%s' % torrent_id,
+                                         'totalSize': 0, 'files': [], 'priorities': [], 'wanted': [], 'polls': 0}
+            return {'torrent-added': {'id': torrent_id, 'name': name, 'hashString': 'hash%s' % torrent_id}}
+        if method == 'torrent-get':
+            result = []
+            for torrent_id in arguments.get('ids', list(self.torrents)):
+                torrent = self.torrents[torrent_id]
+                torrent['polls'] += 1
+                if torrent['polls'] >= self.magnetize_after and not torrent['files']:
+                    torrent['files'] = [{'name': '%s/%s.mkv' % (torrent['name'], torrent['name']), 'length': 950,
+                                         'bytesCompleted': 0},
+                                        {'name': '%s/sample.mkv' % torrent['name'], 'length': 50,
+                                         'bytesCompleted': 0}]
+                    torrent['priorities'] = [0, 0]
+                    torrent['wanted'] = [1, 1]
+                    torrent['totalSize'] = 1000
+                result.append(dict((field, torrent[field]) for field in arguments['fields'] if field in torrent))
+            return {'torrents': result}
+        return {}
+
+
+class RPCHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        daemon = self.server.daemon
+        if self.headers.get('x-transmission-session-id') != daemon.session_id:
+            self.send_response(409)
+            self.send_header('X-Transmission-Session-Id', daemon.session_id)
+            self.end_headers()
+            return
+        query = json.loads(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        arguments = daemon.handle(query['method'], query.get('arguments', {}))
+        body = json.dumps({'result': 'success', 'arguments': arguments, 'tag': query.get('tag')}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def fake_transmission(monkeypatch, no_requests):
+    monkeypatch.setattr(http_client.HTTPConnection, 'request', HTTP_REQUEST)
+    monkeypatch.setattr(transmission, 'MAGNETIZATION_POLL_INTERVAL', 0.05)
+    monkeypatch.setattr('flexget.utils.client_pool.pool', ClientPool())
+    server = HTTPServer(('127.0.0.1', PORT), RPCHandler)
+    server.daemon = FakeTransmission()
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server.daemon
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.skipif(transmissionrpc is None, reason='transmissionrpc module required')
+@pytest.mark.usefixtures('fake_transmission')
+class TestTransmission(object):
+    config = """
+        templates:
+          global:
+            accept_all: yes
+            disable: seen
+            mock:
+              - {title: 'one', url: 'magnet:?xt=urn:btih:1&dn=one'}
+              - {title: 'two', url: 'magnet:?xt=urn:btih:2&dn=two'}
+              - {title: 'three', url: 'magnet:?xt=urn:btih:3&dn=three'}
+        tasks:
+          test_add:
+            transmission:
+              host: 127.0.0.1
+              port: %(port)s
+              main_file_only: yes
+              magnetization_timeout: 5
+          test_add_again:
+            transmission:
+              host: 127.0.0.1
+              port: %(port)s
+    """ % {'port': PORT}
+
+    def test_add_batched(self, execute_task, fake_transmission):
+        task = execute_task('test_add')
+        assert len(task.accepted) == 3
+        assert not task.failed
+        methods = [method for method, _ in fake_transmission.requests]
+        assert methods.count('torrent-add') == 3
+        # Files of all magnets are polled together until they all have metadata
+        assert methods.count('torrent-get') == fake_transmission.magnetize_after
+        assert all(args['ids'] == [1, 2, 3] for method, args in fake_transmission.requests
+                   if method == 'torrent-get')
+        # All torrents got the same wanted files, so they are changed and started with one request each
+        changes = [args for method, args in fake_transmission.requests if method == 'torrent-set']
+        assert changes == [{'ids': [1, 2, 3], 'files-unwanted': [1], 'files-wanted': [0]}]
+        starts = [args for method, args in fake_transmission.requests if method == 'torrent-start']
+        assert starts == [{'ids': [1, 2, 3]}]
+
+    def test_client_reused(self, execute_task, fake_transmission):
+        execute_task('test_add_again')
+        execute_task('test_add_again')
+        methods = [method for method, _ in fake_transmission.requests]
+        # Connecting fetches the session once, and starting the added torrents checks it once per task
+        assert methods.count('session-get') == 3
+        assert methods.count('torrent-add') == 6
+        assert methods.count('torrent-get') == 0
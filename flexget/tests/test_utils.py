@@ -3,11 +3,17 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 from datetime import datetime
 import math
+import os
+import time
 
 import pytest
 
+from path import Path
+
 from flexget.utils import json
-from flexget.utils.tools import parse_filesize, split_title_year
+from flexget.utils.client_pool import ClientPool
+from flexget.utils.directory_index import DirectoryIndex
+from flexget.utils.tools import parse_filesize, split_title_year, TimedDict
 
 
 def compare_floats(float1, float2):
@@ -98,3 +104,132 @@ class TestSplitYearTitle(object):
     ])
     def test_split_year_title(self, title, expected_title, expected_year):
         assert split_title_year(title) == (expected_title, expected_year)
+
+
+class TestTimedDict(object):
+    def test_max_size_evicts_oldest(self):
+        cache = TimedDict(cache_time='5 minutes', max_size=10, sizeof=len)
+        cache['a'] = 'aaaa'
+        cache['b'] = 'bbbb'
+        cache['c'] = 'cccc'
+        assert 'a' not in cache
+        assert set(cache) == set(['b', 'c'])
+        assert cache.total_size == 8
+
+    def test_max_size_skips_too_large(self):
+        cache = TimedDict(cache_time='5 minutes', max_size=10, sizeof=len)
+        cache['a'] = 'aaaa'
+        cache['b'] = 'b' * 11
+        assert 'b' not in cache
+        assert cache['a'] == 'aaaa'
+
+    def test_replace_and_delete_update_size(self):
+        cache = TimedDict(cache_time='5 minutes', max_size=10, sizeof=len)
+        cache['a'] = 'aaaa'
+        cache['a'] = 'aa'
+        assert cache.total_size == 2
+        del cache['a']
+        assert cache.total_size == 0
+
+    def test_updated_key_is_newest(self):
+        cache = TimedDict(cache_time='5 minutes', max_size=10, sizeof=len)
+        cache['a'] = 'aaaa'
+        cache['b'] = 'bbbb'
+        cache['a'] = 'aaaa'
+        cache['c'] = 'cccc'
+        assert set(cache) == set(['a', 'c'])
+
+
+class TestClientPool(object):
+    def test_reuse(self):
+        pool = ClientPool()
+        created = []
+        first = pool.get(('client', 'host'), lambda: created.append(1) or object())
+        assert pool.get(('client', 'host'), lambda: created.append(1) or object()) is first
+        assert pool.get(('client', 'other'), lambda: created.append(1) or object()) is not first
+        assert len(created) == 2
+        assert pool.stats['created'] == 2
+        assert pool.stats['reused'] == 1
+
+    def test_health_check(self):
+        pool = ClientPool(check_interval=0)
+        closed = []
+        healthy = [True]
+        first = pool.get('key', object, check=lambda client: healthy[0], close=closed.append)
+        assert pool.get('key', object, check=lambda client: healthy[0], close=closed.append) is first
+        healthy[0] = False
+        second = pool.get('key', object, check=lambda client: healthy[0], close=closed.append)
+        assert second is not first
+        assert closed == [first]
+        assert pool.stats['failed_checks'] == 1
+
+    def test_check_after_error(self):
+        pool = ClientPool(check_interval=60)
+        checks = []
+
+        def check(client):
+            checks.append(client)
+            return len(checks) > 1
+
+        first = pool.get('key', object, check=check)
+        # Recently used connections are not checked
+        assert pool.get('key', object, check=check) is first
+        assert checks == []
+        # Until an error was reported with them
+        pool.report_error('key')
+        second = pool.get('key', object, check=check)
+        assert checks == [first]
+        assert second is not first
+        pool.report_error('key')
+        assert pool.get('key', object, check=check) is second
+        assert pool.get('key', object, check=check) is second
+        assert checks == [first, second]
+
+    def test_idle_eviction(self):
+        pool = ClientPool(idle_timeout=0.05)
+        closed = []
+        first = pool.get('key', object, close=closed.append)
+        time.sleep(0.1)
+        pool.evict_idle()
+        assert closed == [first]
+        assert len(pool) == 0
+        assert pool.get('key', object) is not first
+        assert pool.stats['evicted'] == 1
+
+
+class TestDirectoryIndex(object):
+    def _make_old(self, tmpdir):
+        # Push mtimes out of the racy window so unchanged directories are not listed again
+        old = time.time() - 60
+        for path in [tmpdir] + list(tmpdir.visit()):
+            os.utime(path.strpath, (old, old))
+
+    def test_walk_matches_path_walk(self, tmpdir):
+        tmpdir.join('a', 'b').ensure(dir=True)
+        tmpdir.join('a', 'b', 'file1.mkv').write('')
+        tmpdir.join('file2.mkv').write('')
+        index = DirectoryIndex(tmpdir.strpath)
+        index.refresh()
+        root = Path(tmpdir.strpath)
+        assert list(index.walk()) == list(root.walk())
+        assert list(index.walkfiles()) == list(root.walkfiles())
+        assert list(index.walkdirs()) == list(root.walkdirs())
+
+    def test_refresh_detects_changes(self, tmpdir):
+        tmpdir.join('a').ensure(dir=True)
+        tmpdir.join('a', 'file1.mkv').write('')
+        self._make_old(tmpdir)
+        index = DirectoryIndex(tmpdir.strpath)
+        assert index.refresh()
+        generation = index.generation
+        assert not index.refresh(), 'nothing changed'
+        assert index.generation == generation
+
+        tmpdir.join('a', 'file2.mkv').write('')
+        assert index.refresh()
+        assert index.generation == generation + 1
+        assert set(p.name for p in index.walkfiles()) == set(['file1.mkv', 'file2.mkv'])
+
+        tmpdir.join('a').remove()
+        assert index.refresh()
+        assert list(index.walk()) == []
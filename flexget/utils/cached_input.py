@@ -1,24 +1,35 @@
 from __future__ import unicode_literals, division, absolute_import
 
 import copy
+import hashlib
 import logging
 import pickle
-from datetime import datetime, timedelta
+import sys
+from datetime import date, datetime, time, timedelta
 
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from flexget import db_schema
 from flexget.event import event
+from flexget.entry import Entry
 from flexget.manager import Session
 from flexget.plugin import PluginError
 from flexget.utils import json
 from flexget.utils.database import entry_synonym
-from flexget.utils.sqlalchemy_utils import table_schema, table_add_column
+from flexget.utils.lazy_dict import LazyLookup
+from flexget.utils.qualities import Quality
+from flexget.utils.sqlalchemy_utils import table_schema, table_add_column, create_index
 from flexget.utils.tools import parse_timedelta, TimedDict, get_config_hash
-from sqlalchemy import Column, Integer, String, DateTime, Unicode, select, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Unicode, select, ForeignKey, Index, bindparam
 from sqlalchemy.orm import relation
 
 log = logging.getLogger('input_cache')
-Base = db_schema.versioned_base('input_cache', 1)
+Base = db_schema.versioned_base('input_cache', 2)
+
+# Upper bound for the approximate size of all entries held in the in-memory cache
+MEMORY_CACHE_SIZE = 256 * 1024 * 1024
+
+# Field values of these types are never modified in place, so they can be shared between entries
+IMMUTABLE_TYPES = (str, bytes, int, float, bool, type(None), date, datetime, time, timedelta, Quality)
 
 
 @db_schema.upgrade('input_cache')
@@ -36,6 +47,11 @@ def upgrade(ver, session):
             except KeyError as e:
                 log.error('Unable error upgrading input_cache pickle object due to %s' % str(e))
         ver = 1
+    if ver == 1:
+        table = table_schema('input_cache_entry', session)
+        table_add_column(table, 'entry_hash', String, session)
+        create_index('input_cache_entry', session, 'cache_id')
+        ver = 2
     return ver
 
 
@@ -56,10 +72,87 @@ class InputCacheEntry(Base):
     id = Column(Integer, primary_key=True)
     _json = Column('json', Unicode)
     entry = entry_synonym('_json')
+    entry_hash = Column(String)
 
     cache_id = Column(Integer, ForeignKey('input_cache.id'), nullable=False)
 
 
+Index('ix_input_cache_entry_cache_id', InputCacheEntry.cache_id)
+
+
+def entry_hash(entry):
+    """Identifies an entry within a cache by its title and url."""
+    key = '%s\n%s' % (entry.get('title', ''), entry.get('url', ''))
+    return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+
+def _copy_value(value):
+    if isinstance(value, IMMUTABLE_TYPES):
+        return value
+    if isinstance(value, tuple) and all(isinstance(item, IMMUTABLE_TYPES) for item in value):
+        return value
+    return copy.deepcopy(value)
+
+
+def _value_size(value):
+    """Rough estimate of the memory used by a field value."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_value_size(k) + _value_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_value_size(item) for item in value)
+    return size
+
+
+class FrozenEntry(object):
+    """
+    Read only snapshot of an :class:`Entry` as stored in the input cache.
+
+    Values that may be modified in place are copied once when the snapshot is taken, and again on :meth:`thaw`.
+    All other values are shared between the snapshot and every entry created from it.
+    """
+
+    __slots__ = ('fields', 'lazy', 'traces', 'size')
+
+    def __init__(self, entry):
+        self.fields = {}
+        self.lazy = []
+        lazy_lookup = None
+        for key, value in entry.store.items():
+            if isinstance(value, LazyLookup):
+                lazy_lookup = value
+                continue
+            self.fields[key] = _copy_value(value)
+        if lazy_lookup is not None:
+            # Only the lookups which have not been evaluated yet are kept
+            self.lazy = list(zip(lazy_lookup.func_list, lazy_lookup.key_list))
+        self.traces = tuple(entry.traces)
+        self.size = sys.getsizeof(self.fields) + sum(
+            _value_size(key) + _value_size(value) for key, value in self.fields.items())
+
+    def thaw(self):
+        """Create a new :class:`Entry` from this snapshot."""
+        entry = Entry()
+        entry.store = dict((key, _copy_value(value)) for key, value in self.fields.items())
+        for func, keys in self.lazy:
+            entry.register_lazy_func(func, keys)
+        entry.traces = list(self.traces)
+        return entry
+
+
+def freeze_entries(entries):
+    """Turns a list of entries into a tuple of frozen entries for the in-memory cache."""
+    return tuple(FrozenEntry(entry) if isinstance(entry, Entry) else copy.deepcopy(entry) for entry in entries)
+
+
+def thaw_entries(frozen):
+    return [item.thaw() if isinstance(item, FrozenEntry) else copy.deepcopy(item) for item in frozen]
+
+
+def frozen_size(frozen):
+    return sys.getsizeof(frozen) + sum(getattr(item, 'size', 0) for item in frozen)
+
+
 @event('manager.db_cleanup')
 def db_cleanup(manager, session):
     """Removes old input caches from plugins that are no longer configured."""
@@ -81,7 +174,7 @@ class cached(object):
     .. note:: Configuration assumptions may make this unusable in some (future) inputs
     """
 
-    cache = TimedDict(cache_time='5 minutes')
+    cache = TimedDict(cache_time='5 minutes', max_size=MEMORY_CACHE_SIZE, sizeof=frozen_size)
 
     def __init__(self, name, persist=None):
         # Cast name to unicode to prevent sqlalchemy warnings when filtering
@@ -119,10 +212,7 @@ class cached(object):
             if not task.options.nocache and cache_value:
                 # return from the cache
                 log.trace('cache hit')
-                entries = []
-                for entry in cache_value:
-                    fresh = copy.deepcopy(entry)
-                    entries.append(fresh)
+                entries = thaw_entries(cache_value)
                 if entries:
                     log.verbose('Restored %s entries from cache' % len(entries))
                 return entries
@@ -138,7 +228,7 @@ class cached(object):
                             entries = [e.entry for e in db_cache.entries]
                             log.verbose('Restored %s entries from db cache' % len(entries))
                             # Store to in memory cache
-                            self.cache[cache_name] = copy.deepcopy(entries)
+                            self.cache[cache_name] = freeze_entries(entries)
                             return entries
 
                 # Nothing was restored from db or memory cache, run the function
@@ -158,7 +248,7 @@ class cached(object):
                                 entries = [ent.entry for ent in db_cache.entries]
                                 log.verbose('Restored %s entries from db cache' % len(entries))
                                 # Store to in memory cache
-                                self.cache[cache_name] = copy.deepcopy(entries)
+                                self.cache[cache_name] = freeze_entries(entries)
                                 return entries
                     # If there was nothing in the db cache, re-raise the error.
                     raise
@@ -170,7 +260,7 @@ class cached(object):
                 # store results to cache
                 log.debug('storing to cache %s %s entries' % (cache_name, len(response)))
                 try:
-                    self.cache[cache_name] = copy.deepcopy(response)
+                    self.cache[cache_name] = freeze_entries(response)
                 except TypeError:
                     # might be caused because of backlog restoring some idiotic stuff, so not neccessarily a bug
                     log.critical('Unable to save task content into cache, '
@@ -178,14 +268,55 @@ class cached(object):
                 if self.persist:
                     # Store to database
                     log.debug('Storing cache %s to database.' % cache_name)
-                    with Session() as session:
-                        db_cache = session.query(InputCache).filter(InputCache.name == self.name). \
-                            filter(InputCache.hash == hash).first()
-                        if not db_cache:
-                            db_cache = InputCache(name=self.name, hash=hash)
-                        db_cache.entries = [InputCacheEntry(entry=ent) for ent in response]
-                        db_cache.added = datetime.now()
-                        session.merge(db_cache)
+                    self.store_db_cache(hash, response)
                 return response
 
         return wrapped_func
+
+    def store_db_cache(self, hash, entries):
+        """
+        Persists `entries` as the db cache for `hash`.
+
+        Only rows which have changed since the last run are written; unchanged rows are left alone and rows for entries
+        which are no longer produced are deleted.
+        """
+        table = InputCacheEntry.__table__
+        with Session() as session:
+            db_cache = session.query(InputCache).filter(InputCache.name == self.name). \
+                filter(InputCache.hash == hash).first()
+            if not db_cache:
+                db_cache = InputCache(name=self.name, hash=hash)
+                session.add(db_cache)
+            db_cache.added = datetime.now()
+            session.flush()
+
+            existing = {}
+            for row_id, row_hash, row_json in session.query(
+                    InputCacheEntry.id, InputCacheEntry.entry_hash, InputCacheEntry._json). \
+                    filter(InputCacheEntry.cache_id == db_cache.id):
+                existing.setdefault(row_hash, []).append((row_id, row_json))
+
+            inserts = []
+            updates = []
+            for ent in entries:
+                key = entry_hash(ent)
+                # Serialize the same way as the `entry` synonym does
+                serialized = InputCacheEntry(entry=ent)._json
+                rows = existing.get(key)
+                if not rows:
+                    inserts.append({'cache_id': db_cache.id, 'entry_hash': key, 'json': serialized})
+                    continue
+                row_id, row_json = rows.pop(0)
+                if row_json != serialized:
+                    updates.append({'row_id': row_id, 'new_json': serialized})
+
+            stale = [row_id for rows in existing.values() for row_id, _ in rows]
+            if stale:
+                session.execute(table.delete().where(table.c.id.in_(stale)))
+            if updates:
+                session.execute(table.update().where(table.c.id == bindparam('row_id')).
+                                values(json=bindparam('new_json')), updates)
+            if inserts:
+                session.execute(table.insert(), inserts)
+            log.debug('Input cache %s: %s inserted, %s updated, %s deleted, %s unchanged', self.name, len(inserts),
+                      len(updates), len(stale), len(entries) - len(inserts) - len(updates))
@@ -0,0 +1,152 @@
+"""
+Keeps connections to download clients open between tasks, so that many tasks handing torrents to the same daemon
+don't all have to log in again.
+
+Client plugins fetch their connections with :func:`get_client`, keyed by everything that identifies the connection
+(plugin name, host, port, credentials ...). Connections which have not been used for a while, or which had an error
+reported with :func:`report_client_error`, are checked before being handed out again. They are closed once they have
+been idle for longer than :data:`IDLE_TIMEOUT`.
+"""
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import logging
+import threading
+import time
+
+from flexget.event import event
+
+log = logging.getLogger('client_pool')
+
+# Seconds after which an unused connection is closed
+IDLE_TIMEOUT = 10 * 60
+# Connections unused for longer than this many seconds are health checked before they are reused
+CHECK_INTERVAL = 60
+
+
+class _PooledClient(object):
+    __slots__ = ('client', 'check', 'close', 'last_used', 'failed')
+
+    def __init__(self, client, check, close):
+        self.client = client
+        self.check = check
+        self.close = close
+        self.last_used = time.time()
+        # An error was reported while using the connection, it is checked before it is reused
+        self.failed = False
+
+
+class ClientPool(object):
+    """Registry of open client connections, keyed by connection settings."""
+
+    def __init__(self, idle_timeout=IDLE_TIMEOUT, check_interval=CHECK_INTERVAL):
+        self.idle_timeout = idle_timeout
+        self.check_interval = check_interval
+        self.stats = {'created': 0, 'reused': 0, 'failed_checks': 0, 'evicted': 0}
+        self._clients = {}
+        self._lock = threading.RLock()
+
+    def get(self, key, create, check=None, close=None):
+        """
+        Returns the open connection for `key`, creating one if needed.
+
+        :param key: Hashable identifying the connection, should contain everything used to connect
+        :param create: Callable returning a new connected client
+        :param check: Optional callable taking the client, raising or returning False if the connection is unusable
+        :param close: Optional callable taking the client, closing the connection
+        """
+        with self._lock:
+            self.evict_idle()
+            pooled = self._clients.get(key)
+            if pooled is not None:
+                if self._healthy(pooled):
+                    self.stats['reused'] += 1
+                    pooled.last_used = time.time()
+                    log.debug('Reusing connection %s', key[0] if isinstance(key, tuple) else key)
+                    return pooled.client
+                self.stats['failed_checks'] += 1
+                self._close(key)
+            client = create()
+            self.stats['created'] += 1
+            self._clients[key] = _PooledClient(client, check, close)
+            return client
+
+    def report_error(self, key):
+        """
+        Marks the connection for `key` as possibly broken, it is checked before it is handed out again. Unlike
+        :meth:`discard` this doesn't close the connection, which may still be used by the task that had the error.
+        """
+        with self._lock:
+            pooled = self._clients.get(key)
+            if pooled is not None:
+                pooled.failed = True
+
+    def discard(self, key):
+        """Closes and forgets the connection for `key`, to be called when a connection turned out to be broken."""
+        with self._lock:
+            if key in self._clients:
+                self._close(key)
+
+    def evict_idle(self):
+        """Closes the connections which have been idle for longer than `idle_timeout`."""
+        with self._lock:
+            now = time.time()
+            for key, pooled in list(self._clients.items()):
+                if now - pooled.last_used > self.idle_timeout:
+                    self.stats['evicted'] += 1
+                    self._close(key)
+
+    def clear(self):
+        """Closes all connections."""
+        with self._lock:
+            for key in list(self._clients):
+                self._close(key)
+
+    def _healthy(self, pooled):
+        if pooled.check is None or (not pooled.failed and time.time() - pooled.last_used < self.check_interval):
+            return True
+        try:
+            healthy = pooled.check(pooled.client) is not False
+            pooled.failed = False
+            return healthy
+        except Exception as e:
+            log.debug('Pooled connection failed health check: %s', e)
+            return False
+
+    def _close(self, key):
+        pooled = self._clients.pop(key)
+        if pooled.close is None:
+            return
+        try:
+            pooled.close(pooled.client)
+        except Exception as e:
+            log.debug('Error closing pooled connection: %s', e)
+
+    def __len__(self):
+        return len(self._clients)
+
+
+pool = ClientPool()
+
+
+def get_client(key, create, check=None, close=None):
+    """Returns the open connection for `key` from the shared pool, see :meth:`ClientPool.get`"""
+    return pool.get(key, create, check=check, close=close)
+
+
+def report_client_error(key):
+    """Marks a connection in the shared pool to be checked before reuse, see :meth:`ClientPool.report_error`"""
+    pool.report_error(key)
+
+
+def discard_client(key):
+    """Closes a broken connection in the shared pool, see :meth:`ClientPool.discard`"""
+    pool.discard(key)
+
+
+@event('manager.shutdown')
+def close_clients(manager):
+    if pool.stats['created']:
+        log.debug('Client connections created: %(created)s, reused: %(reused)s, failed checks: %(failed_checks)s, '
+                  'evicted: %(evicted)s', pool.stats)
+    pool.clear()
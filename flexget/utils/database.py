@@ -13,6 +13,7 @@ from sqlalchemy.ext.hybrid import Comparator, hybrid_property
 from flexget.manager import Session
 from flexget.utils import qualities, json
 from flexget.entry import Entry
+from flexget.utils.tools import chunked
 
 
 def with_session(*args, **kwargs):
@@ -235,3 +236,39 @@ def year_property(date_attr):
         return extract('year', getattr(cls, date_attr))
 
     return hybrid_property(getter, expr=expr)
+
+
+def entry_lookup(session, model, entries, *criterion):
+    """
+    Loads the stored list entries which may match any of `entries` with a few chunked queries.
+
+    :param model: Mapped class with `title` and `original_url` columns
+    :param criterion: Extra filters for the query, e.g. the list id
+    :return: Tuple of dicts mapping titles and original urls to lists of stored entries, for :func:`lookup_entry`
+    """
+    query = session.query(model).filter(*criterion)
+    titles = list(set(entry['title'] for entry in entries))
+    urls = list(set(entry['original_url'] for entry in entries if entry.get('original_url')))
+    rows = {}
+    for chunk in chunked(titles):
+        rows.update((row.id, row) for row in query.filter(model.title.in_(chunk)))
+    for chunk in chunked(urls):
+        rows.update((row.id, row) for row in query.filter(model.original_url.in_(chunk)))
+    by_title, by_url = {}, {}
+    for row_id in sorted(rows):
+        row = rows[row_id]
+        by_title.setdefault(row.title, []).append(row)
+        if row.original_url:
+            by_url.setdefault(row.original_url, []).append(row)
+    return by_title, by_url
+
+
+def lookup_entry(lookup, entry):
+    """Finds the stored entry matching `entry` by title or original url from an :func:`entry_lookup` result."""
+    by_title, by_url = lookup
+    candidates = by_title.get(entry['title'], [])
+    if entry.get('original_url'):
+        candidates = candidates + by_url.get(entry['original_url'], [])
+    if candidates:
+        # Rows which are not flushed yet have no id, prefer the stored ones
+        return min(candidates, key=lambda row: (row.id is None, row.id or 0))
@@ -0,0 +1,173 @@
+"""
+Keeps listings of directory trees in memory, so that plugins checking the same folders over and over (like the
+exists family of filters) do not have to walk the whole tree every time.
+
+Listings are revalidated on every :func:`get_directory_index` call by comparing directory mtimes, so only
+directories which had entries added, removed or renamed since the previous scan are listed again.
+"""
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import logging
+import os
+import time
+
+from path import Path
+
+try:
+    from os import scandir
+except ImportError:
+    scandir = None
+
+log = logging.getLogger('directory_index')
+
+DIR, FILE, OTHER = 'dir', 'file', 'other'
+
+# Directory mtimes may have a coarse resolution, so directories modified this close to their last listing are always
+# listed again, in case more changes happened within the same mtime tick.
+RACY_SECONDS = 2
+
+_indexes = {}
+
+
+class _Listing(object):
+    __slots__ = ('mtime', 'scanned', 'children')
+
+    def __init__(self, mtime, scanned, children):
+        self.mtime = mtime
+        self.scanned = scanned
+        # List of (name, kind) tuples in directory order
+        self.children = children
+
+
+def _list_dir(path):
+    children = []
+    if scandir is not None:
+        for child in scandir(path):
+            try:
+                if child.is_dir():
+                    kind = DIR
+                elif child.is_file():
+                    kind = FILE
+                else:
+                    kind = OTHER
+            except OSError:
+                kind = OTHER
+            children.append((child.name, kind))
+        return children
+    for name in os.listdir(path):
+        full = os.path.join(path, name)
+        try:
+            if os.path.isdir(full):
+                kind = DIR
+            elif os.path.isfile(full):
+                kind = FILE
+            else:
+                kind = OTHER
+        except OSError:
+            kind = OTHER
+        children.append((name, kind))
+    return children
+
+
+class DirectoryIndex(object):
+    """In memory listing of the tree below `root`."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.generation = 0
+        self._listings = {}
+
+    def refresh(self):
+        """
+        Brings the index up to date. Every directory is stat'ed, but only the changed ones are listed again.
+
+        :return: True if anything in the tree changed since the previous refresh.
+        """
+        seen = set()
+        visited = set()
+        counts = {'listed': 0, 'reused': 0}
+        self._refresh_dir(str(self.root), seen, visited, counts)
+        removed = set(self._listings) - seen
+        for path in removed:
+            del self._listings[path]
+        changed = bool(counts['listed'] or removed)
+        if changed:
+            self.generation += 1
+        log.debug('Refreshed index of %s: %s directories listed, %s unchanged', self.root, counts['listed'],
+                  counts['reused'])
+        return changed
+
+    def _refresh_dir(self, path, seen, visited, counts):
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            log.debug('Unable to access %s: %s', path, e)
+            return
+        # Guard against symlink loops
+        if (stat.st_dev, stat.st_ino) in visited:
+            return
+        visited.add((stat.st_dev, stat.st_ino))
+        seen.add(path)
+
+        listing = self._listings.get(path)
+        if listing is None or listing.mtime != stat.st_mtime or listing.scanned - stat.st_mtime < RACY_SECONDS:
+            try:
+                children = _list_dir(path)
+            except OSError as e:
+                log.debug('Unable to list directory %s: %s', path, e)
+                self._listings.pop(path, None)
+                return
+            new_listing = _Listing(stat.st_mtime, time.time(), children)
+            if listing is None or listing.children != children:
+                counts['listed'] += 1
+            else:
+                counts['reused'] += 1
+            listing = self._listings[path] = new_listing
+        else:
+            counts['reused'] += 1
+
+        for name, kind in listing.children:
+            if kind == DIR:
+                self._refresh_dir(os.path.join(path, name), seen, visited, counts)
+
+    def walk(self, kind=None):
+        """
+        Iterates over the indexed tree depth first like :meth:`path.Path.walk`.
+
+        :param kind: Only yield entries of this kind (`DIR`, `FILE` or `OTHER`), default is to yield everything.
+        :return: Iterator of :class:`path.Path` objects
+        """
+        return self._walk(str(self.root), kind)
+
+    def _walk(self, path, kind):
+        listing = self._listings.get(path)
+        if listing is None:
+            return
+        for name, child_kind in listing.children:
+            child = os.path.join(path, name)
+            if kind is None or child_kind == kind:
+                yield Path(child)
+            if child_kind == DIR:
+                for item in self._walk(child, kind):
+                    yield item
+
+    def walkfiles(self):
+        return self.walk(FILE)
+
+    def walkdirs(self):
+        return self.walk(DIR)
+
+
+def get_directory_index(root):
+    """
+    Returns the shared :class:`DirectoryIndex` for `root`, refreshed to reflect the current state of the tree.
+
+    :param root: Path of the directory to index
+    """
+    root = Path(root).expanduser().abspath()
+    index = _indexes.get(root)
+    if index is None:
+        index = _indexes[root] = DirectoryIndex(root)
+    index.refresh()
+    return index
@@ -4,6 +4,8 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 import logging
 from collections import MutableMapping
 
+from flexget.utils import metrics
+
 log = logging.getLogger('lazy_lookup')
 
 
@@ -33,6 +35,8 @@ class LazyLookup(object):
                 return None
             func = self.func_list.pop(index)
             self.key_list.pop(index)
+            if metrics.enabled:
+                metrics.observe_lazy_lookup(func)
             try:
                 func(self.store)
             except PluginError as e:
@@ -0,0 +1,283 @@
+"""
+Low overhead counters for the metrics exporter (see the `metrics` daemon plugin).
+
+Metrics follow the Prometheus data model, and :func:`render` outputs all of them in the Prometheus text exposition
+format. Instrumented code only touches the metrics when :data:`enabled` is set, which the exporter does when it is
+started, so there is close to no cost when nothing is scraping them.
+"""
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import bisect
+import functools
+import logging
+import threading
+import time
+
+from future.moves.urllib.parse import urlparse
+from sqlalchemy import event as sqlalchemy_event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger('metrics')
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upper bounds of the histogram buckets in seconds
+DEFAULT_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+TASK_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+enabled = False
+registry = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (name, _escape(value)) for name, value in pairs)
+
+
+class _Metric(object):
+    type = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._children = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def labels(self, *values):
+        """Returns the child metric for the given label values, in the order the label names were given."""
+        if len(values) != len(self.label_names):
+            raise ValueError('%s expects labels %s' % (self.name, self.label_names))
+        values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _default(self):
+        if self.label_names:
+            raise ValueError('%s needs to be used through labels()' % self.name)
+        return self.labels()
+
+    def clear(self):
+        with self._lock:
+            self._children = {}
+
+    def render(self):
+        lines = ['# HELP %s %s' % (self.name, self.documentation.replace('\n', ' ')),
+                 '# TYPE %s %s' % (self.name, self.type)]
+        for values, child in sorted(self._children.items()):
+            for suffix, extra, value in child.samples():
+                lines.append('%s%s%s %s' % (self.name, suffix, _format_labels(self.label_names, values, extra),
+                                            _format_value(value)))
+        return lines
+
+
+class _Value(object):
+    __slots__ = ('value', 'lock', 'function')
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+        self.function = None
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        """Makes the value get evaluated by calling `function` when it is rendered."""
+        self.function = function
+
+    def samples(self):
+        value = self.value
+        if self.function is not None:
+            try:
+                value = self.function()
+            except Exception as e:
+                log.debug('Error evaluating metric: %s', e)
+                return []
+        return [('', None, value)]
+
+
+class Counter(_Metric):
+    """Value which only goes up."""
+
+    type = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    """Value which can go up and down, or which is evaluated when rendered."""
+
+    type = 'gauge'
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value):
+        self._default().set(value)
+
+    def set_function(self, function):
+        self._default().set_function(function)
+
+
+class _HistogramValue(object):
+    __slots__ = ('buckets', 'counts', 'sum', 'lock')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def samples(self):
+        with self.lock:
+            counts = list(self.counts)
+            total = self.sum
+        samples = []
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + [float('inf')], counts):
+            cumulative += count
+            samples.append(('_bucket', ('le', _format_value(float(bound))), cumulative))
+        samples.append(('_sum', None, total))
+        samples.append(('_count', None, cumulative))
+        return samples
+
+
+class Histogram(_Metric):
+    """Counts observed values in buckets."""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super(Histogram, self).__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+
+def render():
+    """Returns all metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+task_queue_length = Gauge('flexget_task_queue_length', 'Number of tasks waiting in the task queue')
+task_queue_wait = Histogram('flexget_task_queue_wait_seconds', 'Time tasks spent waiting in the task queue',
+                            buckets=TASK_BUCKETS)
+task_runs = Counter('flexget_task_runs_total', 'Task executions by outcome', ['task', 'status'])
+task_duration = Histogram('flexget_task_duration_seconds', 'Task execution time', ['task'], buckets=TASK_BUCKETS)
+task_entries_produced = Counter('flexget_task_entries_produced_total', 'Entries produced by the inputs of tasks',
+                                ['task'])
+task_entries_accepted = Counter('flexget_task_entries_accepted_total', 'Entries accepted by tasks', ['task'])
+http_requests = Counter('flexget_http_requests_total', 'HTTP requests by domain and outcome', ['domain', 'status'])
+http_connections_created = Counter('flexget_http_connections_created_total',
+                                   'HTTP connections opened by host, requests on kept alive connections don\'t open '
+                                   'new ones', ['host'])
+http_request_duration = Histogram('flexget_http_request_duration_seconds', 'HTTP request time by domain',
+                                  ['domain'])
+db_queries = Counter('flexget_db_queries_total', 'Database queries executed')
+db_query_duration = Histogram('flexget_db_query_duration_seconds', 'Database query execution time')
+lazy_lookups = Counter('flexget_lazy_lookups_total', 'Lazy field lookups run by lookup function', ['lookup'])
+
+
+def observe_task(task, seconds, status):
+    """Records a finished task execution."""
+    task_runs.labels(task.name, status).inc()
+    task_duration.labels(task.name).observe(seconds)
+    phases = getattr(task, 'phase_stats', {})
+    if 'input' in phases:
+        task_entries_produced.labels(task.name).inc(
+            sum(phases['input'].get(state, 0) for state in ('undecided', 'accepted', 'rejected', 'failed')))
+    if 'output' in phases:
+        task_entries_accepted.labels(task.name).inc(phases['output'].get('accepted', 0))
+
+
+def observe_http_request(url, seconds, status):
+    domain = urlparse(url).hostname or 'unknown'
+    http_requests.labels(domain, status).inc()
+    http_request_duration.labels(domain).observe(seconds)
+
+
+def observe_lazy_lookup(func):
+    # Lazy lookups can also be partials or callable objects, which have no __name__
+    while isinstance(func, functools.partial):
+        func = func.func
+    name = getattr(func, '__name__', type(func).__name__)
+    module = getattr(func, '__module__', None) or type(func).__module__
+    lazy_lookups.labels('%s.%s' % (module.rsplit('.', 1)[-1], name)).inc()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['metrics_query_start'] = time.time()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('metrics_query_start', None)
+    if started is None:
+        return
+    db_queries.inc()
+    db_query_duration.observe(time.time() - started)
+
+
+def enable():
+    """Starts collecting metrics."""
+    global enabled
+    if enabled:
+        return
+    enabled = True
+    sqlalchemy_event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    sqlalchemy_event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def disable():
+    """Stops collecting metrics, values collected so far are kept."""
+    global enabled
+    if not enabled:
+        return
+    enabled = False
+    sqlalchemy_event.remove(Engine, 'before_cursor_execute', _before_cursor_execute)
+    sqlalchemy_event.remove(Engine, 'after_cursor_execute', _after_cursor_execute)
@@ -8,6 +8,10 @@ import logging
 
 log = logging.getLogger('utils.qualities')
 
+# Maximum number of parsed texts remembered by :meth:`Quality.parse`
+PARSE_CACHE_SIZE = 10000
+_parse_cache = {}
+
 
 class QualityComponent(object):
     """"""
@@ -29,10 +33,12 @@ class QualityComponent(object):
         self.name = name
         self.modifier = modifier
         self.defaults = defaults or []
+        self._hash = hash(self.type + str(self.value))
 
         # compile regexp
         if regexp is None:
             regexp = re.escape(name)
+        self.regexp_source = regexp
         self.regexp = re.compile('(?<![^\W_])(' + regexp + ')(?![^\W_])', re.IGNORECASE)
 
     def matches(self, text):
@@ -51,7 +57,7 @@ class QualityComponent(object):
         return True, text
 
     def __hash__(self):
-        return hash(self.type + str(self.value))
+        return self._hash
 
     def __bool__(self):
         return bool(self.value)
@@ -194,6 +200,23 @@ for items in (_resolutions, _sources, _codecs, _audios):
         _registry[item.name] = item
 
 
+def _combined_regexp(components):
+    """
+    Builds one regexp which matches wherever any of `components` would match. It is used to skip a whole category
+    in a single search when none of its components are present in the text.
+    """
+    alternation = '|'.join('(?:%s)' % c.regexp_source for c in components)
+    return re.compile('(?<![^\W_])(?:' + alternation + ')(?![^\W_])', re.IGNORECASE)
+
+
+_combined = {
+    'resolution': _combined_regexp(_resolutions),
+    'source': _combined_regexp(_sources),
+    'codec': _combined_regexp(_codecs),
+    'audio': _combined_regexp(_audios)
+}
+
+
 def all_components():
     return iter(_registry.values())
 
@@ -221,6 +244,10 @@ class Quality(object):
         :param text: The string to parse
         """
         self.text = text
+        cached = _parse_cache.get(text)
+        if cached:
+            self.resolution, self.source, self.codec, self.audio, self.clean_text = cached
+            return
         self.clean_text = text
         self.resolution = self._find_best(_resolutions, _UNKNOWNS['resolution'], False)
         self.source = self._find_best(_sources, _UNKNOWNS['source'])
@@ -232,11 +259,16 @@ class Quality(object):
                 default = _registry[default]
                 if not getattr(self, default.type):
                     setattr(self, default.type, default)
+        if len(_parse_cache) >= PARSE_CACHE_SIZE:
+            _parse_cache.clear()
+        _parse_cache[text] = (self.resolution, self.source, self.codec, self.audio, self.clean_text)
 
     def _find_best(self, qlist, default=None, strip_all=True):
         """Finds the highest matching quality component from `qlist`"""
         result = None
         search_in = self.clean_text
+        if not _combined[default.type].search(search_in):
+            return default
         for item in qlist:
             match = item.matches(search_in)
             if match[0]:
@@ -262,8 +294,10 @@ class Quality(object):
 
     @property
     def _comparator(self):
-        modifier = sum(c.modifier for c in self.components if c.modifier)
-        return [modifier] + self.components
+        # Components of each type are compared by value, so plain ints give the same ordering much more cheaply
+        components = self.components
+        modifier = sum(c.modifier for c in components if c.modifier)
+        return (modifier, components[0].value, components[1].value, components[2].value, components[3].value)
 
     def __contains__(self, other):
         if isinstance(other, basestring):
@@ -362,9 +396,10 @@ class RequirementComponent(object):
         if comp in self.acceptable:
             return True
         if self.min or self.max:
-            if self.min and comp < self.min:
+            # Types already match, compare sort values directly
+            if self.min and comp.value < self.min.value:
                 return False
-            if self.max and comp > self.max:
+            if self.max and comp.value > self.max.value:
                 return False
             return True
         if not self.acceptable:
@@ -4,17 +4,28 @@ from future.moves.urllib.request import urlopen
 from future.moves.urllib.parse import urlparse
 from future.utils import text_to_native_str
 
+import os
 import time
 import logging
+import threading
 from datetime import timedelta, datetime
 
 import requests
+from sqlalchemy import create_engine, Column, DateTime, Float, Integer, MetaData, Table, Unicode
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import StaticPool
 # Allow some request objects to be imported from here instead of requests
 import warnings
 from requests import RequestException
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.poolmanager import PoolManager
 
 from flexget import __version__ as version
-from flexget.utils.tools import parse_timedelta, TimedDict, timedelta_total_seconds
+from flexget.config_schema import register_config_key
+from flexget.event import event
+from flexget.utils import metrics
+from flexget.utils.tools import parse_timedelta, timedelta_total_seconds
 
 # If we use just 'requests' here, we'll get the logger created by requests, rather than our own
 log = logging.getLogger('utils.requests')
@@ -24,35 +35,117 @@ logging.getLogger('requests.packages.urllib3').setLevel(logging.WARNING)
 # same as above, but for systems where urllib3 isn't part of the requests pacakge (i.e., Ubuntu)
 logging.getLogger('urllib3').setLevel(logging.WARNING)
 
-# Time to wait before trying an unresponsive site again
+# Time to wait before trying an unresponsive site again, doubled for every timeout in a row up to MAX_WAIT_TIME
 WAIT_TIME = timedelta(seconds=60)
-# Remembers sites that have timed out
-unresponsive_hosts = TimedDict(WAIT_TIME)
+MAX_WAIT_TIME = timedelta(hours=1)
+# Remembers sites that have timed out, host: (time until which it is not tried, timeouts in a row)
+unresponsive_hosts = {}
+# How often unresponsive hosts are reloaded from the limits database, to notice timeouts in other processes
+RELOAD_INTERVAL = 10
+_unresponsive_loaded = 0
+
+# Rate limit and timeout state is kept in its own database, shared by all FlexGet processes using the same config.
+# Like the scheduler jobs, it is separate from the main database so that requests made while a task holds a write lock
+# on the main database don't have to wait for it.
+limits_metadata = MetaData()
+limiter_table = Table('domain_limiter', limits_metadata,
+                      Column('domain', Unicode, primary_key=True),
+                      Column('tokens', Float),
+                      Column('last_update', DateTime))
+unresponsive_table = Table('unresponsive_host', limits_metadata,
+                           Column('host', Unicode, primary_key=True),
+                           Column('until', DateTime),
+                           Column('timeouts', Integer))
+limits_engine = None
+
+# Number of hosts the shared connection pools are kept for, and connections kept open per host
+POOL_HOSTS = 20
+POOL_MAXSIZE = 10
+
+pool_config_schema = {
+    'type': 'object',
+    'properties': {
+        'maxsize': {'type': 'integer', 'minimum': 1},
+        'hosts': {'type': 'object', 'additionalProperties': {'type': 'integer', 'minimum': 1}}
+    },
+    'additionalProperties': False
+}
+
+
+def _limits_db(func):
+    """Runs `func` with a connection in a transaction, returns None if the limits database is not available."""
+    engine = limits_engine
+    if engine is None:
+        return None
+    try:
+        with engine.begin() as conn:
+            return func(conn)
+    except SQLAlchemyError as e:
+        log.debug('Unable to use limits database: %s', e)
+        return None
+
+
+def _load_unresponsive():
+    global _unresponsive_loaded
+    if time.time() - _unresponsive_loaded < RELOAD_INTERVAL:
+        return
+    _unresponsive_loaded = time.time()
+    rows = _limits_db(lambda conn: conn.execute(unresponsive_table.select().where(
+        unresponsive_table.c.until > datetime.now() - MAX_WAIT_TIME)).fetchall())
+    if rows is not None:
+        unresponsive_hosts.clear()
+        unresponsive_hosts.update((row['host'], (row['until'], row['timeouts'])) for row in rows)
 
 
 def is_unresponsive(url):
     """
-    Checks if host of given url has timed out within WAIT_TIME
+    Checks if host of given url has timed out recently, and should not be tried yet
 
     :param url: The url to check
-    :return: True if the host has timed out within WAIT_TIME
+    :return: True if the host has timed out and its wait time has not passed
     :rtype: bool
     """
     host = urlparse(url).hostname
-    return host in unresponsive_hosts
+    _load_unresponsive()
+    state = unresponsive_hosts.get(host)
+    return state is not None and state[0] > datetime.now()
 
 
 def set_unresponsive(url):
     """
-    Marks the host of a given url as unresponsive
+    Marks the host of a given url as unresponsive. The time it is not tried doubles with every timeout in a row.
 
     :param url: The url that timed out
     """
     host = urlparse(url).hostname
-    if host in unresponsive_hosts:
+    now = datetime.now()
+    until, timeouts = unresponsive_hosts.get(host, (None, 0))
+    if until and until > now:
         # If somehow this is called again before previous timer clears, don't refresh
         return
-    unresponsive_hosts[host] = True
+    if until and now - until > MAX_WAIT_TIME:
+        # Timed out long ago, start over
+        timeouts = 0
+    timeouts += 1
+    wait = min(WAIT_TIME * 2 ** (timeouts - 1), MAX_WAIT_TIME)
+    unresponsive_hosts[host] = (now + wait, timeouts)
+    log.debug('%s timed out %s times in a row, not trying it for %s', host, timeouts, wait)
+
+    def store(conn):
+        conn.execute(unresponsive_table.delete().where(unresponsive_table.c.host == host))
+        conn.execute(unresponsive_table.insert().values(host=host, until=now + wait, timeouts=timeouts))
+    _limits_db(store)
+
+
+def set_responsive(url):
+    """
+    Forgets the timeouts of the host of a given url
+
+    :param url: The url that responded
+    """
+    host = urlparse(url).hostname
+    if unresponsive_hosts.pop(host, None) is not None:
+        _limits_db(lambda conn: conn.execute(unresponsive_table.delete().where(unresponsive_table.c.host == host)))
 
 
 class DomainLimiter(object):
@@ -70,9 +163,10 @@ class TokenBucketLimiter(DomainLimiter):
 
     New instances for the same domain will restore previous values.
     """
-    # This is just an in memory cache right now, it works for the daemon, and across tasks in a single execution
-    # but not for multiple executions via cron. Do we need to store this to db?
+    # In memory state, used when the limits database is not available
     state_cache = {}
+    # Threads of this process take tokens one by one
+    _locks = {}
 
     def __init__(self, domain, tokens, rate, wait=True):
         """
@@ -86,6 +180,7 @@ class TokenBucketLimiter(DomainLimiter):
         self.wait = wait
         # Restore previous state for this domain, or establish new state cache
         self.state = self.state_cache.setdefault(domain, {'tokens': self.max_tokens, 'last_update': datetime.now()})
+        self.lock = self._locks.setdefault(domain, threading.Lock())
 
     @property
     def tokens(self):
@@ -104,24 +199,50 @@ class TokenBucketLimiter(DomainLimiter):
         self.state['last_update'] = value
 
     def __call__(self):
-        if self.tokens < self.max_tokens:
-            regen = (timedelta_total_seconds(datetime.now() - self.last_update) /
-                     timedelta_total_seconds(self.rate))
-            self.tokens += regen
-        self.last_update = datetime.now()
-        if self.tokens < 1:
-            if not self.wait:
-                raise RequestException('Requests to %s have exceeded their limit.' % self.domain)
-            wait = timedelta_total_seconds(self.rate) * (1 - self.tokens)
+        with self.lock:
+            wait = _limits_db(self._take_shared_token)
+            if wait is None:
+                wait = self._take_token(self.state)
+        if wait > 0:
             # Don't spam console if wait is low
             if wait < 4:
                 level = log.debug
             else:
                 level = log.verbose
             level('Waiting %.2f seconds until next request to %s', wait, self.domain)
-            # Sleep until it is time for the next request
+            # Sleep until it is time for the next request, the token is already taken
             time.sleep(wait)
-        self.tokens -= 1
+
+    def _take_shared_token(self, conn):
+        # Inserting first takes the database write lock, so other processes wait until this one has taken its token
+        conn.execute(limiter_table.insert().prefix_with('OR IGNORE').values(
+            domain=self.domain, tokens=self.max_tokens, last_update=datetime.now()))
+        row = conn.execute(limiter_table.select().where(limiter_table.c.domain == self.domain)).first()
+        state = {'tokens': row['tokens'], 'last_update': row['last_update']}
+        wait = self._take_token(state)
+        conn.execute(limiter_table.update().where(limiter_table.c.domain == self.domain).values(
+            tokens=state['tokens'], last_update=state['last_update']))
+        return wait
+
+    def _take_token(self, state):
+        """
+        Takes a token from bucket `state`.
+
+        :return: Seconds to wait until the token is available
+        """
+        now = datetime.now()
+        tokens = min(self.max_tokens, state['tokens'])
+        if tokens < self.max_tokens:
+            tokens += timedelta_total_seconds(now - state['last_update']) / timedelta_total_seconds(self.rate)
+        state['last_update'] = now
+        state['tokens'] = tokens
+        if tokens >= 1:
+            state['tokens'] -= 1
+            return 0
+        if not self.wait:
+            raise RequestException('Requests to %s have exceeded their limit.' % self.domain)
+        state['tokens'] -= 1
+        return timedelta_total_seconds(self.rate) * (1 - tokens)
 
 
 class TimedLimiter(TokenBucketLimiter):
@@ -167,6 +288,94 @@ def limit_domains(url, limit_dict):
             break
 
 
+# Counts of the connections opened and the requests sent by all connection pools
+connection_stats = {'created': 0, 'requests': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(stat):
+    with _stats_lock:
+        connection_stats[stat] += 1
+
+
+class _CountingPoolMixin(object):
+    def _new_conn(self):
+        _count('created')
+        if metrics.enabled:
+            metrics.http_connections_created.labels(self.host).inc()
+        return super(_CountingPoolMixin, self)._new_conn()
+
+    def _make_request(self, *args, **kwargs):
+        _count('requests')
+        return super(_CountingPoolMixin, self)._make_request(*args, **kwargs)
+
+
+class CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class HostPoolManager(PoolManager):
+    """PoolManager counting connections, with pool sizes configurable per host."""
+
+    def __init__(self, *args, **kwargs):
+        self.host_maxsize = kwargs.pop('host_maxsize', {})
+        super(HostPoolManager, self).__init__(*args, **kwargs)
+        self.pool_classes_by_scheme = {'http': CountingHTTPConnectionPool, 'https': CountingHTTPSConnectionPool}
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        if host in self.host_maxsize:
+            request_context = (request_context or self.connection_pool_kw).copy()
+            request_context['maxsize'] = self.host_maxsize[host]
+        return super(HostPoolManager, self)._new_pool(scheme, host, port, request_context=request_context)
+
+
+class PooledAdapter(HTTPAdapter):
+    """Transport adapter using :class:`HostPoolManager`."""
+
+    def __init__(self, host_maxsize=None, **kwargs):
+        self.host_maxsize = host_maxsize or {}
+        super(PooledAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = HostPoolManager(num_pools=connections, maxsize=maxsize, block=block, strict=True,
+                                           host_maxsize=self.host_maxsize, **pool_kwargs)
+
+
+# Adapters shared by the sessions of tasks, so that connections are kept alive and reused between tasks
+shared_adapters = {}
+_shared_lock = threading.Lock()
+_pool_config = {}
+
+
+def get_shared_adapters():
+    """Returns the shared transport adapters by url prefix, creating them if needed."""
+    with _shared_lock:
+        if not shared_adapters:
+            maxsize = _pool_config.get('maxsize', POOL_MAXSIZE)
+            hosts = _pool_config.get('hosts', {})
+            # Same retries as the adapters of a new Session
+            shared_adapters['http://'] = PooledAdapter(host_maxsize=hosts, pool_connections=POOL_HOSTS,
+                                                       pool_maxsize=maxsize, max_retries=1)
+            shared_adapters['https://'] = PooledAdapter(host_maxsize=hosts, pool_connections=POOL_HOSTS,
+                                                        pool_maxsize=maxsize)
+        return dict(shared_adapters)
+
+
+def close_shared_adapters():
+    """Closes the connections of the shared adapters, new ones are created when needed."""
+    with _shared_lock:
+        for adapter in shared_adapters.values():
+            adapter.close()
+        shared_adapters.clear()
+
+
 class Session(requests.Session):
     """
     Subclass of requests Session class which defines some of our own defaults, records unresponsive sites,
@@ -174,12 +383,21 @@ class Session(requests.Session):
 
     """
 
-    def __init__(self, timeout=30, max_retries=1, *args, **kwargs):
-        """Set some defaults for our session if not explicitly defined."""
+    def __init__(self, timeout=30, max_retries=1, shared_pool=False, *args, **kwargs):
+        """
+        Set some defaults for our session if not explicitly defined.
+
+        :param bool shared_pool: Use the connection pools shared between sessions. Cookies and headers stay specific to
+          this session.
+        """
         super(Session, self).__init__(*args, **kwargs)
         self.timeout = timeout
         self.stream = True
-        self.adapters['http://'].max_retries = max_retries
+        if shared_pool and max_retries == 1:
+            for prefix, adapter in get_shared_adapters().items():
+                self.mount(prefix, adapter)
+        else:
+            self.adapters['http://'].max_retries = max_retries
         # Stores min intervals between requests for certain sites
         self.domain_limiters = {}
         self.headers.update({'User-Agent': 'FlexGet/%s (www.flexget.com)' % version})
@@ -212,6 +430,13 @@ class Session(requests.Session):
         """
         self.domain_limiters[limiter.domain] = limiter
 
+    def close(self):
+        """Closes the adapters of this session, leaving the shared ones open."""
+        shared = list(shared_adapters.values())
+        for adapter in self.adapters.values():
+            if adapter not in shared:
+                adapter.close()
+
     def request(self, method, url, *args, **kwargs):
         """
         Does a request, but raises Timeout immediately if site is known to timeout, and records sites that timeout.
@@ -236,13 +461,23 @@ class Session(requests.Session):
             log.debug('No adaptor, passing off to urllib')
             return _wrap_urlopen(url, timeout=kwargs['timeout'])
 
+        started = time.time()
         try:
             log.debug('%sing URL %s with args %s and kwargs %s', method.upper(), url, args, kwargs)
             result = super(Session, self).request(method, url, *args, **kwargs)
         except requests.Timeout:
             # Mark this site in known unresponsive list
             set_unresponsive(url)
+            if metrics.enabled:
+                metrics.observe_http_request(url, time.time() - started, 'timeout')
+            raise
+        except requests.RequestException:
+            if metrics.enabled:
+                metrics.observe_http_request(url, time.time() - started, 'error')
             raise
+        if metrics.enabled:
+            metrics.observe_http_request(url, time.time() - started, result.status_code)
+        set_responsive(url)
 
         if raise_status:
             result.raise_for_status()
@@ -252,7 +487,7 @@ class Session(requests.Session):
 
 # Define some module level functions that use our Session, so this module can be used like main requests module
 def request(method, url, **kwargs):
-    s = kwargs.pop('session', Session())
+    s = kwargs.pop('session', None) or Session(shared_pool=True)
     return s.request(method=method, url=url, **kwargs)
 
 
@@ -284,3 +519,57 @@ def post(url, data=None, **kwargs):
     :param kwargs: Optional arguments that ``request`` takes.
     """
     return request('post', url, data=data, **kwargs)
+
+
+@event('config.register')
+def register_config():
+    register_config_key('connection_pool', pool_config_schema)
+
+
+@event('manager.config_updated')
+def configure_pool(manager):
+    global _pool_config
+    config = manager.config.get('connection_pool') or {}
+    if config != _pool_config:
+        _pool_config = config
+        # Sessions using the old adapters keep them until they are done
+        with _shared_lock:
+            shared_adapters.clear()
+
+
+@event('manager.initialize')
+def open_limits_db(manager):
+    global limits_engine, _unresponsive_loaded
+    if manager.unit_test:
+        limits_engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    else:
+        filename = os.path.join(manager.config_base, 'db-%s-limits.sqlite' % manager.config_name)
+        limits_engine = create_engine('sqlite:///%s' % filename, connect_args={'check_same_thread': False,
+                                                                                'timeout': 10})
+    for attempt in range(2):
+        try:
+            limits_metadata.create_all(bind=limits_engine)
+            break
+        except SQLAlchemyError as e:
+            # Another process starting at the same time may have just created the tables, try once more
+            if attempt:
+                log.warning('Unable to open request limits database, limits are not shared with other processes: %s',
+                            e)
+                limits_engine = None
+    _unresponsive_loaded = 0
+
+
+@event('manager.shutdown')
+def close_limits_db(manager):
+    global limits_engine
+    if limits_engine is not None:
+        limits_engine.dispose()
+        limits_engine = None
+
+
+@event('manager.shutdown')
+def close_pool(manager):
+    if connection_stats['requests']:
+        log.debug('HTTP connections opened: %s, requests: %s', connection_stats['created'],
+                  connection_stats['requests'])
+    close_shared_adapters()
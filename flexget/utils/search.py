@@ -2,11 +2,19 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import itertools
 import re
+import threading
 from unicodedata import normalize
 
+from flexget import logger
 from flexget.utils.titles.parser import TitleParser
 
+# Searches running at the same time for one search request
+MAX_SEARCH_THREADS = 4
+
+_thread_counter = itertools.count()
+
 
 def clean_symbols(text):
     """Replaces common symbols with spaces. Also normalize unicode strings in decomposed form."""
@@ -60,3 +68,72 @@ def torrent_availability(seeds, leeches):
     """
 
     return seeds * 2 + leeches
+
+
+def run_concurrently(calls, max_threads=MAX_SEARCH_THREADS):
+    """
+    Runs functions in up to `max_threads` threads. Log messages from the threads keep the task and session of the
+    calling thread.
+
+    :param calls: List of functions taking no arguments
+    :return: List of (result, exception) tuples in the order of `calls`
+    """
+    results = [None] * len(calls)
+    if len(calls) == 1:
+        max_threads = 1
+    context = dict(logger.local_context.__dict__)
+    jobs = iter(list(enumerate(calls)))
+    lock = threading.Lock()
+
+    def worker():
+        logger.local_context.__dict__.update(context)
+        while True:
+            with lock:
+                index, call = next(jobs, (None, None))
+            if call is None:
+                return
+            try:
+                results[index] = (call(), None)
+            except Exception as e:
+                results[index] = (None, e)
+
+    if max_threads == 1:
+        worker()
+        return results
+    threads = [threading.Thread(target=worker, name='search-%d' % next(_thread_counter))
+               for _ in range(min(max_threads, len(calls)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def run_search(search_plugin, task, entry, config=None):
+    """
+    Searches for `entry` with a search plugin instance.
+
+    Plugins that set `concurrent_search` get their `search` called once for every search string of the entry, with the
+    searches running concurrently, and the results merged. Other plugins are called once with the whole entry.
+
+    :return: List of result entries
+    """
+    search_strings = entry.get('search_strings', [entry['title']])
+    if not getattr(search_plugin, 'concurrent_search', False) or len(search_strings) < 2:
+        return list(search_plugin.search(task=task, entry=entry, config=config) or [])
+
+    def search(search_string):
+        query = entry.copy()
+        query['search_strings'] = [search_string]
+        return search_plugin.search(task=task, entry=query, config=config)
+
+    results = []
+    found = set()
+    for search_results, error in run_concurrently([lambda s=s: search(s) for s in search_strings]):
+        if error is not None:
+            raise error
+        for result in search_results or []:
+            if result not in found:
+                found.add(result)
+                results.append(result)
+    return results
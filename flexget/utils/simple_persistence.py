@@ -15,7 +15,7 @@ import pickle
 from collections import MutableMapping, defaultdict
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, DateTime, Unicode, select, Index
+from sqlalchemy import Column, Integer, String, DateTime, Unicode, select, Index, and_, bindparam
 
 from flexget import db_schema
 from flexget.event import event
@@ -114,6 +114,9 @@ class SimplePersistence(MutableMapping):
     """
     # Stores values in store[taskname][pluginname][key] format
     class_store = defaultdict(lambda: defaultdict(dict))
+    # The json of the values as they are in the database, in the same format. Only values which differ from these are
+    # written on flush.
+    class_stored = defaultdict(lambda: defaultdict(dict))
 
     def __init__(self, plugin=None):
         self.taskname = None
@@ -128,7 +131,7 @@ class SimplePersistence(MutableMapping):
         self.store[key] = value
 
     def __getitem__(self, key):
-        if key not in self.store or self.store[key] == DELETE:
+        if key not in self.store or self.store[key] is DELETE:
             raise KeyError('%s is not contained in the simple_persistence table.' % key)
         return self.store[key]
 
@@ -144,35 +147,63 @@ class SimplePersistence(MutableMapping):
     @classmethod
     def load(cls, task=None):
         """Load all key/values from `task` into memory from database."""
+        table = SimpleKeyValue.__table__
+        query = select([table.c.plugin, table.c.key, table.c.json]).where(table.c.feed == task)
         with Session() as session:
-            for skv in session.query(SimpleKeyValue).filter(SimpleKeyValue.task == task).all():
+            for row in session.execute(query):
+                cls.class_stored[task][row['plugin']][row['key']] = row['json']
                 try:
-                    cls.class_store[task][skv.plugin][skv.key] = skv.value
-                except TypeError as e:
+                    cls.class_store[task][row['plugin']][row['key']] = json.loads(row['json'], decode_datetime=True)
+                except (TypeError, ValueError) as e:
                     log.warning('Value stored in simple_persistence cannot be decoded. It will be removed. Error: %s',
                                 str(e))
-                    cls.class_store[task][skv.plugin][skv.key] = DELETE
+                    cls.class_store[task][row['plugin']][row['key']] = DELETE
 
     @classmethod
     def flush(cls, task=None):
-        """Flush all in memory key/values to database."""
-        log.debug('Flushing simple persistence for task %s to db.' % task)
+        """Flush changed in memory key/values to database."""
+        stored = cls.class_stored[task]
+        changed = {}
+        deleted = []
+        for pluginname, values in cls.class_store[task].items():
+            for key, value in values.items():
+                if value is DELETE:
+                    deleted.append((pluginname, key))
+                    continue
+                dumped = newstr(json.dumps(value, encode_datetime=True))
+                if stored[pluginname].get(key) != dumped:
+                    changed[(pluginname, key)] = dumped
+        if not changed and not deleted:
+            return
+        log.debug('Flushing %s changed simple persistence values for task %s to db.', len(changed) + len(deleted), task)
+        table = SimpleKeyValue.__table__
+        row_filter = and_(table.c.feed == task, table.c.plugin == bindparam('_plugin'),
+                          table.c.key == bindparam('_key'))
         with Session() as session:
-            for pluginname in cls.class_store[task]:
-                for key, value in cls.class_store[task][pluginname].items():
-                    query = (session.query(SimpleKeyValue).
-                             filter(SimpleKeyValue.task == task).
-                             filter(SimpleKeyValue.plugin == pluginname).
-                             filter(SimpleKeyValue.key == key))
-                    if value == DELETE:
-                        query.delete()
-                    else:
-                        updated = query.update(
-                            {'value': newstr(json.dumps(value, encode_datetime=True))},
-                            synchronize_session=False
-                        )
-                        if not updated:
-                            session.add(SimpleKeyValue(task, pluginname, key, value))
+            # Rows may have been added or removed by another process since load, this query is covered by the index
+            existing = set(tuple(row) for row in
+                           session.execute(select([table.c.plugin, table.c.key]).where(table.c.feed == task)))
+            updates = []
+            inserts = []
+            for (pluginname, key), dumped in changed.items():
+                if (pluginname, key) in existing:
+                    updates.append({'_plugin': pluginname, '_key': key, '_json': dumped})
+                else:
+                    inserts.append({'feed': task, 'plugin': pluginname, 'key': key, 'json': dumped,
+                                    'added': datetime.now()})
+            if deleted:
+                session.execute(table.delete().where(row_filter),
+                                [{'_plugin': pluginname, '_key': key} for pluginname, key in deleted])
+            if updates:
+                session.execute(table.update().where(row_filter).values(json=bindparam('_json')), updates)
+            if inserts:
+                session.execute(table.insert(), inserts)
+        for (pluginname, key), dumped in changed.items():
+            stored[pluginname][key] = dumped
+        for pluginname, key in deleted:
+            stored[pluginname].pop(key, None)
+            if cls.class_store[task][pluginname].get(key) is DELETE:
+                del cls.class_store[task][pluginname][key]
 
 
 class SimpleTaskPersistence(SimplePersistence):
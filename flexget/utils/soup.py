@@ -1,7 +1,9 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
-from bs4 import BeautifulSoup
+import logging
+
+from bs4 import BeautifulSoup, SoupStrainer
 
 # Hack, hide DataLossWarnings
 # Based on html5lib code namespaceHTMLElements=False should do it, but nope ...
@@ -9,8 +11,100 @@ from bs4 import BeautifulSoup
 import warnings
 from html5lib.constants import DataLossWarning
 
+from flexget.config_schema import register_config_key
+from flexget.event import event
+from flexget.utils.tools import TimedDict
+
 warnings.simplefilter('ignore', DataLossWarning)
 
+log = logging.getLogger('utils.soup')
+
+# Slowest parser, but the one that handles broken markup like browsers do
+FALLBACK_PARSER = 'html5lib'
+# Parsers which can fall back to html5lib
+HTML_PARSERS = ('lxml', 'html.parser')
+# Sites whose pages did not parse correctly with a faster parser, these are parsed with html5lib for a while
+fallback_sites = TimedDict('12 hours')
+
+# Parser used when none is given, set with the `html_parser` config key
+default_parser = FALLBACK_PARSER
+
+
+def fast_parser():
+    """Returns the fastest installed html parser."""
+    try:
+        import lxml  # noqa pylint: disable=unused-variable
+    except ImportError:
+        return 'html.parser'
+    return 'lxml'
+
+
+def get_soup(obj, parser=None, site=None, parse_only=None):
+    """
+    Parses html into a BeautifulSoup tree.
+
+    :param obj: Markup as text or bytes, or a file-like object
+    :param parser: BeautifulSoup parser, by default the configured `html_parser`
+    :param site: Name of the site the page is from, pages of sites that failed to parse with a faster parser are
+      parsed with html5lib
+    :param parse_only: SoupStrainer, or dict of its arguments, to build only the matching part of the tree. Ignored
+      by html5lib.
+    """
+    if parser is None:
+        parser = FALLBACK_PARSER if site in fallback_sites else default_parser
+    if parser not in HTML_PARSERS:
+        return BeautifulSoup(obj, parser)
+    if hasattr(obj, 'read'):
+        obj = obj.read()
+    if isinstance(parse_only, dict):
+        parse_only = SoupStrainer(**parse_only)
+    try:
+        return BeautifulSoup(obj, parser, parse_only=parse_only)
+    except Exception as e:
+        log.debug('Parsing %s with %s failed, using %s: %s', site or 'page', parser, FALLBACK_PARSER, e)
+        if site:
+            fallback_sites[site] = True
+        return BeautifulSoup(obj, FALLBACK_PARSER)
+
+
+def extract(obj, selector, site=None, parse_only=None):
+    """
+    Returns the elements matching CSS `selector` from html.
+
+    The page is parsed with the fastest installed parser, building only the part of the tree matching `parse_only`.
+    If nothing matches, the page is parsed again with html5lib, and if that finds the elements, html5lib is used for
+    the pages of `site` from then on.
+
+    :param obj: Markup as text or bytes, or a file-like object
+    :param string selector: CSS selector of the wanted elements
+    :param site: Name of the site the page is from
+    :param parse_only: SoupStrainer, or dict of its arguments, enclosing all wanted elements
+    """
+    if hasattr(obj, 'read'):
+        obj = obj.read()
+    if site not in fallback_sites:
+        elements = get_soup(obj, fast_parser(), site, parse_only).select(selector)
+        if elements:
+            return elements
+    elements = get_soup(obj, FALLBACK_PARSER).select(selector)
+    if elements and site and site not in fallback_sites:
+        log.verbose('Pages from %s don\'t parse correctly with %s, using %s', site, fast_parser(), FALLBACK_PARSER)
+        fallback_sites[site] = True
+    return elements
+
+
+@event('config.register')
+def register_config():
+    register_config_key('html_parser', {'type': 'string', 'enum': ['html5lib', 'lxml', 'html.parser', 'fast']})
+
 
-def get_soup(obj, parser='html5lib'):
-    return BeautifulSoup(obj, parser)
+@event('manager.config_updated')
+def set_default_parser(manager):
+    global default_parser
+    parser = manager.config.get('html_parser', FALLBACK_PARSER)
+    if parser == 'fast':
+        parser = fast_parser()
+    elif parser == 'lxml' and fast_parser() != 'lxml':
+        log.warning('lxml module is not installed, using html.parser')
+        parser = 'html.parser'
+    default_parser = parser
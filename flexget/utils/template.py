@@ -24,6 +24,9 @@ log = logging.getLogger('utils.template')
 
 # The environment will be created after the manager has started
 environment = None
+# Compiled expressions for :func:`evaluate_expression`, keyed by expression text
+_expression_cache = {}
+EXPRESSION_CACHE_SIZE = 1000
 
 
 class RenderError(Exception):
@@ -148,6 +151,7 @@ def make_environment(manager):
                                                    FileSystemLoader(os.path.join(manager.config_base, 'templates'))]),
                               extensions=['jinja2.ext.loopcontrols'])
     environment.template_class = FlexGetTemplate
+    _expression_cache.clear()
     for name, filt in list(globals().items()):
         if name.startswith('filter_'):
             environment.filters[name.split('_', 1)[1]] = filt
@@ -251,7 +255,12 @@ def evaluate_expression(expression, context):
     :param str expression:  A jinja expression to evaluate
     :param context: dictlike, supporting LazyDicts
     """
-    compiled_expr = environment.compile_expression(expression)
+    compiled_expr = _expression_cache.get(expression)
+    if compiled_expr is None:
+        compiled_expr = environment.compile_expression(expression)
+        if len(_expression_cache) >= EXPRESSION_CACHE_SIZE:
+            _expression_cache.clear()
+        _expression_cache[expression] = compiled_expr
     # If we have a LazyDict, grab the underlying store. Our environment supports LazyFields directly
     if isinstance(context, LazyDict):
         context = context.store
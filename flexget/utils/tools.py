@@ -13,7 +13,7 @@ import operator
 import os
 import re
 import sys
-from collections import MutableMapping, defaultdict
+from collections import MutableMapping, OrderedDict, defaultdict
 from datetime import timedelta, datetime
 from pprint import pformat
 
@@ -338,25 +338,51 @@ def arithmeticEval(s):
 
 
 class TimedDict(MutableMapping):
-    """Acts like a normal dict, but keys will only remain in the dictionary for a specified time span."""
+    """
+    Acts like a normal dict, but keys will only remain in the dictionary for a specified time span.
+
+    If `max_size` is given, the summed size of all values (as reported by `sizeof`) is kept below it by evicting
+    the oldest keys first. Values which are larger than `max_size` on their own are not stored at all.
+    """
 
-    def __init__(self, cache_time='5 minutes'):
+    def __init__(self, cache_time='5 minutes', max_size=None, sizeof=sys.getsizeof):
         self.cache_time = parse_timedelta(cache_time)
-        self._store = dict()
+        self.max_size = max_size
+        self.sizeof = sizeof
+        # Kept in insertion order, updated keys are moved to the end, so the oldest keys are always first
+        self._store = OrderedDict()
+        self._sizes = dict()
+        self._total_size = 0
         self._last_prune = datetime.now()
 
+    @property
+    def total_size(self):
+        """Summed size of all stored values, only tracked when `max_size` is set."""
+        return self._total_size
+
+    def _remove(self, key):
+        del self._store[key]
+        self._total_size -= self._sizes.pop(key, 0)
+
     def _prune(self):
         """Prune all expired keys."""
         for key, (add_time, _) in list(self._store.items()):
             if add_time < datetime.now() - self.cache_time:
-                del self._store[key]
+                self._remove(key)
         self._last_prune = datetime.now()
 
+    def _evict(self, size):
+        """Evict oldest keys until a value of `size` fits."""
+        while self._store and self._total_size + size > self.max_size:
+            key = next(iter(self._store))
+            log.debug('Evicting %s from %s to stay within size limit', key, self.__class__.__name__)
+            self._remove(key)
+
     def __getitem__(self, key):
         add_time, value = self._store[key]
         # Prune data and raise KeyError if expired
         if add_time < datetime.now() - self.cache_time:
-            del self._store[key]
+            self._remove(key)
             raise KeyError(key, 'cache time expired')
         return value
 
@@ -364,10 +390,21 @@ class TimedDict(MutableMapping):
         # Make sure we clear periodically, even if old keys aren't accessed again
         if self._last_prune < datetime.now() - (2 * self.cache_time):
             self._prune()
+        if key in self._store:
+            self._remove(key)
+        if self.max_size is not None:
+            size = self.sizeof(value)
+            if size > self.max_size:
+                log.debug('Not storing %s, size %s exceeds limit of %s', key, size, self.max_size)
+                return
+            if self._total_size + size > self.max_size:
+                self._evict(size)
+            self._sizes[key] = size
+            self._total_size += size
         self._store[key] = (datetime.now(), value)
 
     def __delitem__(self, key):
-        del self._store[key]
+        self._remove(key)
 
     def __iter__(self):
         # Uses our getitem to skip expired items